@@ -0,0 +1,89 @@
+# Comandos de manutenção: python -m app.cli <comando>
+import argparse
+from app import dedupe, partitions, rollups, schema
+from app.core.config import settings
+from app.database import SessionLocal, engine
+
+def migrate(args):
+    stamped, before, after = schema.upgrade(engine, args.revision, sql=args.sql)
+    if args.sql:
+        return
+    if stamped:
+        print(f"Banco existente sem controle de versão marcado na revisão {schema.BASELINE_REVISION}.")
+    if before == after:
+        print(f"Esquema já está na revisão {after}.")
+    else:
+        print(f"Esquema migrado de {before or 'vazio'} para {after}.")
+
+def rollups_backfill(args):
+    with SessionLocal() as db:
+        marked = rollups.mark_history_dirty(db, controller_id=args.controller_id)
+    print(f"{marked} buckets de 1 minuto marcados para reagregação.")
+    if args.refresh:
+        rollups_refresh(args)
+
+def rollups_refresh(args):
+    processed = rollups.refresh_all_dirty(SessionLocal)
+    print(f"{processed} buckets de 1 minuto reagregados.")
+
+def partitions_maintain(args):
+    with SessionLocal() as db:
+        if not partitions.is_partitioned(db):
+            print(f"A tabela {partitions.PARENT_TABLE} não é particionada (SQLite ou esquema desatualizado: rode python -m app.cli migrate).")
+            return
+    created, removed = partitions.maintain_partitions(SessionLocal)
+    print(f"Partições criadas: {', '.join(created) or 'nenhuma'}")
+    print(f"Partições removidas/arquivadas: {', '.join(removed) or 'nenhuma'}")
+
+def readings_dedupe(args):
+    def progress(first_id, last_id, removed):
+        if removed:
+            print(f"IDs {first_id}-{last_id}: {removed} duplicatas removidas")
+
+    removed, chunks = dedupe.dedupe_readings(SessionLocal, args.chunk_size, progress=progress)
+    print(f"{removed} leituras duplicadas removidas em {chunks} blocos.")
+    if args.skip_index:
+        return
+    with SessionLocal() as db:
+        if dedupe.ensure_unique_index(db):
+            print(f"Índice único {dedupe.INDEX_NAME} criado.")
+        else:
+            print(f"Índice único {dedupe.INDEX_NAME} já existe.")
+    if removed and settings.ROLLUPS_ENABLED:
+        rollups_refresh(args)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Manutenção da API de Estações Meteorológicas")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subparsers.add_parser("migrate", help="Aplica as migrações pendentes do esquema (Alembic)")
+    migrate_parser.add_argument("--revision", default="head", help="Revisão alvo (padrão: a mais recente)")
+    migrate_parser.add_argument("--sql", action="store_true", help="Apenas imprime o SQL das migrações")
+    migrate_parser.set_defaults(func=migrate)
+
+    backfill = subparsers.add_parser("rollups-backfill", help="Marca todo o histórico de leituras para reagregação")
+    backfill.add_argument("--controller-id", type=int, default=None)
+    backfill.add_argument("--refresh", action="store_true", help="Reagrega imediatamente após marcar")
+    backfill.set_defaults(func=rollups_backfill)
+
+    refresh = subparsers.add_parser("rollups-refresh", help="Reagrega todos os buckets pendentes")
+    refresh.set_defaults(func=rollups_refresh)
+
+    maintain = subparsers.add_parser(
+        "partitions-maintain", help="Cria as próximas partições mensais e aplica a política de retenção"
+    )
+    maintain.set_defaults(func=partitions_maintain)
+
+    dedupe_parser = subparsers.add_parser(
+        "readings-dedupe",
+        help="Remove leituras duplicadas (mesmo controlador e horário) e cria o índice único da ingestão"
+    )
+    dedupe_parser.add_argument("--chunk-size", type=int, default=settings.DEDUPE_CHUNK_SIZE)
+    dedupe_parser.add_argument("--skip-index", action="store_true", help="Não cria o índice único ao final")
+    dedupe_parser.set_defaults(func=readings_dedupe)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
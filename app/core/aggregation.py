@@ -0,0 +1,113 @@
+# Definições da agregação por intervalos de tempo (buckets) das leituras SME
+import math
+import re
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+# Métricas com mín/máx/soma/contagem nos agregados parciais
+PARTIAL_METRICS = ("temperature", "humidity", "pressure", "vel_wind")
+
+# Métrica -> agregações expostas pela API
+AGGREGATE_METRICS = {
+    "temperature": ("min", "max", "avg"),
+    "humidity": ("min", "max", "avg"),
+    "pressure": ("min", "max", "avg"),
+    "vel_wind": ("min", "max", "avg"),
+    "rain_measure": ("sum",),
+    "dir_wind": ("vector_avg",),
+}
+
+BUCKET_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+_BUCKET_RE = re.compile(r"^(\d+)([smhd])$")
+
+# Converte larguras como "15m", "1h" ou "1d" em segundos
+def parse_bucket(bucket: str) -> Optional[int]:
+    match = _BUCKET_RE.match(bucket.strip().lower())
+    if not match or int(match.group(1)) <= 0:
+        return None
+    return int(match.group(1)) * BUCKET_UNITS[match.group(2)]
+
+def validate_metrics(metrics: Optional[List[str]]) -> List[str]:
+    if not metrics:
+        return list(AGGREGATE_METRICS)
+    unknown = [metric for metric in metrics if metric not in AGGREGATE_METRICS]
+    if unknown:
+        raise ValueError(f"Métricas desconhecidas: {', '.join(unknown)}")
+    return list(dict.fromkeys(metrics))
+
+def series_keys(metrics: List[str]) -> List[str]:
+    keys = []
+    for metric in metrics:
+        for agg in AGGREGATE_METRICS[metric]:
+            keys.append(f"{metric}_avg" if agg == "vector_avg" else f"{metric}_{agg}")
+    return keys
+
+# Direção média do vento a partir das médias de seno/cosseno (média vetorial, em graus 0-360)
+def vector_mean_degrees(mean_sin: Optional[float], mean_cos: Optional[float]) -> Optional[float]:
+    if mean_sin is None or mean_cos is None or (mean_sin == 0 and mean_cos == 0):
+        return None
+    return round(math.degrees(math.atan2(mean_sin, mean_cos)), 2) % 360
+
+def as_utc(value) -> datetime:
+    # SQLite devolve o bucket como texto; PostgreSQL como timestamptz
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+# As consultas retornam agregados parciais por bucket (mín/máx/soma/contagem), que podem ser combinados
+# entre si (ex: trecho vindo de um rollup + trecho vindo das leituras brutas) antes do cálculo final.
+def _merge_value(key: str, current, value):
+    if value is None:
+        return current
+    if current is None:
+        return value
+    if key.endswith("_min"):
+        return min(current, value)
+    if key.endswith("_max"):
+        return max(current, value)
+    return current + value
+
+def combine_partials(rows) -> dict:
+    combined = {}
+    for row in rows:
+        for key, value in row.items():
+            if key != "bucket":
+                combined[key] = _merge_value(key, combined.get(key), value)
+    return combined
+
+# Combina as linhas parciais que caem no mesmo bucket, mantendo a ordem cronológica
+def merge_partials_by_bucket(rows) -> List[dict]:
+    merged = {}
+    for row in rows:
+        bucket = as_utc(row["bucket"])
+        current = merged.setdefault(bucket, {"bucket": bucket})
+        for key, value in row.items():
+            if key != "bucket":
+                current[key] = _merge_value(key, current.get(key), value)
+    return [merged[bucket] for bucket in sorted(merged)]
+
+def _ratio(total, count) -> Optional[float]:
+    if total is None or not count:
+        return None
+    return float(total) / float(count)
+
+# Converte um agregado parcial nos valores de cada série
+def row_values(row, metrics: List[str]) -> Dict[str, Optional[float]]:
+    values = {}
+    for metric in metrics:
+        for agg in AGGREGATE_METRICS[metric]:
+            if agg == "vector_avg":
+                count = row.get(f"{metric}_count")
+                values[f"{metric}_avg"] = vector_mean_degrees(
+                    _ratio(row.get(f"{metric}_sin_sum"), count), _ratio(row.get(f"{metric}_cos_sum"), count)
+                )
+                continue
+            if agg == "avg":
+                value = _ratio(row.get(f"{metric}_sum"), row.get(f"{metric}_count"))
+            else:
+                value = row.get(f"{metric}_{agg}")
+            values[f"{metric}_{agg}"] = round(float(value), 4) if value is not None else None
+    return values
@@ -0,0 +1,88 @@
+# Protocolo binário compacto de ingestão (POST /data/binary) para controladores com pouca banda/energia.
+# Layout fixo, little-endian:
+#
+#   cabeçalho (17 bytes): magic "SM" | versão u8 (=1) | quantidade u16 | token 8 bytes | base_time u32
+#   leitura (14 bytes):   delta u16 | temperature i16 | humidity u16 | dir_wind u16 | vel_wind u16 |
+#                         pressure u16 | rain_measure u16
+#
+# token: primeiros 8 bytes de SHA-256(Controller.key), substitui o cabeçalho X-Controller-Key.
+# delta: segundos desde a leitura anterior (a primeira é relativa a base_time), de 0 a MAX_DELTA_SECONDS (~18 h):
+# leituras separadas por um intervalo maior vão em pacotes diferentes. base_time é o epoch (UTC) da primeira
+# leitura; 0 indica controlador sem relógio: a última leitura do pacote recebe o horário do servidor e as demais
+# são posicionadas pelos deltas.
+# Escalas: temperature, humidity, vel_wind e rain_measure em centésimos; pressure em hPa inteiros (a coluna
+# sensors_meteo_sme.pressure é INTEGER).
+import hashlib
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence, Tuple
+
+MAGIC = b"SM"
+VERSION = 1
+HEADER = struct.Struct("<2sBH8sI")
+READING = struct.Struct("<HhHHHHH")
+TOKEN_SIZE = 8
+MAX_DELTA_SECONDS = 0xFFFF
+
+# Campo -> divisor aplicado ao inteiro recebido
+SCALES = (
+    ("temperature", 100),
+    ("humidity", 100),
+    ("dir_wind", 1),
+    ("vel_wind", 100),
+    ("pressure", 1),
+    ("rain_measure", 100),
+)
+
+def controller_token(key: str) -> bytes:
+    return hashlib.sha256(key.encode()).digest()[:TOKEN_SIZE]
+
+# Retorna (token, linhas); cada linha é um dicionário pronto para o INSERT em lote (sem controller_id)
+def decode_readings(payload: bytes, now: Optional[datetime] = None) -> Tuple[bytes, List[dict]]:
+    if len(payload) < HEADER.size:
+        raise ValueError("Pacote menor que o cabeçalho.")
+    magic, version, count, token, base_time = HEADER.unpack_from(payload)
+    if magic != MAGIC:
+        raise ValueError("Pacote com assinatura inválida.")
+    if version != VERSION:
+        raise ValueError(f"Versão de protocolo não suportada: {version}.")
+    if len(payload) != HEADER.size + count * READING.size:
+        raise ValueError(f"Tamanho do pacote não corresponde a {count} leituras.")
+
+    offsets = []
+    rows = []
+    elapsed = 0
+    for values in READING.iter_unpack(payload[HEADER.size:]):
+        elapsed += values[0]
+        offsets.append(elapsed)
+        rows.append({
+            name: value / scale if scale != 1 else value
+            for (name, scale), value in zip(SCALES, values[1:])
+        })
+
+    if base_time:
+        start = datetime.fromtimestamp(base_time, tz=timezone.utc)
+    else:
+        start = (now or datetime.now(timezone.utc)) - timedelta(seconds=elapsed)
+    for row, offset in zip(rows, offsets):
+        row["time"] = start + timedelta(seconds=offset)
+    return token, rows
+
+# Codificação (referência para o firmware e ferramentas de teste); readings são dicionários com "time" opcional
+def encode_readings(token: bytes, readings: Sequence[dict], base_time: Optional[datetime] = None) -> bytes:
+    parts = [HEADER.pack(MAGIC, VERSION, len(readings), token, int(base_time.timestamp()) if base_time else 0)]
+    # Sem base_time (controlador sem relógio) os deltas partem do horário da primeira leitura
+    previous = base_time or (readings[0].get("time") if readings else None)
+    for index, reading in enumerate(readings):
+        reading_time = reading.get("time")
+        delta = 0
+        if reading_time is not None and previous is not None:
+            delta = int((reading_time - previous).total_seconds())
+            previous = reading_time
+        if not 0 <= delta <= MAX_DELTA_SECONDS:
+            raise ValueError(
+                f"Leitura {index}: intervalo de {delta} s desde a anterior fora de 0..{MAX_DELTA_SECONDS} s; "
+                "envie as leituras em ordem e separe intervalos maiores em pacotes diferentes."
+            )
+        parts.append(READING.pack(delta, *(round(reading[name] * scale) for name, scale in SCALES)))
+    return b"".join(parts)
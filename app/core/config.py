@@ -1,4 +1,5 @@
 # Responsável por carregar as variáveis de ambiente
+from typing import List, Literal, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -6,4 +7,117 @@ class Settings(BaseSettings):
 
     DATABASE_URL: str
 
+    # Pool de conexões e tuning da engine
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    DB_PGBOUNCER_MODE: bool = False
+
+    # Réplicas de leitura (lista JSON de URLs); sem réplicas todas as leituras vão para DATABASE_URL
+    DB_READ_REPLICA_URLS: List[str] = []
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5
+    DB_REPLICA_LAG_CHECK_INTERVAL_SECONDS: float = 5
+    DB_READ_YOUR_WRITES_SECONDS: float = 10
+
+    # Inicialização: a aplicação não cria tabelas (python -m app.cli migrate) e sobe mesmo com o banco fora do
+    # ar; a espera pelo banco no startup é limitada e o /readyz responde 503 até o banco e o esquema estarem ok
+    DB_STARTUP_TIMEOUT_SECONDS: float = 10
+    DB_READY_TIMEOUT_SECONDS: float = 2
+
+    # Camada assíncrona do banco (asyncpg em produção, aiosqlite em testes)
+    DB_ASYNC_ENABLED: bool = False
+    ASYNC_DATABASE_URL: Optional[str] = None
+
+    # Ingestão em lote
+    INGEST_BATCH_MAX_ROWS: int = 5000
+    INGEST_MAX_CLOCK_SKEW_SECONDS: int = 300
+
+    # Deduplicação de reenvios: leituras recentes lembradas por controlador (0 = só o índice único do banco)
+    INGEST_DEDUPE_WINDOW: int = 256
+    DEDUPE_CHUNK_SIZE: int = 50000
+
+    # Ingestão write-behind de POST /data/ (fila em memória gravada em lotes)
+    INGEST_WRITE_BEHIND_ENABLED: bool = False
+    INGEST_BUFFER_CAPACITY: int = 20000
+    INGEST_FLUSH_INTERVAL_MS: int = 200
+    INGEST_FLUSH_MAX_ROWS: int = 1000
+    INGEST_RETRY_AFTER_SECONDS: int = 1
+
+    # Agregação de leituras; as métricas derivadas carregam as leituras brutas do período em memória
+    AGGREGATE_MAX_BUCKETS: int = 10000
+    AGGREGATE_DERIVED_MAX_ROWS: int = 500000
+
+    # Séries de vários controladores (GET /data/series)
+    SERIES_MAX_CONTROLLERS: int = 100
+    SERIES_MAX_POINTS: int = 10000
+
+    # Exportação em streaming
+    EXPORT_CHUNK_SIZE: int = 5000
+
+    # Rollups de 1 minuto / 1 hora / 1 dia
+    ROLLUPS_ENABLED: bool = True
+    ROLLUP_REFRESH_INTERVAL_SECONDS: float = 30
+    ROLLUP_REFRESH_BATCH_SIZE: int = 5000
+
+    # Particionamento mensal de sensors_meteo_sme (PostgreSQL) e retenção
+    PARTITION_MAINTENANCE_INTERVAL_SECONDS: float = 21600
+    PARTITION_MONTHS_AHEAD: int = 3
+    RETENTION_MONTHS: int = 0
+    RETENTION_MODE: Literal["drop", "archive"] = "archive"
+    RETENTION_ARCHIVE_SCHEMA: str = "archive"
+
+    # Cache das chaves de API dos controladores
+    CONTROLLER_KEY_CACHE_SIZE: int = 10000
+    CONTROLLER_KEY_CACHE_TTL_SECONDS: float = 300
+    CONTROLLER_KEY_CACHE_NEGATIVE_TTL_SECONDS: float = 30
+
+    # Cache de respostas das rotas de metadados (locais, sensores, controlador por ID)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_BACKEND: Literal["memory", "redis"] = "memory"
+    RESPONSE_CACHE_REDIS_URL: Optional[str] = None
+    RESPONSE_CACHE_SIZE: int = 1000
+    RESPONSE_CACHE_TTL_SECONDS: float = 300
+
+    # Snapshot das leituras mais recentes (0 = carrega uma vez e só atualiza com as gravações do processo)
+    LATEST_SNAPSHOT_RELOAD_SECONDS: float = 0
+
+    # Saúde das estações: inatividade, média/variância móveis, valores travados e fora da faixa (em memória,
+    # atualizada a cada leitura). A desabilitação automática de controladores que só enviam valores fora da
+    # faixa física é opcional
+    STATION_HEALTH_ENABLED: bool = True
+    STATION_HEALTH_CHECK_INTERVAL_SECONDS: float = 60
+    STATION_HEALTH_STALE_AFTER_SECONDS: float = 900
+    STATION_HEALTH_EWMA_ALPHA: float = 0.05
+    STATION_HEALTH_WARMUP_READINGS: int = 30
+    STATION_HEALTH_ZSCORE_THRESHOLD: float = 6
+    STATION_HEALTH_STUCK_READINGS: int = 180
+    STATION_HEALTH_ANOMALY_BUFFER_SIZE: int = 1000
+    STATION_HEALTH_AUTO_DISABLE_ENABLED: bool = False
+    STATION_HEALTH_AUTO_DISABLE_AFTER: int = 20
+
+    # Consultas espaciais de locais (/locations/within e /locations/nearest): índice em grade em memória
+    # (células de SPATIAL_INDEX_CELL_DEGREES graus) ou, desligado, consulta ao banco (GiST no PostgreSQL)
+    SPATIAL_INDEX_ENABLED: bool = True
+    SPATIAL_INDEX_CELL_DEGREES: float = 0.5
+    SPATIAL_INDEX_RELOAD_SECONDS: float = 0
+    SPATIAL_MAX_RESULTS: int = 500
+    SPATIAL_NEAREST_MAX_KM: float = 1000
+
+    # Leituras em tempo real (SSE / WebSocket): fila por cliente, replay na conexão e heartbeat
+    LIVE_CLIENT_BUFFER_SIZE: int = 100
+    LIVE_REPLAY_SIZE: int = 10
+    LIVE_MAX_SUBSCRIBERS: int = 10000
+    LIVE_MAX_CONTROLLERS: int = 100
+    LIVE_HEARTBEAT_SECONDS: float = 15
+
+    # Instrumentação por requisição (Server-Timing, /metrics) e perfis de requisições lentas (0 = desligado)
+    INSTRUMENTATION_ENABLED: bool = False
+    PROFILE_SLOW_REQUESTS_MS: float = 0
+    PROFILE_SAMPLE_RATE: float = 1.0
+    PROFILE_OUTPUT_DIR: str = "profiles"
+    PROFILER: Literal["cprofile", "pyinstrument"] = "cprofile"
+
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,110 @@
+# Cache em memória (LRU com TTL) das chaves de autenticação dos controladores
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+from app.core.binary_protocol import controller_token
+from app.core.config import settings
+
+class ControllerAuth(NamedTuple):
+    id: int
+    enabled: bool
+
+class ControllerKeyCache:
+    def __init__(self, max_size: int, ttl_seconds: float, negative_ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Optional[ControllerAuth]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Retorna (encontrado, valor); valor None significa chave inexistente (cache negativo)
+    def get(self, key: str) -> Tuple[bool, Optional[ControllerAuth]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            if entry[1] is None:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return True, entry[1]
+
+    def set(self, key: str, value: Optional[ControllerAuth]):
+        if self.max_size <= 0:
+            return
+        ttl = self.ttl_seconds if value is not None else self.negative_ttl_seconds
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round((self.hits + self.negative_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+# Índice token -> controlador do protocolo binário. O token é derivado da chave (não fica no banco), então o
+# índice é montado a partir de todos os controladores e recarregado quando um token desconhecido aparece
+# (no máximo uma vez a cada refresh_interval_seconds) ou quando um controlador é criado/alterado.
+class ControllerTokenIndex:
+    def __init__(self, refresh_interval_seconds: float):
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self._tokens: Optional[Dict[bytes, ControllerAuth]] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    # loader retorna (key, id, enabled) de todos os controladores
+    def lookup(self, token: bytes, loader: Callable[[], Iterable[Tuple[str, int, bool]]]) -> Optional[ControllerAuth]:
+        with self._lock:
+            stale = time.monotonic() - self._loaded_at >= self.refresh_interval_seconds
+            if self._tokens is None or (token not in self._tokens and stale):
+                self._tokens = {
+                    controller_token(key): ControllerAuth(id=controller_id, enabled=enabled)
+                    for key, controller_id, enabled in loader()
+                }
+                self._loaded_at = time.monotonic()
+                self.reloads += 1
+            return self._tokens.get(token)
+
+    def invalidate(self):
+        with self._lock:
+            self._tokens = None
+
+controller_key_cache = ControllerKeyCache(
+    max_size=settings.CONTROLLER_KEY_CACHE_SIZE,
+    ttl_seconds=settings.CONTROLLER_KEY_CACHE_TTL_SECONDS,
+    negative_ttl_seconds=settings.CONTROLLER_KEY_CACHE_NEGATIVE_TTL_SECONDS,
+)
+
+controller_token_index = ControllerTokenIndex(
+    refresh_interval_seconds=settings.CONTROLLER_KEY_CACHE_NEGATIVE_TTL_SECONDS,
+)
@@ -0,0 +1,194 @@
+# Métricas derivadas das leituras SME, calculadas de forma vetorizada (NumPy) sobre colunas inteiras.
+# Unidades das leituras: temperature em °C, humidity em %, vel_wind em m/s, pressure em hPa, dir_wind em graus
+# e rain_measure em mm acumulados desde a leitura anterior. Valores ausentes (None) viram NaN e saem como null.
+from typing import Dict, Iterable, List, Optional, Sequence
+import numpy as np
+from app.core.aggregation import as_utc
+
+# Métrica -> colunas necessárias
+DERIVED_METRICS = {
+    "dew_point": ("temperature", "humidity"),
+    "heat_index": ("temperature", "humidity"),
+    "wind_chill": ("temperature", "vel_wind"),
+    "apparent_temperature": ("temperature", "humidity", "vel_wind"),
+    "rain_rate": ("rain_measure", "time", "controller_id"),
+    "dir_wind_unwrapped": ("dir_wind", "time", "controller_id"),
+    "pressure_inhg": ("pressure",),
+    "pressure_kpa": ("pressure",),
+    "vel_wind_kmh": ("vel_wind",),
+    "vel_wind_knots": ("vel_wind",),
+    "vel_wind_mph": ("vel_wind",),
+}
+
+# A direção "desenrolada" só faz sentido como série contínua, não como mín/máx/média por bucket
+NON_AGGREGATABLE = ("dir_wind_unwrapped",)
+
+UNIT_FACTORS = {
+    "pressure_inhg": ("pressure", 0.029529983071445),
+    "pressure_kpa": ("pressure", 0.1),
+    "vel_wind_kmh": ("vel_wind", 3.6),
+    "vel_wind_knots": ("vel_wind", 1.9438444924406),
+    "vel_wind_mph": ("vel_wind", 2.2369362920544),
+}
+
+def validate_metrics(metrics: Sequence[str], aggregatable: bool = False) -> List[str]:
+    unknown = [metric for metric in metrics if metric not in DERIVED_METRICS]
+    if unknown:
+        raise ValueError(f"Métricas derivadas desconhecidas: {', '.join(unknown)}")
+    if aggregatable:
+        invalid = [metric for metric in metrics if metric in NON_AGGREGATABLE]
+        if invalid:
+            raise ValueError(f"Métricas que não podem ser agregadas: {', '.join(invalid)}")
+    return list(dict.fromkeys(metrics))
+
+def required_columns(metrics: Iterable[str]) -> List[str]:
+    columns = []
+    for metric in metrics:
+        for column in DERIVED_METRICS[metric]:
+            if column not in columns:
+                columns.append(column)
+    return columns
+
+def dew_point(temperature: np.ndarray, humidity: np.ndarray) -> np.ndarray:
+    # Fórmula de Magnus (coeficientes de Alduchov e Eskridge)
+    a, b = 17.625, 243.04
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gamma = np.log(np.where(humidity > 0, humidity, np.nan) / 100) + a * temperature / (b + temperature)
+        return b * gamma / (a - gamma)
+
+def heat_index(temperature: np.ndarray, humidity: np.ndarray) -> np.ndarray:
+    # Algoritmo do NWS (regressão de Rothfusz com ajustes), calculado em °F e convertido para °C
+    f = temperature * 1.8 + 32
+    rh = humidity
+    simple = 0.5 * (f + 61 + (f - 68) * 1.2 + rh * 0.094)
+    full = (
+        -42.379 + 2.04901523 * f + 10.14333127 * rh - 0.22475541 * f * rh - 0.00683783 * f * f
+        - 0.05481717 * rh * rh + 0.00122874 * f * f * rh + 0.00085282 * f * rh * rh
+        - 0.00000199 * f * f * rh * rh
+    )
+    dry = (rh < 13) & (f >= 80) & (f <= 112)
+    full = np.where(dry, full - (13 - rh) / 4 * np.sqrt(np.clip((17 - np.abs(f - 95)) / 17, 0, None)), full)
+    humid = (rh > 85) & (f >= 80) & (f <= 87)
+    full = np.where(humid, full + (rh - 85) / 10 * (87 - f) / 5, full)
+    result = np.where((simple + f) / 2 >= 80, full, simple)
+    return (result - 32) / 1.8
+
+def wind_chill(temperature: np.ndarray, vel_wind: np.ndarray) -> np.ndarray:
+    # Fórmula do NWS / Environment Canada (vento em km/h); fora da faixa de validade vale a própria temperatura
+    speed = vel_wind * 3.6
+    with np.errstate(invalid="ignore"):
+        factor = np.power(np.clip(speed, 0, None), 0.16)
+    chill = 13.12 + 0.6215 * temperature - 11.37 * factor + 0.3965 * temperature * factor
+    return np.where((temperature <= 10) & (speed > 4.8), chill, temperature)
+
+def apparent_temperature(temperature: np.ndarray, humidity: np.ndarray, vel_wind: np.ndarray) -> np.ndarray:
+    # Temperatura aparente de Steadman (versão do Australian Bureau of Meteorology, sem radiação)
+    vapour_pressure = humidity / 100 * 6.105 * np.exp(17.27 * temperature / (237.7 + temperature))
+    return temperature + 0.33 * vapour_pressure - 0.70 * vel_wind - 4.00
+
+# As funções abaixo dependem da leitura anterior do mesmo controlador: as colunas já estão ordenadas
+# por (controller_id, time) e "first" marca a primeira leitura de cada controlador
+def rain_rate(rain_measure: np.ndarray, time: np.ndarray, first: np.ndarray) -> np.ndarray:
+    # mm/h: chuva acumulada desde a leitura anterior dividida pelo intervalo entre as leituras
+    hours = np.diff(time, prepend=np.nan) / 3600
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = rain_measure / hours
+    return np.where(first | ~(hours > 0), np.nan, rate)
+
+def unwrap_direction(dir_wind: np.ndarray, first: np.ndarray) -> np.ndarray:
+    # Remove os saltos 359° -> 0° para séries contínuas (cada controlador começa no valor original)
+    result = dir_wind.astype(float)
+    starts = np.flatnonzero(first)
+    for start, end in zip(starts, list(starts[1:]) + [len(result)]):
+        segment = result[start:end]
+        valid = ~np.isnan(segment)
+        if valid.any():
+            segment[valid] = np.unwrap(segment[valid], period=360)
+    return result
+
+# Colunas (listas ou arrays, em qualquer ordem) -> métrica derivada -> array alinhado às colunas de entrada.
+# time em segundos desde o epoch
+def compute(columns: Dict[str, Sequence], metrics: Sequence[str]) -> Dict[str, np.ndarray]:
+    arrays = {name: as_float_array(values) for name, values in columns.items()}
+    size = len(next(iter(arrays.values()))) if arrays else 0
+    order = None
+    first = None
+    if any(DERIVED_METRICS[metric][-1] == "controller_id" for metric in metrics):
+        order = np.lexsort((arrays["time"], arrays["controller_id"]))
+        arrays = {name: values[order] for name, values in arrays.items()}
+        first = np.ones(size, dtype=bool)
+        first[1:] = arrays["controller_id"][1:] != arrays["controller_id"][:-1]
+
+    results = {}
+    for metric in metrics:
+        if metric in UNIT_FACTORS:
+            column, factor = UNIT_FACTORS[metric]
+            values = arrays[column] * factor
+        elif metric == "dew_point":
+            values = dew_point(arrays["temperature"], arrays["humidity"])
+        elif metric == "heat_index":
+            values = heat_index(arrays["temperature"], arrays["humidity"])
+        elif metric == "wind_chill":
+            values = wind_chill(arrays["temperature"], arrays["vel_wind"])
+        elif metric == "apparent_temperature":
+            values = apparent_temperature(arrays["temperature"], arrays["humidity"], arrays["vel_wind"])
+        elif metric == "rain_rate":
+            values = rain_rate(arrays["rain_measure"], arrays["time"], first)
+        else:
+            values = unwrap_direction(arrays["dir_wind"], first)
+        if order is not None:
+            unsorted = np.empty_like(values)
+            unsorted[order] = values
+            values = unsorted
+        results[metric] = values
+    return results
+
+def as_float_array(values: Sequence) -> np.ndarray:
+    if isinstance(values, np.ndarray):
+        return values.astype(float, copy=False)
+    return np.fromiter((np.nan if value is None else value for value in values), dtype=float, count=len(values))
+
+def epoch_seconds(times: Sequence) -> np.ndarray:
+    return np.fromiter((as_utc(value).timestamp() for value in times), dtype=float, count=len(times))
+
+# Valores para JSON: NaN -> None, arredondados
+def to_json(values: np.ndarray, decimals: int = 3) -> List[Optional[float]]:
+    return np.where(np.isnan(values), None, np.round(values, decimals)).tolist()
+
+# Mín/máx/média por bucket (ignorando NaN). Retorna {bucket_epoch: {"<métrica>_min": ..., ...}} e o resumo
+# do intervalo inteiro; os buckets seguem a mesma origem dos agregados no banco (origin_epoch)
+def bucket_stats(
+    values_by_metric: Dict[str, np.ndarray], time: np.ndarray, bucket_seconds: int, origin_epoch: int
+):
+    buckets = np.floor((time - origin_epoch) / bucket_seconds) * bucket_seconds + origin_epoch
+    keys, inverse = np.unique(buckets, return_inverse=True)
+    per_bucket = {int(key): {} for key in keys}
+    summary = {}
+    for metric, values in values_by_metric.items():
+        valid = ~np.isnan(values)
+        index, data = inverse[valid], values[valid]
+        count = np.bincount(index, minlength=len(keys))
+        total = np.bincount(index, weights=data, minlength=len(keys))
+        minimum = np.full(len(keys), np.inf)
+        maximum = np.full(len(keys), -np.inf)
+        np.minimum.at(minimum, index, data)
+        np.maximum.at(maximum, index, data)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            average = np.where(count > 0, total / count, np.nan)
+        minimum[count == 0] = np.nan
+        maximum[count == 0] = np.nan
+        for position, key in enumerate(keys):
+            entry = per_bucket[int(key)]
+            entry[f"{metric}_min"] = _rounded(minimum[position])
+            entry[f"{metric}_max"] = _rounded(maximum[position])
+            entry[f"{metric}_avg"] = _rounded(average[position])
+        summary[f"{metric}_min"] = _rounded(data.min()) if data.size else None
+        summary[f"{metric}_max"] = _rounded(data.max()) if data.size else None
+        summary[f"{metric}_avg"] = _rounded(data.mean()) if data.size else None
+    return per_bucket, summary
+
+def series_keys(metrics: Sequence[str]) -> List[str]:
+    return [f"{metric}_{agg}" for metric in metrics for agg in ("min", "max", "avg")]
+
+def _rounded(value) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 4)
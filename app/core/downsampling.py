@@ -0,0 +1,44 @@
+# Redução de pontos de séries temporais para gráficos (Largest-Triangle-Three-Buckets).
+# Mantém o primeiro e o último ponto e, em cada bucket intermediário, o ponto que forma o maior triângulo
+# com o ponto escolhido no bucket anterior e a média do bucket seguinte; picos e vales são preservados.
+from typing import List, Optional, Sequence
+
+# Índices dos pontos escolhidos (em ordem crescente); xs deve estar ordenado.
+# Valores None em ys são tratados como a média dos valores presentes (não influenciam a escolha).
+def lttb_indices(xs: Sequence[float], ys: Sequence[Optional[float]], threshold: int) -> List[int]:
+    size = len(xs)
+    if threshold >= size or threshold < 3:
+        return list(range(size))
+
+    present = [y for y in ys if y is not None]
+    fill = sum(present) / len(present) if present else 0.0
+    ys = [fill if y is None else y for y in ys]
+
+    every = (size - 2) / (threshold - 2)
+    selected = [0]
+    a = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+
+        # Média do próximo bucket (ou o último ponto, no bucket final)
+        next_start = end
+        next_end = min(int((bucket + 2) * every) + 1, size)
+        if next_start >= next_end:
+            avg_x, avg_y = xs[size - 1], ys[size - 1]
+        else:
+            count = next_end - next_start
+            avg_x = sum(xs[next_start:next_end]) / count
+            avg_y = sum(ys[next_start:next_end]) / count
+
+        ax, ay = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for index in range(start, end):
+            area = abs((ax - avg_x) * (ys[index] - ay) - (ax - xs[index]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = index, area
+        selected.append(best)
+        a = best
+
+    selected.append(size - 1)
+    return selected
@@ -0,0 +1,32 @@
+# Serialização rápida das rotas de leitura de alto volume: os dados (tuplas/dicionários simples) são
+# codificados diretamente com orjson, sem jsonable_encoder nem validação por schemas Pydantic.
+# A rota mantém o response_model (o schema OpenAPI não muda); como retorna um Response, ele não é reaplicado.
+import json
+from typing import Any, Iterable, Sequence
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Sem orjson: mesma saída, com o encoder padrão
+    orjson = None
+
+def dumps(content: Any) -> bytes:
+    if orjson is None:
+        return json.dumps(
+            jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+        ).encode("utf-8")
+    # OPT_UTC_Z: datetimes em UTC como "...Z", igual à serialização do Pydantic
+    return orjson.dumps(content, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def rows_as_records(rows: Iterable, columns: Sequence[str]) -> list:
+    return [dict(zip(columns, row)) for row in rows]
+
+# Layout colunar: {"time": [...], "temperature": [...], ...}
+def rows_as_columns(rows: Sequence, columns: Sequence[str]) -> dict:
+    values = list(zip(*rows)) if rows else [() for _ in columns]
+    return {column: list(column_values) for column, column_values in zip(columns, values)}
@@ -0,0 +1,299 @@
+# Instrumentação opcional por requisição (INSTRUMENTATION_ENABLED).
+# Mede, por rota: consultas SQL (quantidade e tempo, via eventos da engine), resolução de dependências e
+# validação de parâmetros (deps), execução do handler (handler) e validação/serialização da resposta (encode).
+# Os tempos saem no cabeçalho Server-Timing e agregados em /metrics (formato Prometheus).
+# Com PROFILE_SLOW_REQUESTS_MS > 0, uma amostra das requisições é perfilada e o perfil é gravado em disco
+# quando a requisição passa do limite.
+import asyncio
+import contextvars
+import cProfile
+import functools
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Optional
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PHASES = ("deps", "handler", "encode")
+
+class RequestMetrics:
+    __slots__ = (
+        "started", "handler_started", "handler_finished", "response_started",
+        "queries", "sql_seconds", "profile_enabled", "profiler",
+    )
+
+    def __init__(self, profile_enabled: bool):
+        self.started = time.perf_counter()
+        self.handler_started: Optional[float] = None
+        self.handler_finished: Optional[float] = None
+        self.response_started: Optional[float] = None
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.profile_enabled = profile_enabled
+        self.profiler = None
+
+    def phases(self) -> dict:
+        end = self.response_started or time.perf_counter()
+        phases = {}
+        if self.handler_started is not None:
+            phases["deps"] = self.handler_started - self.started
+            if self.handler_finished is not None:
+                phases["handler"] = self.handler_finished - self.handler_started
+                phases["encode"] = max(end - self.handler_finished, 0.0)
+        return phases
+
+_current_request = contextvars.ContextVar("request_metrics", default=None)
+
+class RouteStats:
+    def __init__(self):
+        self.statuses = defaultdict(int)
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.count = 0
+        self.duration_sum = 0.0
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.phase_seconds = defaultdict(float)
+
+class MetricsRegistry:
+    def __init__(self):
+        self.routes = defaultdict(RouteStats)
+        self._lock = threading.Lock()
+
+    def record(self, method: str, route: str, status: int, duration: float, metrics: RequestMetrics):
+        with self._lock:
+            stats = self.routes[(method, route)]
+            stats.statuses[status] += 1
+            stats.count += 1
+            stats.duration_sum += duration
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    stats.buckets[index] += 1
+            stats.queries += metrics.queries
+            stats.sql_seconds += metrics.sql_seconds
+            for phase, seconds in metrics.phases().items():
+                stats.phase_seconds[phase] += seconds
+
+    def render(self) -> str:
+        lines = []
+
+        def header(name, kind, description):
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            routes = sorted(self.routes.items())
+            header("http_requests_total", "counter", "Requisições por rota e status.")
+            for (method, route), stats in routes:
+                for status, count in sorted(stats.statuses.items()):
+                    lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status}"}} {count}')
+            header("http_request_duration_seconds", "histogram", "Duração das requisições até o fim da resposta.")
+            for (method, route), stats in routes:
+                labels = f'method="{method}",route="{route}"'
+                for bound, count in zip(DURATION_BUCKETS, stats.buckets):
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.count}')
+                lines.append(f"http_request_duration_seconds_sum{{{labels}}} {stats.duration_sum:.6f}")
+                lines.append(f"http_request_duration_seconds_count{{{labels}}} {stats.count}")
+            header("http_request_phase_seconds_total", "counter", "Tempo por fase: deps, handler e encode.")
+            for (method, route), stats in routes:
+                for phase in PHASES:
+                    lines.append(
+                        f'http_request_phase_seconds_total{{method="{method}",route="{route}",phase="{phase}"}} '
+                        f"{stats.phase_seconds[phase]:.6f}"
+                    )
+            header("db_queries_total", "counter", "Consultas SQL executadas por rota.")
+            for (method, route), stats in routes:
+                lines.append(f'db_queries_total{{method="{method}",route="{route}"}} {stats.queries}')
+            header("db_query_duration_seconds_total", "counter", "Tempo gasto em consultas SQL por rota.")
+            for (method, route), stats in routes:
+                lines.append(f'db_query_duration_seconds_total{{method="{method}",route="{route}"}} {stats.sql_seconds:.6f}')
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+# Eventos da engine: contam e cronometram as consultas da requisição corrente. O início fica no contexto de
+# execução da consulta (um por comando), e não na conexão do pool: uma consulta com erro não tem
+# after_cursor_execute e é contabilizada pelo handle_error
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.instrumentation_started = time.perf_counter()
+
+def _record_query(context):
+    started = getattr(context, "instrumentation_started", None)
+    metrics = _current_request.get()
+    if started is not None and metrics is not None:
+        metrics.queries += 1
+        metrics.sql_seconds += time.perf_counter() - started
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record_query(context)
+
+def _handle_error(exception_context):
+    _record_query(exception_context.execution_context)
+
+# Perfis: no máximo um cProfile ativo por thread (handlers async compartilham a thread do event loop)
+_profiling = threading.local()
+
+def _start_profile(metrics: RequestMetrics):
+    if not metrics.profile_enabled or getattr(_profiling, "active", False):
+        return None
+    _profiling.active = True
+    if settings.PROFILER == "pyinstrument":
+        from pyinstrument import Profiler
+
+        profiler = Profiler(async_mode="disabled")
+        profiler.start()
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    return profiler
+
+def _stop_profile(metrics: RequestMetrics, profiler):
+    if profiler is None:
+        return
+    if settings.PROFILER == "pyinstrument":
+        profiler.stop()
+    else:
+        profiler.disable()
+    _profiling.active = False
+    metrics.profiler = profiler
+
+def _dump_profile(metrics: RequestMetrics, method: str, route: str, duration: float):
+    os.makedirs(settings.PROFILE_OUTPUT_DIR, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{method}-{slug}-{int(duration * 1000)}ms"
+    if settings.PROFILER == "pyinstrument":
+        path = os.path.join(settings.PROFILE_OUTPUT_DIR, name + ".html")
+        with open(path, "w") as file:
+            file.write(metrics.profiler.output_html())
+    else:
+        path = os.path.join(settings.PROFILE_OUTPUT_DIR, name + ".prof")
+        metrics.profiler.dump_stats(path)
+    logger.warning("Requisição lenta %s %s (%.1f ms); perfil gravado em %s", method, route, duration * 1000, path)
+
+# Envolve o endpoint da rota para marcar início/fim do handler (e perfilá-lo, se amostrado)
+def _timed_endpoint(call):
+    if getattr(call, "instrumented", False):
+        return call
+    if asyncio.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def async_wrapper(*args, **kwargs):
+            metrics = _current_request.get()
+            if metrics is None:
+                return await call(*args, **kwargs)
+            metrics.handler_started = time.perf_counter()
+            profiler = _start_profile(metrics)
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                _stop_profile(metrics, profiler)
+                metrics.handler_finished = time.perf_counter()
+        async_wrapper.instrumented = True
+        return async_wrapper
+
+    @functools.wraps(call)
+    def sync_wrapper(*args, **kwargs):
+        metrics = _current_request.get()
+        if metrics is None:
+            return call(*args, **kwargs)
+        metrics.handler_started = time.perf_counter()
+        profiler = _start_profile(metrics)
+        try:
+            return call(*args, **kwargs)
+        finally:
+            _stop_profile(metrics, profiler)
+            metrics.handler_finished = time.perf_counter()
+    sync_wrapper.instrumented = True
+    return sync_wrapper
+
+# Classe das rotas da aplicação e dos routers (route_class): com a instrumentação habilitada o endpoint é
+# envolvido por _timed_endpoint. include_router recria as rotas com a mesma classe e o endpoint já envolvido
+class InstrumentedRoute(APIRoute):
+    def __init__(self, path: str, endpoint, **kwargs):
+        if settings.INSTRUMENTATION_ENABLED:
+            endpoint = _timed_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+def server_timing(metrics: RequestMetrics) -> str:
+    entries = [f'sql;dur={metrics.sql_seconds * 1000:.2f};desc="{metrics.queries} queries"']
+    entries += [f"{phase};dur={seconds * 1000:.2f}" for phase, seconds in metrics.phases().items()]
+    entries.append(f"total;dur={((metrics.response_started or time.perf_counter()) - metrics.started) * 1000:.2f}")
+    return ", ".join(entries)
+
+class InstrumentationMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        sampled = settings.PROFILE_SLOW_REQUESTS_MS > 0 and random.random() < settings.PROFILE_SAMPLE_RATE
+        metrics = RequestMetrics(profile_enabled=sampled)
+        token = _current_request.set(metrics)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                metrics.response_started = time.perf_counter()
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(metrics).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_request.reset(token)
+            duration = time.perf_counter() - metrics.started
+            route = scope.get("route")
+            # Caminhos sem rota (404) ficam agrupados para não multiplicar as séries do Prometheus
+            route_path = route.path if route is not None else "(unmatched)"
+            registry.record(scope["method"], route_path, status, duration, metrics)
+            if metrics.profiler is not None and duration * 1000 >= settings.PROFILE_SLOW_REQUESTS_MS:
+                try:
+                    _dump_profile(metrics, scope["method"], route_path, duration)
+                except Exception:
+                    logger.exception("Falha ao gravar o perfil da requisição")
+
+def metrics_text() -> str:
+    from app.core.pool_metrics import pool_monitor
+    from app.ingest_buffer import ingest_buffer
+
+    lines = [registry.render().rstrip("\n")]
+    pools = pool_monitor.snapshot()
+    lines += ["# HELP db_pool_checked_out Conexões em uso por pool.", "# TYPE db_pool_checked_out gauge"]
+    lines += [f'db_pool_checked_out{{pool="{name}"}} {info.get("checkedout", 0)}' for name, info in pools.items()]
+    lines += ["# HELP db_pool_timeouts_total Esperas por conexão que estouraram o timeout.", "# TYPE db_pool_timeouts_total counter"]
+    lines += [f'db_pool_timeouts_total{{pool="{name}"}} {info["timeouts"]}' for name, info in pools.items()]
+    lines += ["# HELP db_pool_wait_seconds_total Tempo total de espera por conexão.", "# TYPE db_pool_wait_seconds_total counter"]
+    lines += [f'db_pool_wait_seconds_total{{pool="{name}"}} {info["wait_ms_total"] / 1000:.6f}' for name, info in pools.items()]
+    lines += ["# HELP ingest_buffer_depth Leituras aguardando gravação (write-behind).", "# TYPE ingest_buffer_depth gauge"]
+    lines.append(f"ingest_buffer_depth {ingest_buffer.depth}")
+    return "\n".join(lines) + "\n"
+
+# Registra os eventos nas engines e adiciona /metrics e o middleware (os endpoints são envolvidos por
+# InstrumentedRoute)
+def install(app: FastAPI, engines):
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+    @app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+    def read_metrics():
+        return PlainTextResponse(metrics_text(), media_type="text/plain; version=0.0.4")
+    app.add_middleware(InstrumentationMiddleware)
@@ -0,0 +1,88 @@
+# Snapshot em memória da leitura mais recente de cada controlador ("condições atuais" do mapa público).
+# É carregado do banco uma vez e atualizado a cada gravação; as consultas ao snapshot não acessam o banco.
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+from app.core.aggregation import as_utc
+from app.core.config import settings
+
+class LatestReadingSnapshot:
+    def __init__(self, reload_seconds: float):
+        self.reload_seconds = reload_seconds
+        self._controllers: Dict[int, Tuple[int, bool]] = {}  # id -> (location_id, enabled)
+        self._readings: Dict[int, dict] = {}
+        self._generation = uuid.uuid4().hex[:8]
+        self._versions: Dict[Optional[int], int] = {}  # por local; a chave None conta todas as alterações
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def _is_fresh(self) -> bool:
+        if self._loaded_at is None:
+            return False
+        return self.reload_seconds <= 0 or time.monotonic() - self._loaded_at < self.reload_seconds
+
+    def _bump(self, *location_ids):
+        for location_id in {None, *location_ids}:
+            self._versions[location_id] = self._versions.get(location_id, 0) + 1
+
+    # loader() -> (controladores [(id, location_id, enabled)], leituras [dict])
+    def ensure_loaded(self, loader: Callable):
+        if self._is_fresh():
+            return
+        with self._load_lock:
+            if self._is_fresh():
+                return
+            controllers, readings = loader()
+            with self._lock:
+                self._controllers = {row[0]: (row[1], row[2]) for row in controllers}
+                self._readings = {
+                    reading["controller_id"]: {**reading, "time": as_utc(reading["time"])} for reading in readings
+                }
+                self._generation = uuid.uuid4().hex[:8]
+                self._versions = {}
+                self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    # Chamado após o commit de uma leitura; mantém apenas a mais recente por (time, id)
+    def record(self, reading: dict):
+        controller_id = reading["controller_id"]
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            if controller_id not in self._controllers:
+                # Controlador criado por outro processo: recarrega na próxima consulta
+                self._loaded_at = None
+                return
+            current = self._readings.get(controller_id)
+            if current is not None and (current["time"], current["id"]) >= (as_utc(reading["time"]), reading["id"]):
+                return
+            self._readings[controller_id] = {**reading, "time": as_utc(reading["time"])}
+            self._bump(self._controllers[controller_id][0])
+
+    def set_controller(self, controller_id: int, location_id: int, enabled: bool):
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            previous = self._controllers.get(controller_id)
+            self._controllers[controller_id] = (location_id, enabled)
+            if previous != (location_id, enabled):
+                self._bump(location_id, previous[0] if previous else location_id)
+
+    # Retorna (etag, leituras) dos controladores habilitados, opcionalmente de um único local
+    def latest(self, location_id: Optional[int] = None) -> Tuple[str, List[dict]]:
+        with self._lock:
+            etag = f'W/"{self._generation}-{location_id or 0}-{self._versions.get(location_id, 0)}"'
+            items = []
+            for controller_id in sorted(self._readings):
+                controller_location, enabled = self._controllers.get(controller_id, (None, False))
+                if not enabled or (location_id is not None and controller_location != location_id):
+                    continue
+                items.append({**self._readings[controller_id], "location_id": controller_location})
+            return etag, items
+
+latest_readings = LatestReadingSnapshot(reload_seconds=settings.LATEST_SNAPSHOT_RELOAD_SECONDS)
@@ -0,0 +1,119 @@
+# Distribuição em tempo real das leituras gravadas (pub/sub em memória, por processo).
+# As gravações publicam as leituras (de qualquer thread); cada cliente conectado (SSE ou WebSocket) tem uma
+# fila limitada no event loop. Cliente lento que enche a fila é desconectado em vez de atrasar os demais.
+# As últimas leituras de cada controlador ficam guardadas para o replay na conexão; clientes ociosos não
+# geram nenhuma consulta ao banco.
+import asyncio
+import threading
+from collections import defaultdict, deque
+from typing import Dict, FrozenSet, List, Optional, Set
+from app.core.config import settings
+
+class Subscription:
+    def __init__(self, controller_ids: FrozenSet[int], buffer_size: int):
+        self.controller_ids = controller_ids
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self.dropped = False
+
+    # Próxima leitura; None quando o cliente foi descartado por lentidão
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+
+class LiveReadingHub:
+    def __init__(self, buffer_size: int, replay_size: int, max_subscribers: int):
+        self.buffer_size = buffer_size
+        self.replay_size = replay_size
+        self.max_subscribers = max_subscribers
+        self._subscriptions: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._count = 0
+        self._recent: Dict[int, deque] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+        self.slow_consumers = 0
+
+    @property
+    def subscribers(self) -> int:
+        return self._count
+
+    # Chamado após o commit das leituras (de qualquer thread)
+    def publish(self, readings: List[dict]):
+        if not readings:
+            return
+        with self._lock:
+            if self.replay_size > 0:
+                for reading in readings:
+                    recent = self._recent.get(reading["controller_id"])
+                    if recent is None:
+                        recent = self._recent[reading["controller_id"]] = deque(maxlen=self.replay_size)
+                    recent.append(reading)
+            self.published += len(readings)
+            loop = self._loop if self._count else None
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._dispatch, readings)
+
+    def _dispatch(self, readings: List[dict]):
+        for reading in readings:
+            for subscription in list(self._subscriptions.get(reading["controller_id"], ())):
+                if subscription.dropped:
+                    continue
+                try:
+                    subscription.queue.put_nowait(reading)
+                    self.delivered += 1
+                except asyncio.QueueFull:
+                    # Descarta o cliente: esvazia a fila e sinaliza o fim com None
+                    subscription.dropped = True
+                    self.slow_consumers += 1
+                    while not subscription.queue.empty():
+                        subscription.queue.get_nowait()
+                    subscription.queue.put_nowait(None)
+
+    # Retorna None se o limite de clientes foi atingido
+    def subscribe(self, controller_ids: FrozenSet[int]) -> Optional[Subscription]:
+        if self._count >= self.max_subscribers:
+            return None
+        subscription = Subscription(controller_ids, self.buffer_size)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            for controller_id in controller_ids:
+                self._subscriptions[controller_id].add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            for controller_id in subscription.controller_ids:
+                subscribers = self._subscriptions.get(controller_id)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscriptions[controller_id]
+            self._count -= 1
+
+    # Últimas leituras guardadas dos controladores, em ordem de tempo
+    def recent(self, controller_ids: FrozenSet[int]) -> Dict[int, List[dict]]:
+        with self._lock:
+            return {
+                controller_id: list(self._recent[controller_id])
+                for controller_id in controller_ids if controller_id in self._recent
+            }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "subscribers": self._count,
+                "max_subscribers": self.max_subscribers,
+                "watched_controllers": len(self._subscriptions),
+                "buffer_size": self.buffer_size,
+                "replay_size": self.replay_size,
+                "published": self.published,
+                "delivered": self.delivered,
+                "slow_consumers": self.slow_consumers,
+            }
+
+live_hub = LiveReadingHub(
+    buffer_size=settings.LIVE_CLIENT_BUFFER_SIZE,
+    replay_size=settings.LIVE_REPLAY_SIZE,
+    max_subscribers=settings.LIVE_MAX_SUBSCRIBERS,
+)
@@ -0,0 +1,18 @@
+# Cursores opacos para paginação por keyset (time, id)
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+from app.core.aggregation import as_utc
+
+def encode_cursor(time: datetime, id: int) -> str:
+    payload = json.dumps([as_utc(time).isoformat(), id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decode_cursor(token: str) -> Tuple[datetime, int]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        time, id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return as_utc(datetime.fromisoformat(time)), int(id)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Cursor de paginação inválido.") from exc
@@ -0,0 +1,85 @@
+# Métricas do pool de conexões (checkouts, overflow e tempo de espera por conexão)
+import threading
+import time
+from sqlalchemy import event
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_count = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.wait_count += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def increment(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_count": self.wait_count,
+                "wait_ms_total": round(self.wait_seconds_total * 1000, 3),
+                "wait_ms_avg": round(self.wait_seconds_total * 1000 / self.wait_count, 3) if self.wait_count else 0.0,
+                "wait_ms_max": round(self.wait_seconds_max * 1000, 3),
+            }
+
+# Cria uma subclasse do pool que mede o tempo gasto em Pool.connect() (espera por conexão livre + abertura).
+# As estatísticas ficam na classe para sobreviver a Pool.recreate() (ex: engine.dispose()).
+def instrumented_pool_class(base: type, stats: PoolStats) -> type:
+    def connect(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return base.connect(self)
+        except Exception as exc:
+            timed_out = type(exc).__name__ == "TimeoutError"
+            raise
+        finally:
+            stats.record_wait(time.perf_counter() - started, timed_out=timed_out)
+
+    return type(f"Instrumented{base.__name__}", (base,), {"connect": connect, "stats": stats})
+
+class PoolMonitor:
+    def __init__(self):
+        self._engines = {}
+
+    def register(self, name: str, engine, stats: PoolStats):
+        # Eventos de pool associados à engine são repassados também a pools recriados
+        sync_engine = getattr(engine, "sync_engine", engine)
+        event.listen(sync_engine, "connect", lambda *_: stats.increment("connects"))
+        event.listen(sync_engine, "checkout", lambda *_: stats.increment("checkouts"))
+        event.listen(sync_engine, "checkin", lambda *_: stats.increment("checkins"))
+        event.listen(sync_engine, "invalidate", lambda *_: stats.increment("invalidations"))
+        self._engines[name] = (engine, stats)
+
+    def snapshot(self) -> dict:
+        result = {}
+        for name, (engine, stats) in self._engines.items():
+            pool = getattr(engine, "sync_engine", engine).pool
+            info = {"pool_class": type(pool).__name__, "status": pool.status()}
+            for attr in ("size", "checkedin", "checkedout", "overflow"):
+                if hasattr(pool, attr):
+                    info[attr] = getattr(pool, attr)()
+            info.update(stats.as_dict())
+            result[name] = info
+        return result
+
+pool_monitor = PoolMonitor()
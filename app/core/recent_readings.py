@@ -0,0 +1,51 @@
+# Janela em memória das leituras gravadas recentemente, por controlador (chave: horário da leitura).
+# Reenvios de controladores com link instável costumam repetir as últimas leituras; a janela descarta essas
+# repetições antes do INSERT. É só um atalho: a garantia vem do índice único (controller_id, time) com
+# ON CONFLICT DO NOTHING, que também cobre réplicas da API e reinícios.
+import threading
+from collections import defaultdict, deque
+from datetime import datetime
+from app.core.config import settings
+
+class RecentReadingWindow:
+    def __init__(self, size: int):
+        self.size = size
+        self._times = defaultdict(set)
+        self._order = defaultdict(deque)
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def contains(self, controller_id: int, reading_time: datetime) -> bool:
+        with self._lock:
+            found = reading_time in self._times.get(controller_id, ())
+            if found:
+                self.dropped += 1
+            return found
+
+    def add(self, controller_id: int, reading_time: datetime):
+        if self.size <= 0:
+            return
+        with self._lock:
+            times = self._times[controller_id]
+            if reading_time in times:
+                return
+            order = self._order[controller_id]
+            times.add(reading_time)
+            order.append(reading_time)
+            if len(order) > self.size:
+                times.discard(order.popleft())
+
+    def clear(self):
+        with self._lock:
+            self._times.clear()
+            self._order.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "window_size": self.size,
+                "controllers": len(self._order),
+                "dropped": self.dropped,
+            }
+
+recent_readings = RecentReadingWindow(size=settings.INGEST_DEDUPE_WINDOW)
@@ -0,0 +1,124 @@
+# Roteamento de leituras para réplicas (DB_READ_REPLICA_URLS).
+# Cada réplica tem a própria engine/pool; o atraso de replicação é medido periodicamente por uma tarefa de fundo
+# (run_lag_checks) e réplicas acima de DB_REPLICA_MAX_LAG_SECONDS, inacessíveis ou com atraso desconhecido deixam
+# de receber leituras até voltarem a ficar em dia. Até a primeira medição as leituras vão para o primário.
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from typing import List, Optional, Tuple
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+# Cookie de read-your-writes: até o instante (epoch) informado o cliente lê do primário
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+# Atraso em segundos. 0 se não é réplica ou se o WAL receiver está conectado (streaming) e tudo o que recebeu já
+# foi aplicado. Com o receiver desconectado ou parado (um receiver travado é encerrado após wal_receiver_timeout)
+# o atraso é o tempo desde a última transação aplicada, que cresce até a réplica sair do roteamento; NULL
+# (desconhecido) se nenhuma transação foi aplicada desde o início da réplica. O status do receiver só é visível
+# com pg_read_all_stats; sem o privilégio basta a existência do processo
+PG_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status IS NULL OR status = 'streaming')
+             AND pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
+
+class Replica:
+    def __init__(self, name: str, session_factory):
+        self.name = name
+        self.session_factory = session_factory
+        self.lag_seconds: Optional[float] = None
+        self.healthy = False
+        self.checked_at: Optional[float] = None
+        self.reads = 0
+
+class ReplicaRouter:
+    def __init__(self, replicas: List[Tuple[str, object]], max_lag_seconds: float):
+        self.replicas = [Replica(name, session_factory) for name, session_factory in replicas]
+        self.max_lag_seconds = max_lag_seconds
+        self.primary_reads = 0
+        self.fallbacks = 0
+        self._cycle = itertools.cycle(self.replicas) if self.replicas else None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    # None: atraso desconhecido (a réplica é tratada como fora de dia)
+    def measure_lag(self, replica: Replica) -> Optional[float]:
+        with replica.session_factory() as db:
+            if db.get_bind().dialect.name == "postgresql":
+                lag = db.execute(PG_LAG_QUERY).scalar()
+                return None if lag is None else float(lag)
+            # Outros bancos (ex: SQLite nos testes): apenas verifica a conexão
+            db.execute(text("SELECT 1"))
+            return 0.0
+
+    def check_replica(self, replica: Replica):
+        try:
+            lag = self.measure_lag(replica)
+        except Exception:
+            logger.warning("Réplica %s inacessível; leituras vão para o primário.", replica.name, exc_info=True)
+            lag = None
+        else:
+            if lag is None:
+                logger.warning("Atraso da réplica %s desconhecido; leituras vão para o primário.", replica.name)
+        with self._lock:
+            replica.lag_seconds = lag
+            replica.healthy = lag is not None and lag <= self.max_lag_seconds
+            replica.checked_at = time.monotonic()
+
+    def check(self):
+        for replica in self.replicas:
+            self.check_replica(replica)
+
+    # Próxima réplica em dia (round-robin); None significa usar o primário
+    def choose(self) -> Optional[Replica]:
+        if not self.replicas:
+            return None
+        with self._lock:
+            for _ in range(len(self.replicas)):
+                replica = next(self._cycle)
+                if replica.healthy:
+                    replica.reads += 1
+                    return replica
+            self.fallbacks += 1
+            return None
+
+    def record_primary_read(self):
+        with self._lock:
+            self.primary_reads += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_lag_seconds": self.max_lag_seconds,
+                "primary_reads": self.primary_reads,
+                "fallbacks": self.fallbacks,
+                "replicas": [
+                    {
+                        "name": replica.name,
+                        "healthy": replica.healthy,
+                        "lag_seconds": replica.lag_seconds,
+                        "reads": replica.reads,
+                    }
+                    for replica in self.replicas
+                ],
+            }
+
+# Mede as réplicas em paralelo (uma réplica que trava na conexão não atrasa a medição das outras) e nunca dentro
+# de uma requisição
+async def run_lag_checks(replica_router: ReplicaRouter, interval_seconds: float):
+    while True:
+        await asyncio.gather(*(
+            run_in_threadpool(replica_router.check_replica, replica) for replica in replica_router.replicas
+        ))
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,223 @@
+# Cache de respostas das rotas de metadados (locais, sensores, controlador por ID).
+# Cada entrada guarda o corpo JSON já serializado e é marcada com tags (ex: "locations", "location:3");
+# as funções de escrita de app/crud.py invalidam exatamente as tags afetadas.
+# Backend padrão: LRU com TTL em memória (por processo); com vários workers use o backend Redis compartilhado.
+import hashlib
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from email.utils import formatdate, parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Iterable, NamedTuple, Optional
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from app.core.config import settings
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+    last_modified: float
+
+class MemoryBackend:
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # chave -> (expira_em, entrada, tags)
+        self._tags = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def _remove(self, key: str):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            self._tags[tag].discard(key)
+            if not self._tags[tag]:
+                del self._tags[tag]
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if item[0] <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return item[1]
+
+    def set(self, key: str, entry: CachedResponse, tags: Iterable[str]):
+        if self.max_size <= 0:
+            return
+        tags = frozenset(tags)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, entry, tags)
+            for tag in tags:
+                self._tags[tag].add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, tags: Iterable[str]):
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+# Backend compartilhado entre processos (requer o pacote redis)
+class RedisBackend:
+    def __init__(self, url: str, ttl_seconds: float, prefix: str = "estacao:response-cache:"):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self.ttl_seconds = max(int(ttl_seconds), 1)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        data = self._client.hgetall(self.prefix + key)
+        if not data:
+            return None
+        return CachedResponse(data[b"body"], data[b"etag"].decode(), float(data[b"last_modified"]))
+
+    def set(self, key: str, entry: CachedResponse, tags: Iterable[str]):
+        pipe = self._client.pipeline()
+        pipe.hset(self.prefix + key, mapping={
+            "body": entry.body, "etag": entry.etag, "last_modified": entry.last_modified
+        })
+        pipe.expire(self.prefix + key, self.ttl_seconds)
+        for tag in tags:
+            pipe.sadd(self.prefix + "tag:" + tag, key)
+            pipe.expire(self.prefix + "tag:" + tag, self.ttl_seconds)
+        pipe.execute()
+
+    def invalidate(self, tags: Iterable[str]):
+        for tag in tags:
+            tag_key = self.prefix + "tag:" + tag
+            keys = self._client.smembers(tag_key)
+            self._client.delete(tag_key, *[self.prefix + key.decode() for key in keys])
+
+    def clear(self):
+        for key in self._client.scan_iter(match=self.prefix + "*"):
+            self._client.delete(key)
+
+    def size(self) -> int:
+        return sum(1 for key in self._client.scan_iter(match=self.prefix + "*") if b":tag:" not in key)
+
+class ResponseCache:
+    def __init__(self, backend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def invalidate(self, *tags: str):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+        self.backend.invalidate(tags)
+
+    def clear(self):
+        self.backend.clear()
+
+    # Serve a rota a partir do cache; em caso de miss, build() retorna (corpo JSON, tags) e a entrada é gravada.
+    # Responde 304 quando If-None-Match/If-Modified-Since indicam que o cliente já tem a versão atual.
+    def respond(self, request: Request, build: Callable[[], tuple]) -> Response:
+        key, entry = self._lookup(request)
+        if entry is not None:
+            return self._response(request, entry, "HIT")
+        generation = self._generation
+        entry = self._store(key, generation, *build())
+        return self._response(request, entry, "MISS")
+
+    # Mesmo que respond, com build() assíncrono (rotas de DB_ASYNC_ENABLED)
+    async def respond_async(self, request: Request, build: Callable[[], Awaitable[tuple]]) -> Response:
+        key, entry = self._lookup(request)
+        if entry is not None:
+            return self._response(request, entry, "HIT")
+        generation = self._generation
+        entry = self._store(key, generation, *(await build()))
+        return self._response(request, entry, "MISS")
+
+    def _lookup(self, request: Request) -> tuple:
+        key = request.url.path + ("?" + str(request.query_params) if request.query_params else "")
+        entry = self.backend.get(key) if self.enabled else None
+        self._count("misses" if entry is None else "hits")
+        return key, entry
+
+    def _store(self, key: str, generation: int, body: bytes, tags: list) -> CachedResponse:
+        entry = CachedResponse(body, f'"{hashlib.sha1(body).hexdigest()[:20]}"', time.time())
+        # Não grava se houve invalidação durante a consulta (o resultado pode já estar desatualizado)
+        if self.enabled and generation == self._generation:
+            self.backend.set(key, entry, tags)
+        return entry
+
+    def _response(self, request: Request, entry: CachedResponse, cache_status: str) -> Response:
+        headers = {
+            "ETag": entry.etag,
+            "Last-Modified": formatdate(entry.last_modified, usegmt=True),
+            "Cache-Control": "no-cache",
+            "X-Cache": cache_status,
+        }
+        if _not_modified(request, entry):
+            self._count("not_modified")
+            return Response(status_code=304, headers=headers)
+        return Response(entry.body, media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "backend": type(self.backend).__name__,
+                "size": self.backend.size(),
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "invalidations": self.invalidations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+@lru_cache(maxsize=None)
+def _adapter(schema) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+# Serializa o valor (ex: objetos ORM) com o schema da rota, como faria o response_model
+def serialize(schema, value: Any) -> bytes:
+    adapter = _adapter(schema)
+    return adapter.dump_json(adapter.validate_python(value))
+
+def _not_modified(request: Request, entry: CachedResponse) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return entry.etag in [value.strip().removeprefix("W/") for value in if_none_match.split(",")]
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(entry.last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def create_backend():
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        return RedisBackend(settings.RESPONSE_CACHE_REDIS_URL, settings.RESPONSE_CACHE_TTL_SECONDS)
+    return MemoryBackend(settings.RESPONSE_CACHE_SIZE, settings.RESPONSE_CACHE_TTL_SECONDS)
+
+response_cache = ResponseCache(create_backend(), enabled=settings.RESPONSE_CACHE_ENABLED)
@@ -0,0 +1,252 @@
+# Índice espacial em memória dos locais (grade regular de lat/lng) para as consultas do mapa:
+# locais dentro de um retângulo (viewport) e os K mais próximos de um ponto. É carregado do banco uma vez e
+# atualizado pelas escritas de locais e controladores (app/crud.py); as consultas não acessam o banco.
+import math
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from app.core.config import settings
+
+EARTH_RADIUS_KM = 6371.0088
+
+class IndexedLocation(NamedTuple):
+    id: int
+    name: str
+    lat: float
+    lng: float
+
+class IndexedController(NamedTuple):
+    id: int
+    location_id: int
+    hw_desc: str
+    version: Optional[float]
+    enabled: bool
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+# Retângulo (min_lat, min_lng, max_lat, max_lng) que contém o círculo de raio radius_km; o teste exato de
+# distância é feito depois. Perto dos polos (ou com raio enorme) cobre todas as longitudes
+def bounding_box(lat: float, lng: float, radius_km: float) -> Tuple[float, float, float, float]:
+    delta_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = max(lat - delta_lat, -90.0), min(lat + delta_lat, 90.0)
+    if min_lat <= -90 or max_lat >= 90:
+        return min_lat, -180.0, max_lat, 180.0
+    ratio = math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(lat))
+    if ratio >= 1:
+        return min_lat, -180.0, max_lat, 180.0
+    delta_lng = math.degrees(math.asin(ratio))
+    return min_lat, normalize_lng(lng - delta_lng), max_lat, normalize_lng(lng + delta_lng)
+
+def normalize_lng(lng: float) -> float:
+    return (lng + 180.0) % 360.0 - 180.0 if not -180.0 <= lng <= 180.0 else lng
+
+# min_lng > max_lng indica um retângulo que cruza o antimeridiano (ex: 170 a -170)
+def in_box(lat: float, lng: float, min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> bool:
+    if not min_lat <= lat <= max_lat:
+        return False
+    if min_lng <= max_lng:
+        return min_lng <= lng <= max_lng
+    return lng >= min_lng or lng <= max_lng
+
+class LocationGridIndex:
+    def __init__(self, cell_degrees: float, reload_seconds: float):
+        self.cell_degrees = cell_degrees
+        self.reload_seconds = reload_seconds
+        self._lng_cells = math.ceil(360 / cell_degrees)
+        self._lat_cells = math.ceil(180 / cell_degrees)
+        self._locations: Dict[int, IndexedLocation] = {}
+        self._cells: Dict[Tuple[int, int], Dict[int, IndexedLocation]] = {}
+        self._controllers: Dict[int, IndexedController] = {}
+        self._by_location: Dict[int, Dict[int, IndexedController]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.queries = 0
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        row = min(math.floor((lat + 90) / self.cell_degrees), self._lat_cells - 1)
+        column = math.floor((normalize_lng(lng) + 180) / self.cell_degrees) % self._lng_cells
+        return row, column
+
+    def _is_fresh(self) -> bool:
+        if self._loaded_at is None:
+            return False
+        return self.reload_seconds <= 0 or time.monotonic() - self._loaded_at < self.reload_seconds
+
+    # loader() -> (locais [(id, name, lat, lng)], controladores [(id, location_id, hw_desc, version, enabled)])
+    def ensure_loaded(self, loader: Callable):
+        if self._is_fresh():
+            return
+        with self._load_lock:
+            if self._is_fresh():
+                return
+            locations, controllers = loader()
+            with self._lock:
+                self._locations = {}
+                self._cells = {}
+                for row in locations:
+                    self._put_location(IndexedLocation(*row))
+                self._controllers = {}
+                self._by_location = {}
+                for row in controllers:
+                    self._put_controller(IndexedController(*row))
+                self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def _put_location(self, location: IndexedLocation):
+        previous = self._locations.get(location.id)
+        if previous is not None:
+            cell = self._cells[self._cell(previous.lat, previous.lng)]
+            del cell[previous.id]
+            if not cell:
+                del self._cells[self._cell(previous.lat, previous.lng)]
+        self._locations[location.id] = location
+        self._cells.setdefault(self._cell(location.lat, location.lng), {})[location.id] = location
+
+    def _put_controller(self, controller: IndexedController):
+        previous = self._controllers.get(controller.id)
+        if previous is not None:
+            self._by_location.get(previous.location_id, {}).pop(controller.id, None)
+        self._controllers[controller.id] = controller
+        self._by_location.setdefault(controller.location_id, {})[controller.id] = controller
+
+    # Chamados após o commit das escritas; antes da primeira carga não há o que atualizar
+    def set_location(self, location_id: int, name: str, lat: float, lng: float):
+        with self._lock:
+            if self._loaded_at is not None:
+                self._put_location(IndexedLocation(location_id, name, lat, lng))
+
+    def set_controller(self, controller_id: int, location_id: int, hw_desc: str, version: Optional[float], enabled: bool):
+        with self._lock:
+            if self._loaded_at is not None:
+                self._put_controller(IndexedController(controller_id, location_id, hw_desc, version, enabled))
+
+    # Locais dentro do retângulo, em ordem de id
+    def within(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float, limit: int) -> List[IndexedLocation]:
+        with self._lock:
+            self.queries += 1
+            first_row, last_row = self._cell(min_lat, 0)[0], self._cell(max_lat, 0)[0]
+            first_column, last_column = self._cell(0, min_lng)[1], self._cell(0, max_lng)[1]
+            columns = (last_column - first_column) % self._lng_cells + 1
+            if (min_lng <= max_lng and first_column > last_column) or (min_lng > max_lng and columns == 1):
+                columns = self._lng_cells
+            # Retângulo grande em relação à grade ocupada: percorre só as células ocupadas
+            if (last_row - first_row + 1) * columns > len(self._cells):
+                candidates = [location for cell in self._cells.values() for location in cell.values()]
+            else:
+                candidates = []
+                for row in range(first_row, last_row + 1):
+                    for offset in range(columns):
+                        cell = self._cells.get((row, (first_column + offset) % self._lng_cells))
+                        if cell:
+                            candidates.extend(cell.values())
+            matches = [
+                location for location in candidates
+                if in_box(location.lat, location.lng, min_lat, min_lng, max_lat, max_lng)
+            ]
+        return sorted(matches, key=lambda location: location.id)[:limit]
+
+    # K locais mais próximos (distância em km), do mais próximo ao mais distante. A busca percorre anéis de
+    # células em volta do ponto e para quando nenhuma célula ainda não visitada pode conter um local mais
+    # próximo que o K-ésimo encontrado (ou que max_distance_km)
+    def nearest(self, lat: float, lng: float, k: int, max_distance_km: float) -> List[Tuple[float, IndexedLocation]]:
+        with self._lock:
+            self.queries += 1
+            if not self._locations or k <= 0:
+                return []
+            center_row, center_column = self._cell(lat, lng)
+            found: List[Tuple[float, IndexedLocation]] = []
+            ring = 0
+            while True:
+                # Anel maior que a grade ocupada (ou que a volta completa em longitude): mais barato medir todos
+                if 8 * ring > len(self._cells) or 2 * ring + 1 > self._lng_cells:
+                    found = [
+                        (haversine_km(lat, lng, location.lat, location.lng), location)
+                        for location in self._locations.values()
+                    ]
+                    break
+                for row, column in self._ring(center_row, center_column, ring):
+                    for location in self._cells.get((row, column), {}).values():
+                        found.append((haversine_km(lat, lng, location.lat, location.lng), location))
+                found.sort(key=lambda item: (item[0], item[1].id))
+                limit = min(found[k - 1][0], max_distance_km) if len(found) >= k else max_distance_km
+                if self._unvisited_distance_km(lat, lng, center_row, center_column, ring) > limit:
+                    break
+                if len(found) == len(self._locations):
+                    break
+                ring += 1
+        found.sort(key=lambda item: (item[0], item[1].id))
+        return [item for item in found if item[0] <= max_distance_km][:k]
+
+    def _ring(self, center_row: int, center_column: int, ring: int):
+        if ring == 0:
+            yield center_row, center_column
+            return
+        columns = range(center_column - ring, center_column + ring + 1)
+        seen = set()
+        for row in range(center_row - ring, center_row + ring + 1):
+            if not 0 <= row < self._lat_cells:
+                continue
+            edge_row = abs(row - center_row) == ring
+            for column in columns:
+                if not edge_row and abs(column - center_column) != ring:
+                    continue
+                cell = (row, column % self._lng_cells)
+                if cell not in seen:
+                    seen.add(cell)
+                    yield cell
+
+    # Limite inferior da distância do ponto a qualquer local fora do quadrado de células já visitado: a menor
+    # entre as distâncias até as bordas de latitude (ao longo do meridiano) e até os meridianos das bordas
+    # de longitude (distância transversal)
+    def _unvisited_distance_km(self, lat: float, lng: float, center_row: int, center_column: int, ring: int) -> float:
+        bounds = []
+        south = (center_row - ring) * self.cell_degrees - 90
+        north = (center_row + ring + 1) * self.cell_degrees - 90
+        if south > -90:
+            bounds.append(lat - south)
+        if north < 90:
+            bounds.append(north - lat)
+        if (2 * ring + 1) < self._lng_cells:
+            west = (center_column - ring) * self.cell_degrees - 180
+            east = (center_column + ring + 1) * self.cell_degrees - 180
+            for delta in (normalize_lng(lng) - west, east - normalize_lng(lng)):
+                cross = math.asin(math.cos(math.radians(lat)) * math.sin(math.radians(min(delta, 90))))
+                bounds.append(math.degrees(cross))
+        if not bounds:
+            return math.inf
+        return math.radians(max(min(bounds), 0)) * EARTH_RADIUS_KM
+
+    # Controladores habilitados de cada local
+    def controllers(self, location_ids: List[int]) -> Dict[int, List[IndexedController]]:
+        with self._lock:
+            return {
+                location_id: sorted(
+                    (controller for controller in self._by_location.get(location_id, {}).values() if controller.enabled),
+                    key=lambda controller: controller.id
+                )
+                for location_id in location_ids
+            }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": self._loaded_at is not None,
+                "locations": len(self._locations),
+                "controllers": len(self._controllers),
+                "cell_degrees": self.cell_degrees,
+                "occupied_cells": len(self._cells),
+                "queries": self.queries,
+            }
+
+location_index = LocationGridIndex(
+    cell_degrees=settings.SPATIAL_INDEX_CELL_DEGREES,
+    reload_seconds=settings.SPATIAL_INDEX_RELOAD_SECONDS,
+)
@@ -0,0 +1,293 @@
+# Estado incremental de saúde de cada controlador, atualizado a cada leitura gravada em O(1) e sem consultar
+# a tabela de leituras: último contato, média/variância móveis (exponenciais) por métrica, contadores de valor
+# travado e fora da faixa física, e as leituras anômalas mais recentes. Como o snapshot de condições atuais,
+# cada processo vê apenas as leituras que ele mesmo gravou.
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from app.core.aggregation import as_utc
+from app.core.config import settings
+
+# Faixas fisicamente plausíveis nas unidades das leituras (°C, %, graus, m/s, hPa e mm por leitura)
+PLAUSIBLE_RANGES = {
+    "temperature": (-50.0, 60.0),
+    "humidity": (0.0, 100.0),
+    "dir_wind": (0.0, 360.0),
+    "vel_wind": (0.0, 75.0),
+    "pressure": (800.0, 1100.0),
+    "rain_measure": (0.0, 200.0),
+}
+
+# Métricas com teste de desvio (z-score) e desvio padrão mínimo considerado; direção do vento (circular),
+# velocidade do vento e chuva (rajadas e pancadas) não seguem bem a média móvel
+OUTLIER_METRICS = {"temperature": 0.5, "humidity": 2.0, "pressure": 1.0}
+
+# Métricas em que o mesmo valor repetido por muito tempo indica sensor travado (chuva zerada, calmaria e
+# direção constante são normais)
+STUCK_METRICS = ("temperature", "humidity")
+
+class MetricState:
+    __slots__ = ("count", "mean", "variance", "last", "stuck", "out_of_range", "anomalies")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.variance = 0.0
+        self.last: Optional[float] = None
+        self.stuck = 0
+        self.out_of_range = 0
+        self.anomalies = 0
+
+    # Média e variância móveis exponenciais; no aquecimento o peso 1/n reproduz a média simples
+    def update(self, value: float, alpha: float):
+        self.count += 1
+        weight = max(alpha, 1 / self.count)
+        difference = value - self.mean
+        increment = weight * difference
+        self.mean += increment
+        self.variance = (1 - weight) * (self.variance + difference * increment)
+
+    def as_dict(self) -> dict:
+        return {
+            "mean": round(self.mean, 3) if self.count else None,
+            "std": round(self.variance ** 0.5, 3) if self.count else None,
+            "last": self.last,
+            "stuck_count": self.stuck,
+            "out_of_range": self.out_of_range,
+            "anomalies": self.anomalies,
+        }
+
+class ControllerState:
+    __slots__ = (
+        "location_id", "enabled", "last_seen", "last_reading_time", "readings", "invalid_streak",
+        "last_anomaly_at", "disable_pending", "stale", "metrics",
+    )
+
+    def __init__(self, location_id: int, enabled: bool):
+        self.location_id = location_id
+        self.enabled = enabled
+        self.last_seen: Optional[float] = None  # epoch do servidor ao receber a leitura
+        self.last_reading_time: Optional[datetime] = None
+        self.readings = 0
+        self.invalid_streak = 0
+        self.last_anomaly_at: Optional[float] = None
+        self.disable_pending = False
+        self.stale = False
+        self.metrics = {metric: MetricState() for metric in PLAUSIBLE_RANGES}
+
+class StationHealthMonitor:
+    def __init__(
+        self, stale_after_seconds: float, alpha: float, warmup_readings: int, zscore_threshold: float,
+        stuck_readings: int, anomaly_buffer_size: int, auto_disable_after: int
+    ):
+        self.stale_after_seconds = stale_after_seconds
+        self.alpha = alpha
+        self.warmup_readings = warmup_readings
+        self.zscore_threshold = zscore_threshold
+        self.stuck_readings = stuck_readings
+        self.auto_disable_after = auto_disable_after
+        self._controllers: Dict[int, ControllerState] = {}
+        self._anomalies: deque = deque(maxlen=anomaly_buffer_size)
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.recorded = 0
+        self.auto_disabled = 0
+
+    # loader() -> (controladores [(id, location_id, enabled)], leituras mais recentes [dict]); as leituras só
+    # definem o último contato inicial, as estatísticas começam vazias
+    def ensure_loaded(self, loader: Callable):
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            controllers, readings = loader()
+            with self._lock:
+                for controller_id, location_id, enabled in controllers:
+                    state = self._controllers.get(controller_id)
+                    if state is None:
+                        self._controllers[controller_id] = ControllerState(location_id, enabled)
+                    else:
+                        state.location_id, state.enabled = location_id, enabled
+                for reading in readings:
+                    state = self._controllers.get(reading["controller_id"])
+                    if state is not None and state.last_seen is None:
+                        state.last_reading_time = as_utc(reading["time"])
+                        state.last_seen = state.last_reading_time.timestamp()
+                self._loaded = True
+
+    def set_controller(self, controller_id: int, location_id: int, enabled: bool):
+        with self._lock:
+            if not self._loaded:
+                return
+            state = self._controllers.get(controller_id)
+            if state is None:
+                self._controllers[controller_id] = ControllerState(location_id, enabled)
+                return
+            state.location_id, state.enabled = location_id, enabled
+            if enabled:
+                state.disable_pending = False
+                state.invalid_streak = 0
+
+    def _anomaly(self, state: ControllerState, reading: dict, metric: str, value, kind: str, now: float, **extra):
+        state.metrics[metric].anomalies += 1
+        state.last_anomaly_at = now
+        self._anomalies.append({
+            "controller_id": reading["controller_id"],
+            "reading_id": reading.get("id"),
+            "time": as_utc(reading["time"]),
+            "metric": metric,
+            "value": value,
+            "kind": kind,
+            **extra,
+        })
+
+    # Chamado após o commit das leituras (de qualquer thread)
+    def record(self, readings: List[dict]):
+        now = time.time()
+        with self._lock:
+            if not self._loaded:
+                return
+            for reading in readings:
+                state = self._controllers.get(reading["controller_id"])
+                if state is None:
+                    continue
+                self.recorded += 1
+                state.readings += 1
+                state.last_seen = now
+                reading_time = as_utc(reading["time"])
+                if state.last_reading_time is None or reading_time > state.last_reading_time:
+                    state.last_reading_time = reading_time
+
+                invalid = False
+                for metric, (low, high) in PLAUSIBLE_RANGES.items():
+                    value = reading.get(metric)
+                    if value is None:
+                        continue
+                    metric_state = state.metrics[metric]
+                    if not low <= value <= high:
+                        invalid = True
+                        metric_state.out_of_range += 1
+                        self._anomaly(state, reading, metric, value, "out_of_range", now, expected=[low, high])
+                        continue
+
+                    if metric in STUCK_METRICS:
+                        metric_state.stuck = metric_state.stuck + 1 if value == metric_state.last else 0
+                        if metric_state.stuck == self.stuck_readings:
+                            self._anomaly(state, reading, metric, value, "stuck", now, repeated=metric_state.stuck)
+                    min_std = OUTLIER_METRICS.get(metric)
+                    if min_std is not None and metric_state.count >= self.warmup_readings:
+                        std = max(metric_state.variance ** 0.5, min_std)
+                        zscore = abs(value - metric_state.mean) / std
+                        if zscore > self.zscore_threshold:
+                            self._anomaly(
+                                state, reading, metric, value, "outlier", now,
+                                expected=[round(metric_state.mean, 3), round(std, 3)]
+                            )
+                    metric_state.last = value
+                    metric_state.update(value, self.alpha)
+
+                state.invalid_streak = state.invalid_streak + 1 if invalid else 0
+                if (self.auto_disable_after > 0 and state.invalid_streak >= self.auto_disable_after
+                        and state.enabled and not state.disable_pending):
+                    state.disable_pending = True
+
+    # Controladores marcados para desabilitação automática (aplicada pelo agendador)
+    def pending_disables(self) -> List[int]:
+        with self._lock:
+            return [controller_id for controller_id, state in self._controllers.items() if state.disable_pending]
+
+    def mark_auto_disabled(self, controller_id: int):
+        with self._lock:
+            state = self._controllers.get(controller_id)
+            if state is not None:
+                state.disable_pending = False
+                state.enabled = False
+            self.auto_disabled += 1
+
+    def _status(self, state: ControllerState, now: float) -> str:
+        if not state.enabled:
+            return "disabled"
+        if state.last_seen is None or now - state.last_seen > self.stale_after_seconds:
+            return "stale"
+        recent_anomaly = state.last_anomaly_at is not None and now - state.last_anomaly_at <= self.stale_after_seconds
+        stuck = any(state.metrics[metric].stuck >= self.stuck_readings for metric in STUCK_METRICS)
+        if state.invalid_streak or stuck or recent_anomaly:
+            return "anomalous"
+        return "ok"
+
+    # Atualiza a marca de inatividade; retorna (ficaram inativos, voltaram a enviar)
+    def check_stale(self):
+        now = time.time()
+        became_stale, recovered = [], []
+        with self._lock:
+            for controller_id, state in self._controllers.items():
+                stale = self._status(state, now) == "stale"
+                if stale and not state.stale:
+                    became_stale.append(controller_id)
+                elif state.stale and not stale:
+                    recovered.append(controller_id)
+                state.stale = stale
+        return became_stale, recovered
+
+    def report(self, status: Optional[str] = None, location_id: Optional[int] = None) -> List[dict]:
+        now = time.time()
+        items = []
+        with self._lock:
+            for controller_id in sorted(self._controllers):
+                state = self._controllers[controller_id]
+                current = self._status(state, now)
+                if (status is not None and current != status) or (location_id is not None and state.location_id != location_id):
+                    continue
+                items.append({
+                    "controller_id": controller_id,
+                    "location_id": state.location_id,
+                    "enabled": state.enabled,
+                    "status": current,
+                    "last_seen": datetime.fromtimestamp(state.last_seen, timezone.utc) if state.last_seen else None,
+                    "seconds_since_seen": round(now - state.last_seen, 1) if state.last_seen else None,
+                    "last_reading_time": state.last_reading_time,
+                    "readings": state.readings,
+                    "invalid_streak": state.invalid_streak,
+                    "auto_disable_pending": state.disable_pending,
+                    "metrics": {metric: metric_state.as_dict() for metric, metric_state in state.metrics.items()},
+                })
+        return items
+
+    # Leituras anômalas mais recentes primeiro
+    def anomalies(self, controller_id: Optional[int] = None, limit: int = 100) -> List[dict]:
+        with self._lock:
+            items = [
+                anomaly for anomaly in reversed(self._anomalies)
+                if controller_id is None or anomaly["controller_id"] == controller_id
+            ]
+        return items[:limit]
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            counts = {}
+            for state in self._controllers.values():
+                current = self._status(state, now)
+                counts[current] = counts.get(current, 0) + 1
+            return {
+                "loaded": self._loaded,
+                "controllers": len(self._controllers),
+                "by_status": counts,
+                "recorded": self.recorded,
+                "anomalies_buffered": len(self._anomalies),
+                "auto_disabled": self.auto_disabled,
+            }
+
+station_health = StationHealthMonitor(
+    stale_after_seconds=settings.STATION_HEALTH_STALE_AFTER_SECONDS,
+    alpha=settings.STATION_HEALTH_EWMA_ALPHA,
+    warmup_readings=settings.STATION_HEALTH_WARMUP_READINGS,
+    zscore_threshold=settings.STATION_HEALTH_ZSCORE_THRESHOLD,
+    stuck_readings=settings.STATION_HEALTH_STUCK_READINGS,
+    anomaly_buffer_size=settings.STATION_HEALTH_ANOMALY_BUFFER_SIZE,
+    auto_disable_after=settings.STATION_HEALTH_AUTO_DISABLE_AFTER if settings.STATION_HEALTH_AUTO_DISABLE_ENABLED else 0,
+)
@@ -1,8 +1,19 @@
 # Contém as funções de interação com o banco de dados
-from sqlalchemy.orm import Session, joinedload
-from app import models, schemas
+from sqlalchemy import Float, and_, cast, exists, func, or_, select, tuple_
+from sqlalchemy.orm import Session, aliased, joinedload
+from app import models, rollups, schemas
+from app.core.aggregation import as_utc, merge_partials_by_bucket
+from app.core.controller_cache import ControllerAuth, controller_key_cache, controller_token_index
+from app.core.latest_snapshot import latest_readings
+from app.core.live_hub import live_hub
+from app.core.recent_readings import recent_readings
+from app.core.response_cache import response_cache
+from app.core.spatial_index import location_index
+from app.core.station_health import station_health
 import secrets # Para gerar tokens de API
+from collections import defaultdict
 from datetime import datetime, timezone
+from typing import List, Optional, Tuple
 
 def update_model_from_schema(model, schema):
     for field, value in schema.dict(exclude_unset=True).items():
@@ -13,6 +24,9 @@ def update_model_from_schema(model, schema):
 def get_location(db: Session, location_id: int):
     return db.query(models.Location).filter(models.Location.id == location_id).first()
 
+def location_exists(db: Session, location_id: int) -> bool:
+    return db.query(exists().where(models.Location.id == location_id)).scalar()
+
 def get_locations(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.Location).offset(skip).limit(limit).all()
 
@@ -21,6 +35,8 @@ def create_location(db: Session, location: schemas.LocationCreate):
     db.add(db_location)
     db.commit()
     db.refresh(db_location)
+    response_cache.invalidate("locations")
+    location_index.set_location(db_location.id, db_location.name, db_location.lat, db_location.lng)
     return db_location
 
 def update_location(db: Session, db_location: models.Location, location_update: schemas.LocationUpdate):
@@ -28,8 +44,47 @@ def update_location(db: Session, db_location: models.Location, location_update:
     db.add(updated_db_location)
     db.commit()
     db.refresh(updated_db_location)
+    response_cache.invalidate("locations", f"location:{updated_db_location.id}")
+    location_index.set_location(
+        updated_db_location.id, updated_db_location.name, updated_db_location.lat, updated_db_location.lng
+    )
     return updated_db_location
 
+# Carga do índice espacial em memória (app/core/spatial_index.py)
+def get_spatial_index_data(db: Session):
+    locations = db.query(models.Location.id, models.Location.name, models.Location.lat, models.Location.lng).all()
+    controllers = db.query(
+        models.Controller.id, models.Controller.location_id, models.Controller.hw_desc,
+        models.Controller.version, models.Controller.enabled
+    ).all()
+    return locations, controllers
+
+# Locais dentro do retângulo direto no banco (índice GiST em point(lng, lat) no PostgreSQL);
+# min_lng > max_lng indica um retângulo que cruza o antimeridiano
+def get_locations_in_box(
+    db: Session, min_lat: float, min_lng: float, max_lat: float, max_lng: float, limit: Optional[int]
+):
+    lat, lng = models.Location.lat, models.Location.lng
+    if db.get_bind().dialect.name == "postgresql":
+        point = func.point(lng, lat)
+        def box(west, east):
+            return point.op("<@")(func.box(func.point(west, min_lat), func.point(east, max_lat)))
+    else:
+        def box(west, east):
+            return and_(lat.between(min_lat, max_lat), lng.between(west, east))
+    condition = box(min_lng, max_lng) if min_lng <= max_lng else or_(box(min_lng, 180.0), box(-180.0, max_lng))
+    return db.query(models.Location).filter(condition).order_by(models.Location.id).limit(limit).all()
+
+def get_enabled_controllers_by_locations(db: Session, location_ids: List[int]):
+    controllers = defaultdict(list)
+    if location_ids:
+        rows = db.query(models.Controller).filter(
+            models.Controller.location_id.in_(location_ids), models.Controller.enabled.is_(True)
+        ).order_by(models.Controller.id)
+        for controller in rows:
+            controllers[controller.location_id].append(controller)
+    return controllers
+
 
 # Funções CRUD para Controllers
 def get_controller(db: Session, controller_id: int):
@@ -37,13 +92,64 @@ def get_controller(db: Session, controller_id: int):
         joinedload(models.Controller.sensor_associations).joinedload(models.SensorController.sensor)
     ).filter(models.Controller.id == controller_id).first()
 
+# Verificação de existência sem carregar o controlador nem seus sensores
+def controller_exists(db: Session, controller_id: int) -> bool:
+    return db.query(exists().where(models.Controller.id == controller_id)).scalar()
+
 def get_controller_by_key(db: Session, key: str):
     return db.query(models.Controller).filter(models.Controller.key == key).first()
 
-def get_controllers(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Controller).options(
-        joinedload(models.Controller.sensor_associations).joinedload(models.SensorController.sensor)
-    ).offset(skip).limit(limit).all()
+# Autenticação do controlador na ingestão: consulta o cache antes do banco (inclusive chaves inexistentes)
+def get_controller_auth_by_key(db: Session, key: str):
+    found, auth = controller_key_cache.get(key)
+    if found:
+        return auth
+
+    row = db.query(models.Controller.id, models.Controller.enabled).filter(models.Controller.key == key).first()
+    auth = ControllerAuth(id=row.id, enabled=row.enabled) if row else None
+    controller_key_cache.set(key, auth)
+    return auth
+
+# Autenticação pelo token do protocolo binário (ver app/core/binary_protocol.py)
+def get_controller_auth_by_token(db: Session, token: bytes):
+    return controller_token_index.lookup(
+        token,
+        lambda: db.query(models.Controller.key, models.Controller.id, models.Controller.enabled).all()
+    )
+
+# Listagem de controladores (GET /controllers/, com ou sem "fields"), em Core select: busca apenas as colunas
+# pedidas; os sensores, se solicitados, vêm numa segunda consulta (IN, como um selectinload, sem multiplicar as
+# linhas da paginação) e são montados em dicionários na ordem dos campos dos schemas
+def get_controllers_fields(db: Session, fields: List[str], skip: int = 0, limit: int = 100):
+    columns = [getattr(models.Controller, field) for field in fields if field != "sensors"]
+    if "sensors" not in fields:
+        rows = db.execute(select(*columns).order_by(models.Controller.id).offset(skip).limit(limit))
+        return [dict(row._mapping) for row in rows]
+
+    rows = db.execute(
+        select(models.Controller.id.label("_id"), *columns).order_by(models.Controller.id).offset(skip).limit(limit)
+    ).all()
+
+    sensors = defaultdict(list)
+    if rows:
+        sensor_rows = db.execute(
+            select(models.SensorController.controller_id, models.Sensor.name, models.Sensor.type, models.Sensor.id)
+            .join(models.Sensor, models.Sensor.id == models.SensorController.sensor_id)
+            .where(models.SensorController.controller_id.in_([row._id for row in rows]))
+            .order_by(models.SensorController.controller_id, models.Sensor.id)
+        )
+        for sensor in sensor_rows:
+            sensors[sensor.controller_id].append({"name": sensor.name, "type": sensor.type, "id": sensor.id})
+    return [
+        {field: sensors[row._id] if field == "sensors" else row._mapping[field] for field in fields}
+        for row in rows
+    ]
+
+def get_existing_controller_ids(db: Session, controller_ids: List[int]) -> List[int]:
+    return [row.id for row in db.query(models.Controller.id).filter(models.Controller.id.in_(controller_ids))]
+
+def get_controller_ids_by_location(db: Session, location_id: int):
+    return [row.id for row in db.query(models.Controller.id).filter(models.Controller.location_id == location_id)]
 
 def create_controller(db: Session, controller: schemas.ControllerCreate):
     api_key = secrets.token_urlsafe(32)
@@ -51,11 +157,19 @@ def create_controller(db: Session, controller: schemas.ControllerCreate):
     db.add(db_controller)
     db.commit()
     db.refresh(db_controller)
+    controller_key_cache.invalidate(db_controller.key)
+    controller_token_index.invalidate()
+    latest_readings.set_controller(db_controller.id, db_controller.location_id, db_controller.enabled)
+    location_index.set_controller(
+        db_controller.id, db_controller.location_id, db_controller.hw_desc, db_controller.version, db_controller.enabled
+    )
+    station_health.set_controller(db_controller.id, db_controller.location_id, db_controller.enabled)
     return db_controller
 
 def update_controller(db: Session, controller_id: int, controller_update: schemas.ControllerUpdate):
     db_controller = get_controller(db, controller_id)
     if db_controller:
+        previous_key = db_controller.key
         update_data = controller_update.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_controller, key, value)
@@ -63,6 +177,16 @@ def update_controller(db: Session, controller_id: int, controller_update: schema
         db.add(db_controller)
         db.commit()
         db.refresh(db_controller)
+        # Remove a chave antiga e a atual para que mudanças em "enabled" valham imediatamente
+        controller_key_cache.invalidate(previous_key)
+        controller_key_cache.invalidate(db_controller.key)
+        controller_token_index.invalidate()
+        latest_readings.set_controller(db_controller.id, db_controller.location_id, db_controller.enabled)
+        location_index.set_controller(
+            db_controller.id, db_controller.location_id, db_controller.hw_desc, db_controller.version, db_controller.enabled
+        )
+        station_health.set_controller(db_controller.id, db_controller.location_id, db_controller.enabled)
+        response_cache.invalidate(f"controller:{controller_id}")
     return db_controller
 
 
@@ -78,6 +202,7 @@ def create_sensor(db: Session, sensor: schemas.SensorCreate):
     db.add(db_sensor)
     db.commit()
     db.refresh(db_sensor)
+    response_cache.invalidate("sensors")
     return db_sensor
 
 def update_sensor(db: Session, sensor_id: int, sensor_update: schemas.SensorUpdate):
@@ -90,6 +215,8 @@ def update_sensor(db: Session, sensor_id: int, sensor_update: schemas.SensorUpda
         db.add(db_sensor)
         db.commit()
         db.refresh(db_sensor)
+        # Os controladores associados também exibem o sensor
+        response_cache.invalidate("sensors", f"sensor:{sensor_id}")
     return db_sensor
 
 def delete_sensor(db: Session, sensor_id: int):
@@ -99,25 +226,101 @@ def delete_sensor(db: Session, sensor_id: int):
         sensor_to_return = schemas.Sensor.model_validate(db_sensor)
         db.delete(db_sensor)
         db.commit()
+        response_cache.invalidate("sensors", f"sensor:{sensor_id}")
         return sensor_to_return
     
     return None
 
 
 # Funções CRUD para SensorMeteoSME
+# Reenvio de uma leitura já gravada (mesmo controller_id e time) devolve a leitura existente
 def create_sensor_meteo_sme_data(db: Session, data: schemas.SensorMeteoSMECreate, controller_id: int):
-    db_data = models.SensorMeteoSME(**data.model_dump(), controller_id=controller_id, time=datetime.now(timezone.utc))
-    db.add(db_data)
+    reading_time = as_utc(data.time).astimezone(timezone.utc) if data.time else datetime.now(timezone.utc)
+    row = {**data.model_dump(), "controller_id": controller_id, "time": reading_time}
+    create_sensor_meteo_sme_data_rows(db, [row])
+    return db.query(models.SensorMeteoSME).filter(
+        models.SensorMeteoSME.controller_id == controller_id,
+        models.SensorMeteoSME.time == reading_time
+    ).order_by(models.SensorMeteoSME.id).first()
+
+def create_sensor_meteo_sme_data_batch(db: Session, rows: List[dict], controller_id: int):
+    return create_sensor_meteo_sme_data_rows(db, [{**row, "controller_id": controller_id} for row in rows])
+
+# Um único INSERT multi-linha (executemany com insertmanyvalues) e um único commit para todas as linhas,
+# que podem ser de controladores diferentes (ex: fila de ingestão write-behind).
+# Reenvios são descartados antes do banco (repetidas no lote ou vistas recentemente) ou pelo ON CONFLICT
+# do índice único (controller_id, time);
+# retorna quantas leituras foram de fato gravadas.
+def create_sensor_meteo_sme_data_rows(db: Session, rows: List[dict]):
+    unique_rows = {}
+    for row in rows:
+        reading_time = as_utc(row["time"]).astimezone(timezone.utc)
+        key = (row["controller_id"], reading_time)
+        if key not in unique_rows and not recent_readings.contains(*key):
+            unique_rows[key] = {**row, "time": reading_time}
+    if not unique_rows:
+        return 0
+
+    table = models.SensorMeteoSME.__table__
+    inserted = db.execute(
+        rollups.insert_ignore(db, models.SensorMeteoSME).returning(table.c.id, table.c.controller_id, table.c.time),
+        list(unique_rows.values())
+    ).all()
+    stored = sorted(
+        (
+            {**unique_rows[(controller_id, as_utc(reading_time).astimezone(timezone.utc))], "id": row_id}
+            for row_id, controller_id, reading_time in inserted
+        ),
+        key=lambda reading: (reading["time"], reading["id"])
+    )
+    times = defaultdict(list)
+    newest = {}
+    for reading in stored:
+        times[reading["controller_id"]].append(reading["time"])
+        newest[reading["controller_id"]] = reading
+    for controller_id, controller_times in times.items():
+        rollups.mark_dirty(db, controller_id, controller_times)
     db.commit()
-    db.refresh(db_data)
-    return db_data
+    for controller_id, reading_time in unique_rows:
+        recent_readings.add(controller_id, reading_time)
+    for reading in newest.values():
+        latest_readings.record(reading)
+    station_health.record(stored)
+    live_hub.publish(stored)
+    return len(inserted)
+
+# Leitura mais recente de cada controlador (carga do snapshot de "condições atuais")
+def get_latest_sensor_meteo_sme_snapshot(db: Session):
+    controllers = db.query(models.Controller.id, models.Controller.location_id, models.Controller.enabled).all()
+    newer = aliased(models.SensorMeteoSME)
+    latest_id = db.query(newer.id).filter(
+        newer.controller_id == models.Controller.id
+    ).order_by(newer.time.desc(), newer.id.desc()).limit(1).correlate(models.Controller).scalar_subquery()
+    rows = db.query(models.SensorMeteoSME).join(
+        models.Controller, models.SensorMeteoSME.controller_id == models.Controller.id
+    ).filter(models.SensorMeteoSME.id == latest_id).all()
+    return controllers, [schemas.SensorMeteoSME.model_validate(row).model_dump() for row in rows]
+
+# Keyset: "after" é o par (time, id) da última linha da página anterior
+def _after_cursor(query, after: Optional[Tuple[datetime, int]]):
+    if after is None:
+        return query
+    after_time, after_id = after
+    return query.filter(
+        models.SensorMeteoSME.time <= after_time,
+        tuple_(models.SensorMeteoSME.time, models.SensorMeteoSME.id) < tuple_(after_time, after_id)
+    )
 
 def get_sensor_meteo_sme_data_by_controller(
-    db: Session, controller_id: int, skip: int = 0, limit: int = 100
+    db: Session, controller_id: int, skip: int = 0, limit: int = 100,
+    after: Optional[Tuple[datetime, int]] = None
 ):
-    return db.query(models.SensorMeteoSME).filter(
+    query = db.query(models.SensorMeteoSME).filter(
         models.SensorMeteoSME.controller_id == controller_id
-    ).order_by(models.SensorMeteoSME.time.desc()).offset(skip).limit(limit).all()
+    )
+    return _after_cursor(query, after).order_by(
+        models.SensorMeteoSME.time.desc(), models.SensorMeteoSME.id.desc()
+    ).offset(skip).limit(limit).all()
 
 def get_sensor_meteo_sme_data_by_controller_and_time_range(
     db: Session,
@@ -125,13 +328,100 @@ def get_sensor_meteo_sme_data_by_controller_and_time_range(
     start_time: datetime,
     end_time: datetime,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    after: Optional[Tuple[datetime, int]] = None
 ):
-    return db.query(models.SensorMeteoSME).filter(
+    query = db.query(models.SensorMeteoSME).filter(
         models.SensorMeteoSME.controller_id == controller_id,
         models.SensorMeteoSME.time >= start_time,
         models.SensorMeteoSME.time <= end_time
-    ).order_by(models.SensorMeteoSME.time.desc()).offset(skip).limit(limit).all()
+    )
+    return _after_cursor(query, after).order_by(
+        models.SensorMeteoSME.time.desc(), models.SensorMeteoSME.id.desc()
+    ).offset(skip).limit(limit).all()
+
+
+# Caminho rápido de leitura: tuplas simples via Core select(), na ordem dos campos de schemas.SensorMeteoSME,
+# sem instanciar objetos ORM nem schemas Pydantic (serializadas diretamente com orjson pelas rotas)
+def _reading_columns():
+    table = models.SensorMeteoSME.__table__
+    return [
+        cast(table.c.pressure, Float).label("pressure") if name == "pressure" else table.c[name]
+        for name in schemas.SensorMeteoSME.model_fields
+    ]
+
+def get_sensor_meteo_sme_rows_by_controller(
+    db: Session,
+    controller_id: int,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple[datetime, int]] = None
+):
+    query = select(*_reading_columns()).where(models.SensorMeteoSME.controller_id == controller_id)
+    if start_time and end_time:
+        query = query.where(models.SensorMeteoSME.time >= start_time, models.SensorMeteoSME.time <= end_time)
+    query = _after_cursor(query, after).order_by(
+        models.SensorMeteoSME.time.desc(), models.SensorMeteoSME.id.desc()
+    ).offset(skip).limit(limit)
+    return db.execute(query).all()
+
+# Colunas das leituras de um intervalo ({coluna: lista de valores}), para cálculos vetorizados;
+# limit limita quantas leituras são carregadas
+def get_sensor_meteo_sme_columns(
+    db: Session, controller_ids: List[int], start_time: datetime, end_time: datetime, columns: List[str],
+    limit: Optional[int] = None
+):
+    table = models.SensorMeteoSME.__table__
+    rows = db.execute(
+        select(*[table.c[column] for column in columns]).where(
+            table.c.controller_id.in_(controller_ids),
+            table.c.time >= start_time,
+            table.c.time < end_time
+        ).order_by(table.c.controller_id, table.c.time).limit(limit)
+    ).all()
+    values = list(zip(*rows)) if rows else [() for _ in columns]
+    return dict(zip(columns, values))
+
+# Agregação por intervalos de tempo (o agrupamento é feito no banco).
+# Retorna agregados parciais por bucket; o trecho alinhado e já reagregado vem do rollup mais grosso compatível e
+# o restante (início e fim não alinhados e buckets sujos) das leituras brutas.
+def get_sensor_meteo_sme_aggregates(
+    db: Session,
+    controller_ids: List[int],
+    start_time: datetime,
+    end_time: datetime,
+    bucket_seconds: int
+):
+    sources = []
+    rows = []
+    raw_ranges = [(start_time, end_time)]
+    rollup = None
+    if rollups.candidate_rollups(bucket_seconds):
+        first_dirty = rollups.first_dirty_bucket(db, controller_ids, start_time, end_time)
+        rollup, middle_start, middle_end = rollups.choose_rollup(start_time, end_time, bucket_seconds, first_dirty)
+    if rollup is not None:
+        bucket = rollups.time_bucket(db, rollup.bucket, bucket_seconds)
+        rows += db.query(*rollups.rollup_partial_columns(rollup, bucket)).filter(
+            rollup.controller_id.in_(controller_ids),
+            rollup.bucket >= middle_start,
+            rollup.bucket < middle_end
+        ).group_by(bucket).all()
+        sources.append(rollup.__tablename__)
+        # Cabeça (início não alinhado) e cauda (fim não alinhado ou buckets sujos) em uma única consulta
+        raw_ranges = [(start, end) for start, end in ((start_time, middle_start), (middle_end, end_time)) if start < end]
+
+    if raw_ranges:
+        raw = models.SensorMeteoSME
+        bucket = rollups.time_bucket(db, raw.time, bucket_seconds)
+        rows += db.query(*rollups.raw_partial_columns(bucket)).filter(
+            raw.controller_id.in_(controller_ids),
+            or_(*[and_(raw.time >= start, raw.time < end) for start, end in raw_ranges])
+        ).group_by(bucket).all()
+        sources.append(raw.__tablename__)
+
+    return sources, merge_partials_by_bucket(row._mapping for row in rows)
 
 
 # Função CRUD para SensorController
@@ -151,6 +441,7 @@ def associate_sensor_with_controller(db: Session, sensor_id: int, controller_id:
     db.add(db_sensor_controller)
     db.commit()
     db.refresh(db_sensor_controller)
+    response_cache.invalidate(f"controller:{controller_id}")
     return db_sensor_controller
 
 def get_sensor_controller_association(db: Session, sensor_id: int, controller_id: int):
@@ -177,5 +468,6 @@ def dissociate_sensor_from_controller(db: Session, sensor_id: int, controller_id
     if db_association:
         db.delete(db_association)
         db.commit()
+        response_cache.invalidate(f"controller:{controller_id}")
         return True
     return False
\ No newline at end of file
@@ -0,0 +1,62 @@
+# Versões assíncronas das funções de app/crud.py.
+# Cada função executa a implementação síncrona via AsyncSession.run_sync: as consultas rodam sobre o driver
+# assíncrono (asyncpg/aiosqlite) sem bloquear o event loop, e as regras de negócio ficam num único lugar.
+from functools import wraps
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import crud
+from app.core.response_cache import serialize
+
+def _run_sync(fn):
+    @wraps(fn)
+    async def wrapper(db: AsyncSession, *args, **kwargs):
+        return await db.run_sync(fn, *args, **kwargs)
+    return wrapper
+
+# Executa fn (função de app/crud.py) e serializa o resultado com o schema ainda dentro do run_sync: relacionamentos
+# lazy (ex: Controller.sensors) não podem ser carregados fora dele. Retorna o corpo JSON, ou None se fn retornar None
+async def run_serialized(db: AsyncSession, schema, fn, *args, **kwargs):
+    def run(session):
+        result = fn(session, *args, **kwargs)
+        return None if result is None else serialize(schema, result)
+    return await db.run_sync(run)
+
+# Locations
+get_location = _run_sync(crud.get_location)
+location_exists = _run_sync(crud.location_exists)
+get_locations = _run_sync(crud.get_locations)
+create_location = _run_sync(crud.create_location)
+update_location = _run_sync(crud.update_location)
+get_locations_in_box = _run_sync(crud.get_locations_in_box)
+get_enabled_controllers_by_locations = _run_sync(crud.get_enabled_controllers_by_locations)
+
+# Controllers
+get_controller = _run_sync(crud.get_controller)
+controller_exists = _run_sync(crud.controller_exists)
+get_controller_by_key = _run_sync(crud.get_controller_by_key)
+get_controller_auth_by_key = _run_sync(crud.get_controller_auth_by_key)
+get_controllers_fields = _run_sync(crud.get_controllers_fields)
+create_controller = _run_sync(crud.create_controller)
+update_controller = _run_sync(crud.update_controller)
+
+# Sensors
+get_sensor = _run_sync(crud.get_sensor)
+get_sensors = _run_sync(crud.get_sensors)
+create_sensor = _run_sync(crud.create_sensor)
+update_sensor = _run_sync(crud.update_sensor)
+delete_sensor = _run_sync(crud.delete_sensor)
+
+# SensorMeteoSME
+create_sensor_meteo_sme_data = _run_sync(crud.create_sensor_meteo_sme_data)
+create_sensor_meteo_sme_data_batch = _run_sync(crud.create_sensor_meteo_sme_data_batch)
+get_sensor_meteo_sme_data_by_controller = _run_sync(crud.get_sensor_meteo_sme_data_by_controller)
+get_sensor_meteo_sme_data_by_controller_and_time_range = _run_sync(
+    crud.get_sensor_meteo_sme_data_by_controller_and_time_range
+)
+get_sensor_meteo_sme_rows_by_controller = _run_sync(crud.get_sensor_meteo_sme_rows_by_controller)
+
+# SensorController
+associate_sensor_with_controller = _run_sync(crud.associate_sensor_with_controller)
+get_sensor_controller_association = _run_sync(crud.get_sensor_controller_association)
+get_controllers_for_sensor = _run_sync(crud.get_controllers_for_sensor)
+get_sensors_for_controller = _run_sync(crud.get_sensors_for_controller)
+dissociate_sensor_from_controller = _run_sync(crud.dissociate_sensor_from_controller)
@@ -1,10 +1,53 @@
 # Configura a conexão com o PostgreSQL e o ORM SQLAlchemy.
+import time
+import uuid
+from fastapi import Depends, Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
 from app.core.config import settings
+from app.core.pool_metrics import PoolStats, instrumented_pool_class, pool_monitor
+from app.core.replicas import READ_PRIMARY_COOKIE, ReplicaRouter
 
-engine = create_engine(settings.DATABASE_URL)
+# Opções de pool e de conexão conforme Settings (DB_POOL_*, DB_STATEMENT_TIMEOUT_MS, DB_PGBOUNCER_MODE)
+def engine_options(url: str, stats: PoolStats, is_async: bool = False) -> dict:
+    backend = make_url(url).get_backend_name()
+    driver = make_url(url).get_driver_name()
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    connect_args = {}
+
+    if settings.DB_PGBOUNCER_MODE:
+        # O PgBouncer já faz o pooling; em modo transaction não há prepared statements nem parâmetros de sessão
+        # (configure statement_timeout no role: ALTER ROLE ... SET statement_timeout)
+        options["poolclass"] = NullPool
+        if driver == "asyncpg":
+            connect_args["statement_cache_size"] = 0
+            connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+    elif backend != "sqlite":
+        base_pool = AsyncAdaptedQueuePool if is_async else QueuePool
+        options.update(
+            poolclass=instrumented_pool_class(base_pool, stats),
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+        if backend == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS > 0:
+            if driver == "asyncpg":
+                connect_args["server_settings"] = {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+            else:
+                connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+primary_pool_stats = PoolStats()
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL, primary_pool_stats))
+pool_monitor.register("primary", engine, primary_pool_stats)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -15,4 +58,87 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# Réplicas de leitura (DB_READ_REPLICA_URLS), cada uma com sua engine e pool
+def create_replica_session_factories():
+    factories = []
+    for index, url in enumerate(settings.DB_READ_REPLICA_URLS):
+        stats = PoolStats()
+        replica_engine = create_engine(url, **engine_options(url, stats))
+        pool_monitor.register(f"replica_{index}", replica_engine, stats)
+        factories.append((f"replica_{index}", sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)))
+    return factories
+
+replica_router = ReplicaRouter(
+    create_replica_session_factories(),
+    max_lag_seconds=settings.DB_REPLICA_MAX_LAG_SECONDS,
+)
+
+# Fábrica de sessões para rotas somente leitura: réplica em dia ou, na falta dela (ou logo após uma escrita
+# do mesmo cliente, ver cookie de read-your-writes), o primário
+def get_read_session_factory(request: Request):
+    if replica_router.enabled:
+        try:
+            read_primary_until = float(request.cookies.get(READ_PRIMARY_COOKIE, 0))
+        except ValueError:
+            read_primary_until = 0
+        if read_primary_until <= time.time():
+            replica = replica_router.choose()
+            if replica is not None:
+                return replica.session_factory
+        replica_router.record_primary_read()
+    return SessionLocal
+
+def get_read_db(session_factory=Depends(get_read_session_factory)):
+    db = session_factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Blocos de linhas de uma consulta lida em streaming (stream_results/yield_per) para respostas em streaming.
+# Abre a própria sessão: o gerador é consumido depois que o handler (e a dependência get_db) já retornou
+def iter_query_partitions(session_factory, query):
+    with session_factory() as db:
+        yield from db.execute(query).partitions()
+
+
+# Caminho assíncrono (asyncpg / aiosqlite), habilitado por DB_ASYNC_ENABLED
+def get_async_database_url() -> str:
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+
+    url = settings.DATABASE_URL
+    for sync_prefix, async_prefix in (
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("postgres://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
+async_engine = None
+if settings.DB_ASYNC_ENABLED:
+    async_pool_stats = PoolStats()
+    async_url = get_async_database_url()
+    async_engine = create_async_engine(async_url, **engine_options(async_url, async_pool_stats, is_async=True))
+    pool_monitor.register("async", async_engine, async_pool_stats)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Engines síncronas em uso (primário, réplicas e a engine assíncrona), para instrumentação
+def all_engines():
+    engines = [engine] + [replica.session_factory.kw["bind"] for replica in replica_router.replicas]
+    if async_engine is not None:
+        engines.append(async_engine.sync_engine)
+    return engines
@@ -0,0 +1,75 @@
+# Remoção de leituras duplicadas (mesmo controller_id e time) já gravadas, em blocos de IDs.
+# Mantém a leitura de menor id, marca os buckets afetados para reagregação e, ao final, troca o índice
+# (controller_id, time DESC) pela versão única usada pelo ON CONFLICT DO NOTHING da ingestão.
+from typing import Tuple
+from sqlalchemy import and_, func, select, text
+from sqlalchemy.orm import Session, aliased
+from app import models, rollups
+
+INDEX_NAME = "ix_sensors_meteo_sme_controller_id_time"
+
+def _duplicates_in_range(db: Session, first_id: int, last_id: int):
+    reading = models.SensorMeteoSME
+    original = aliased(models.SensorMeteoSME)
+    return db.execute(
+        select(reading.id, reading.controller_id, reading.time).where(
+            reading.id >= first_id,
+            reading.id <= last_id,
+            select(original.id).where(and_(
+                original.controller_id == reading.controller_id,
+                original.time == reading.time,
+                original.id < reading.id
+            )).exists()
+        )
+    ).all()
+
+# Percorre a tabela em faixas de chunk_size IDs, com um commit por faixa; retorna (removidas, faixas)
+def dedupe_readings(session_factory, chunk_size: int, progress=None) -> Tuple[int, int]:
+    with session_factory() as db:
+        min_id, max_id = db.query(func.min(models.SensorMeteoSME.id), func.max(models.SensorMeteoSME.id)).one()
+    if min_id is None:
+        return 0, 0
+
+    removed = 0
+    chunks = 0
+    for first_id in range(min_id, max_id + 1, chunk_size):
+        last_id = min(first_id + chunk_size - 1, max_id)
+        with session_factory() as db:
+            duplicates = _duplicates_in_range(db, first_id, last_id)
+            if duplicates:
+                db.query(models.SensorMeteoSME).filter(
+                    models.SensorMeteoSME.id.in_([row.id for row in duplicates])
+                ).delete(synchronize_session=False)
+                times = {}
+                for row in duplicates:
+                    times.setdefault(row.controller_id, []).append(row.time)
+                for controller_id, controller_times in times.items():
+                    rollups.mark_dirty(db, controller_id, controller_times)
+                db.commit()
+        removed += len(duplicates)
+        chunks += 1
+        if progress is not None:
+            progress(first_id, last_id, len(duplicates))
+    return removed, chunks
+
+def has_unique_index(db: Session) -> bool:
+    if db.get_bind().dialect.name == "postgresql":
+        return bool(db.execute(text(
+            "SELECT indisunique FROM pg_index WHERE indexrelid = to_regclass(:name)"
+        ), {"name": INDEX_NAME}).scalar())
+    if db.get_bind().dialect.name == "sqlite":
+        return any(
+            row[1] == INDEX_NAME and row[2]
+            for row in db.execute(text(f'PRAGMA index_list("{models.SensorMeteoSME.__tablename__}")'))
+        )
+    return False
+
+# Recria o índice (controller_id, time DESC) como único; falha se ainda houver duplicatas
+def ensure_unique_index(db: Session) -> bool:
+    if has_unique_index(db):
+        return False
+    table = models.SensorMeteoSME.__tablename__
+    db.execute(text(f'DROP INDEX IF EXISTS "{INDEX_NAME}"'))
+    db.execute(text(f'CREATE UNIQUE INDEX "{INDEX_NAME}" ON "{table}" (controller_id, time DESC)'))
+    db.commit()
+    return True
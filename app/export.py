@@ -0,0 +1,128 @@
+# Exportação em streaming das leituras SME (CSV, NDJSON ou Parquet).
+# As linhas são lidas com cursor do lado do servidor (stream_results/yield_per) como tuplas simples,
+# sem instanciar objetos ORM nem schemas Pydantic, e escritas em blocos; a memória não cresce com o intervalo.
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Iterator, Optional
+from sqlalchemy import select
+from app import models
+from app.database import iter_query_partitions
+
+EXPORT_COLUMNS = (
+    "id", "controller_id", "time", "temperature", "humidity",
+    "dir_wind", "vel_wind", "pressure", "rain_measure",
+)
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def iter_reading_chunks(
+    session_factory,
+    controller_id: int,
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+    chunk_size: int
+):
+    table = models.SensorMeteoSME.__table__
+    query = select(*[table.c[name] for name in EXPORT_COLUMNS]).where(table.c.controller_id == controller_id)
+    if start_time is not None:
+        query = query.where(table.c.time >= start_time)
+    if end_time is not None:
+        query = query.where(table.c.time <= end_time)
+    query = query.order_by(table.c.time, table.c.id).execution_options(stream_results=True, yield_per=chunk_size)
+    return iter_query_partitions(session_factory, query)
+
+def _iter_csv(chunks) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for chunk in chunks:
+        writer.writerows((*row[:2], row[2].isoformat(), *row[3:]) for row in chunk)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+def _iter_ndjson(chunks) -> Iterator[bytes]:
+    for chunk in chunks:
+        lines = []
+        for row in chunk:
+            record = dict(zip(EXPORT_COLUMNS, row))
+            record["time"] = record["time"].isoformat()
+            lines.append(json.dumps(record, separators=(",", ":")))
+        yield ("\n".join(lines) + "\n").encode()
+
+# Destino de escrita para o ParquetWriter que entrega os bytes já escritos a cada row group
+class _ChunkSink(io.RawIOBase):
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def _iter_parquet(chunks) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("controller_id", pa.int64()),
+        ("time", pa.timestamp("us", tz="UTC")),
+        ("temperature", pa.float64()),
+        ("humidity", pa.float64()),
+        ("dir_wind", pa.int64()),
+        ("vel_wind", pa.float64()),
+        ("pressure", pa.float64()),
+        ("rain_measure", pa.float64()),
+    ])
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for chunk in chunks:
+            columns = list(zip(*chunk)) if chunk else [[] for _ in EXPORT_COLUMNS]
+            writer.write_batch(pa.record_batch(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema
+            ))
+            yield sink.drain()
+    yield sink.drain()
+
+def _gzip(stream: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)
+    for data in stream:
+        compressed = compressor.compress(data)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def stream_export(chunks, export_format: str, gzip: bool = False) -> Iterator[bytes]:
+    writers = {"csv": _iter_csv, "ndjson": _iter_ndjson, "parquet": _iter_parquet}
+    stream = writers[export_format](chunks)
+    return _gzip(stream) if gzip else stream
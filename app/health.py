@@ -0,0 +1,51 @@
+# Verificações de saúde: /healthz indica apenas que o processo responde; /readyz verifica se o banco
+# primário aceita consultas e se o esquema está na última migração (python -m app.cli migrate).
+import asyncio
+import logging
+import time
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from app import schema
+
+logger = logging.getLogger(__name__)
+
+def check_database(engine: Engine, check_schema: bool = True) -> dict:
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        if not check_schema:
+            return {"database": "ok"}
+        revision = schema.current_revision(connection)
+    head = schema.head_revision()
+    return {"database": "ok", "schema_revision": revision, "schema_head": head, "schema_ok": revision == head}
+
+# Estado de prontidão com limite de tempo; nunca propaga a falha do banco
+async def readiness(engine: Engine, timeout_seconds: float, check_schema: bool = True) -> dict:
+    try:
+        return await asyncio.wait_for(
+            asyncio.to_thread(check_database, engine, check_schema), timeout=timeout_seconds
+        )
+    except asyncio.TimeoutError:
+        return {"database": f"sem resposta em {timeout_seconds:g}s", "schema_ok": False}
+    except Exception as exc:
+        return {"database": f"indisponível: {type(exc).__name__}", "schema_ok": False}
+
+# Espera o banco na inicialização por até timeout_seconds (nova tentativa a cada interval_seconds); a primeira
+# conexão também aquece o pool. Retorna o último estado: a aplicação sobe mesmo sem banco e o /readyz
+# continua verificando (inclusive a revisão do esquema, que não é checada aqui)
+async def wait_for_database(engine: Engine, timeout_seconds: float, interval_seconds: float = 0.5) -> dict:
+    deadline = time.monotonic() + timeout_seconds
+    while True:
+        remaining = deadline - time.monotonic()
+        status = await readiness(engine, max(remaining, 0.1), check_schema=False)
+        if status["database"] == "ok" or time.monotonic() + interval_seconds >= deadline:
+            return status
+        await asyncio.sleep(interval_seconds)
+
+def log_startup(status: dict, elapsed_seconds: float):
+    if status["database"] != "ok":
+        logger.warning("Banco indisponível na inicialização (%s); /readyz responderá 503", status["database"])
+    logger.info("Inicialização concluída em %.0f ms", elapsed_seconds * 1000)
+
+def is_ready(status: Optional[dict]) -> bool:
+    return bool(status) and status.get("database") == "ok" and status.get("schema_ok", False)
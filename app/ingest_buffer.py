@@ -0,0 +1,131 @@
+# Ingestão write-behind de POST /data/ (INGEST_WRITE_BEHIND_ENABLED).
+# As leituras validadas entram numa fila limitada em memória e uma tarefa de fundo as grava a cada
+# INGEST_FLUSH_INTERVAL_MS ou INGEST_FLUSH_MAX_ROWS linhas, num único INSERT multi-linha e um único commit.
+# Leituras aceitas (202) e ainda não gravadas ficam apenas em memória: são perdidas se o processo cair.
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import List, Optional
+from starlette.concurrency import run_in_threadpool
+from app import crud
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class IngestBuffer:
+    def __init__(self, capacity: int, flush_max_rows: int):
+        self.capacity = capacity
+        self.flush_max_rows = flush_max_rows
+        self._rows = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.enqueued = 0
+        self.rejected = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.flushed_rows = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    @property
+    def depth(self) -> int:
+        return len(self._rows)
+
+    # Enfileira uma leitura; retorna False se a fila estiver cheia (backpressure)
+    def put(self, row: dict) -> bool:
+        with self._lock:
+            if len(self._rows) >= self.capacity:
+                self.rejected += 1
+                return False
+            self._rows.append(row)
+            self.enqueued += 1
+            full_batch = len(self._rows) >= self.flush_max_rows
+        if full_batch and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return True
+
+    def _drain(self) -> List[dict]:
+        with self._lock:
+            return [self._rows.popleft() for _ in range(min(self.flush_max_rows, len(self._rows)))]
+
+    def _requeue(self, rows: List[dict]):
+        with self._lock:
+            self._rows.extendleft(reversed(rows))
+
+    # Grava um lote da fila; em caso de erro as linhas voltam para o início da fila
+    def flush(self, session_factory) -> int:
+        with self._flush_lock:
+            rows = self._drain()
+            if not rows:
+                return 0
+            started = time.perf_counter()
+            try:
+                with session_factory() as db:
+                    crud.create_sensor_meteo_sme_data_rows(db, rows)
+            except Exception:
+                self._requeue(rows)
+                with self._lock:
+                    self.failed_flushes += 1
+                raise
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self.flushes += 1
+                self.flushed_rows += len(rows)
+                self.last_flush_ms = round(elapsed_ms, 3)
+                self.max_flush_ms = max(self.max_flush_ms, self.last_flush_ms)
+                self._total_flush_ms += elapsed_ms
+            return len(rows)
+
+    def flush_all(self, session_factory) -> int:
+        total = 0
+        while self.depth:
+            total += self.flush(session_factory)
+        return total
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": settings.INGEST_WRITE_BEHIND_ENABLED,
+                "depth": len(self._rows),
+                "capacity": self.capacity,
+                "enqueued": self.enqueued,
+                "rejected": self.rejected,
+                "flushes": self.flushes,
+                "failed_flushes": self.failed_flushes,
+                "flushed_rows": self.flushed_rows,
+                "last_flush_ms": self.last_flush_ms,
+                "max_flush_ms": self.max_flush_ms,
+                "avg_flush_ms": round(self._total_flush_ms / self.flushes, 3) if self.flushes else 0.0,
+            }
+
+    # Tarefa de fundo iniciada no lifespan; no desligamento grava o que ainda estiver na fila
+    async def run_flusher(self, session_factory, interval_seconds: float):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                try:
+                    while await run_in_threadpool(self.flush, session_factory) == self.flush_max_rows:
+                        pass
+                except Exception:
+                    logger.exception("Falha ao gravar a fila de ingestão (%s leituras pendentes)", self.depth)
+        finally:
+            self._loop = None
+            flushed = await run_in_threadpool(self.flush_all, session_factory)
+            if flushed:
+                logger.info("Fila de ingestão: %s leituras gravadas no desligamento", flushed)
+
+ingest_buffer = IngestBuffer(
+    capacity=settings.INGEST_BUFFER_CAPACITY,
+    flush_max_rows=settings.INGEST_FLUSH_MAX_ROWS,
+)
@@ -0,0 +1,64 @@
+# Assinatura de leituras em tempo real (GET /data/stream via SSE e /data/ws via WebSocket).
+# Na conexão o cliente recebe as últimas leituras guardadas de cada controlador (ou a do snapshot de
+# condições atuais) e depois as novas leituras publicadas no live_hub; nenhuma das etapas consulta o banco.
+import asyncio
+from typing import AsyncIterator, List, Optional, Tuple
+from app import schemas
+from app.core import fast_json
+from app.core.config import settings
+from app.core.latest_snapshot import latest_readings
+from app.core.live_hub import live_hub
+
+READING_FIELDS = list(schemas.SensorMeteoSME.model_fields)
+
+def _public(reading: dict) -> dict:
+    return {field: reading[field] for field in READING_FIELDS}
+
+# Replay em ordem de tempo, apenas leituras com id maior que after_id (reconexão com Last-Event-ID)
+def replay_readings(controller_ids: List[int], after_id: int = 0) -> List[dict]:
+    recent = live_hub.recent(frozenset(controller_ids))
+    _, snapshot = latest_readings.latest()
+    snapshot = {reading["controller_id"]: reading for reading in snapshot}
+    readings = []
+    for controller_id in controller_ids:
+        items = recent.get(controller_id) or ([snapshot[controller_id]] if controller_id in snapshot else [])
+        readings += [_public(reading) for reading in items if reading["id"] > after_id]
+    return sorted(readings, key=lambda reading: (reading["time"], reading["id"]))
+
+# Eventos ("reading", leitura), ("ping", None) a cada LIVE_HEARTBEAT_SECONDS sem leituras e ("dropped", None)
+# quando o cliente é descartado por não acompanhar o ritmo (fim da assinatura)
+async def iter_live_events(controller_ids: List[int], after_id: int = 0) -> AsyncIterator[Tuple[str, Optional[dict]]]:
+    subscription = live_hub.subscribe(frozenset(controller_ids))
+    if subscription is None:
+        yield "dropped", None
+        return
+    try:
+        # Leituras publicadas entre a assinatura e o replay podem chegar duas vezes: descarta pelo id
+        last_ids = {}
+        for reading in replay_readings(controller_ids, after_id):
+            last_ids[reading["controller_id"]] = reading["id"]
+            yield "reading", reading
+        while True:
+            try:
+                reading = await subscription.get(timeout=settings.LIVE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield "ping", None
+                continue
+            if reading is None:
+                yield "dropped", None
+                return
+            if reading["id"] <= last_ids.get(reading["controller_id"], after_id):
+                continue
+            yield "reading", _public(reading)
+    finally:
+        live_hub.unsubscribe(subscription)
+
+async def sse_stream(controller_ids: List[int], after_id: int = 0) -> AsyncIterator[bytes]:
+    yield b"retry: 5000\n\n"
+    async for event, reading in iter_live_events(controller_ids, after_id):
+        if event == "reading":
+            yield b"id: %d\nevent: reading\ndata: %s\n\n" % (reading["id"], fast_json.dumps(reading))
+        elif event == "ping":
+            yield b": ping\n\n"
+        else:
+            yield b"event: dropped\ndata: {}\n\n"
@@ -1,21 +1,124 @@
 # O ponto de entrada da aplicação
-from fastapi import FastAPI
-from app.database import Base, engine
-from app.routers import data_router, locations_router, controllers_router, sensors_router
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from app import health, partitions, rollups, station_checks
+from app.ingest_buffer import ingest_buffer
+from app.core import instrumentation, replicas
+from app.core.config import settings
+from app.core.replicas import READ_PRIMARY_COOKIE
+from app.database import SessionLocal, all_engines, engine, replica_router
+from app.routers import (
+    data_router, data_router_async, locations_router, locations_router_async, controllers_router,
+    controllers_router_async, sensors_router, sensors_router_async, system_router
+)
+
+# O esquema é criado/atualizado pelas migrações (python -m app.cli migrate), não na importação: a importação
+# não abre conexões. Na inicialização o banco é verificado com tempo limitado (DB_STARTUP_TIMEOUT_SECONDS) e
+# as tarefas de fundo são iniciadas; no desligamento são canceladas
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    if settings.DB_STARTUP_TIMEOUT_SECONDS > 0:
+        status = await health.wait_for_database(engine, settings.DB_STARTUP_TIMEOUT_SECONDS)
+        health.log_startup(status, time.perf_counter() - started)
+    app.state.startup_ms = round((time.perf_counter() - started) * 1000, 1)
 
-Base.metadata.create_all(bind=engine)
+    # Tarefas de fundo, canceladas no desligamento. Cada worker roda o próprio lifespan, com as próprias tarefas
+    # e o próprio estado em memória: com vários workers o snapshot das últimas leituras e o índice espacial só
+    # veem as gravações do processo (LATEST_SNAPSHOT_RELOAD_SECONDS e SPATIAL_INDEX_RELOAD_SECONDS > 0 os
+    # recarregam periodicamente)
+    tasks = []
+    if replica_router.enabled:
+        tasks.append(asyncio.create_task(
+            replicas.run_lag_checks(replica_router, settings.DB_REPLICA_LAG_CHECK_INTERVAL_SECONDS)
+        ))
+    if settings.ROLLUPS_ENABLED and settings.ROLLUP_REFRESH_INTERVAL_SECONDS > 0:
+        tasks.append(asyncio.create_task(
+            rollups.run_refresher(SessionLocal, settings.ROLLUP_REFRESH_INTERVAL_SECONDS)
+        ))
+    if settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS > 0:
+        tasks.append(asyncio.create_task(
+            partitions.run_maintenance(SessionLocal, settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS)
+        ))
+    if settings.INGEST_WRITE_BEHIND_ENABLED:
+        tasks.append(asyncio.create_task(
+            ingest_buffer.run_flusher(SessionLocal, settings.INGEST_FLUSH_INTERVAL_MS / 1000)
+        ))
+    if settings.STATION_HEALTH_ENABLED and settings.STATION_HEALTH_CHECK_INTERVAL_SECONDS > 0:
+        tasks.append(asyncio.create_task(
+            station_checks.run_scheduler(SessionLocal, settings.STATION_HEALTH_CHECK_INTERVAL_SECONDS)
+        ))
+    yield
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
 
 app = FastAPI(
     title="API de Estações Meteorológicas (MVP)",
     description="Backend para cadastrar locais, controladores e receber dados de estações meteorológicas.",
     version="0.1.0",
+    lifespan=lifespan,
 )
+# Rotas declaradas direto na aplicação (/, /readyz, /metrics); os routers declaram a mesma route_class
+app.router.route_class = instrumentation.InstrumentedRoute
+
+# Substitui, na mesma posição, as rotas com o mesmo caminho e método pelas do router informado
+def replace_routes(app: FastAPI, router):
+    overrides = {(route.path, frozenset(route.methods)): route for route in router.routes}
+    app.router.routes = [
+        overrides.get((getattr(route, "path", None), frozenset(getattr(route, "methods", None) or ())), route)
+        for route in app.router.routes
+    ]
+
+# Read-your-writes: após uma escrita bem-sucedida, o mesmo cliente lê do primário por
+# DB_READ_YOUR_WRITES_SECONDS (tempo para as réplicas aplicarem a alteração)
+if replica_router.enabled and settings.DB_READ_YOUR_WRITES_SECONDS > 0:
+    @app.middleware("http")
+    async def read_your_writes(request: Request, call_next):
+        response = await call_next(request)
+        if request.method in ("POST", "PUT", "PATCH", "DELETE") and response.status_code < 400:
+            response.set_cookie(
+                READ_PRIMARY_COOKIE,
+                str(round(time.time() + settings.DB_READ_YOUR_WRITES_SECONDS, 3)),
+                max_age=int(settings.DB_READ_YOUR_WRITES_SECONDS) + 1,
+                httponly=True,
+                samesite="lax",
+            )
+        return response
 
 app.include_router(locations_router.router)
 app.include_router(controllers_router.router)
 app.include_router(data_router.router)
 app.include_router(sensors_router.router)
+app.include_router(system_router.router)
+
+# Com a camada assíncrona habilitada, as rotas de locais, controladores, sensores e de ingestão/leitura de dados
+# usam AsyncSession; agregados, séries, exportação, ingestão binária e stream continuam no threadpool
+if settings.DB_ASYNC_ENABLED:
+    replace_routes(app, locations_router_async.router)
+    replace_routes(app, controllers_router_async.router)
+    replace_routes(app, data_router_async.router)
+    replace_routes(app, sensors_router_async.router)
 
 @app.get("/")
 def read_root():
-    return {"message": "Bem-vindo à API de Estações Meteorológicas!"}
\ No newline at end of file
+    return {"message": "Bem-vindo à API de Estações Meteorológicas!"}
+
+# Liveness: o processo responde (não consulta o banco)
+@app.get("/healthz", tags=["Sistema"])
+def read_health():
+    return {"status": "ok"}
+
+# Readiness: banco primário acessível e esquema na última migração; 503 caso contrário
+@app.get("/readyz", tags=["Sistema"])
+async def read_readiness(request: Request):
+    status = await health.readiness(engine, settings.DB_READY_TIMEOUT_SECONDS)
+    status["startup_ms"] = getattr(request.app.state, "startup_ms", None)
+    return JSONResponse(status, status_code=200 if health.is_ready(status) else 503)
+
+# Instrumentação opcional: eventos das engines (inclusive das réplicas), /metrics e o middleware
+if settings.INSTRUMENTATION_ENABLED:
+    instrumentation.install(app, all_engines())
\ No newline at end of file
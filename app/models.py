@@ -1,6 +1,6 @@
 # app/models.py
-from sqlalchemy import Column, Integer, Float, Boolean, ForeignKey, DateTime, Text, Double
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, Float, Boolean, ForeignKey, DateTime, Text, Double, Index, func
+from sqlalchemy.orm import declared_attr, relationship
 from sqlalchemy.ext.hybrid import hybrid_property
 from app.database import Base
 from datetime import datetime, timedelta, timezone
@@ -15,12 +15,19 @@ class Location(Base):
     controllers = relationship("Controller", back_populates="location")
     persons = relationship("PersonLocation", back_populates="location")
 
+    # Consultas espaciais sem o índice em memória: GiST sobre point(lng, lat) no PostgreSQL (operador <@ box)
+    # e (lat, lng) no SQLite
+    __table_args__ = (
+        Index("ix_locations_point", func.point(lng, lat), postgresql_using="gist").ddl_if(dialect="postgresql"),
+        Index("ix_locations_lat_lng", lat, lng).ddl_if(dialect="sqlite"),
+    )
+
 class Controller(Base):
     __tablename__ = "controllers"
     id = Column(Integer, primary_key=True, index=True)
     location_id = Column(Integer, ForeignKey("locations.id"), nullable=False, index=True)
     hw_desc = Column(Text, nullable=False)
-    key = Column(Text, unique=True, nullable=False)
+    key = Column(Text, unique=True, index=True, nullable=False)
     enabled = Column(Boolean, nullable=False, default=True)
     version = Column(Float, nullable=True)
 
@@ -32,10 +39,14 @@ class Controller(Base):
     def sensors(self):
         return [assoc.sensor for assoc in self.sensor_associations]
 
+# No PostgreSQL a tabela é particionada por mês em time (ver db_controller.sql e app/partitions.py), e a chave
+# primária do banco é (id, time). O mapeamento usa só id: ele continua único (vem da sequência) e identifica a
+# leitura na sessão. Declarar time como parte da chave faria o create_all do SQLite (testes) gerar uma chave
+# composta, sem o autoincremento de id
 class SensorMeteoSME(Base):
     __tablename__ = "sensors_meteo_sme"
     id = Column(Integer, primary_key=True, index=True)
-    controller_id = Column(Integer, ForeignKey("controllers.id"), nullable=False, index=True)
+    controller_id = Column(Integer, ForeignKey("controllers.id"), nullable=False)
     temperature = Column(Float, nullable=True) 
     humidity = Column(Float, nullable=True)    
     dir_wind = Column(Integer, nullable=True)  
@@ -46,6 +57,58 @@ class SensorMeteoSME(Base):
 
     controller = relationship("Controller", back_populates="sensors_meteo_sme_data")
 
+    # Atende filtro por controlador + ordenação por tempo (também cobre consultas só por controller_id).
+    # Único: um reenvio da mesma leitura (mesmo controlador e horário) é ignorado na ingestão
+    __table_args__ = (
+        Index("ix_sensors_meteo_sme_controller_id_time", controller_id, time.desc(), unique=True),
+    )
+
+# Rollups pré-agregados de SensorMeteoSME (1 minuto, 1 hora e 1 dia).
+# Guardam soma e contagem por métrica (média = soma / contagem) para poderem ser recombinados em buckets maiores.
+class SensorMeteoSMERollupMixin:
+    @declared_attr
+    def controller_id(cls):
+        return Column(Integer, ForeignKey("controllers.id"), primary_key=True)
+
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    temperature_min = Column(Float, nullable=True)
+    temperature_max = Column(Float, nullable=True)
+    temperature_sum = Column(Float, nullable=True)
+    temperature_count = Column(Integer, nullable=False, default=0)
+    humidity_min = Column(Float, nullable=True)
+    humidity_max = Column(Float, nullable=True)
+    humidity_sum = Column(Float, nullable=True)
+    humidity_count = Column(Integer, nullable=False, default=0)
+    pressure_min = Column(Float, nullable=True)
+    pressure_max = Column(Float, nullable=True)
+    pressure_sum = Column(Float, nullable=True)
+    pressure_count = Column(Integer, nullable=False, default=0)
+    vel_wind_min = Column(Float, nullable=True)
+    vel_wind_max = Column(Float, nullable=True)
+    vel_wind_sum = Column(Float, nullable=True)
+    vel_wind_count = Column(Integer, nullable=False, default=0)
+    rain_measure_sum = Column(Float, nullable=True)
+    rain_measure_count = Column(Integer, nullable=False, default=0)
+    dir_wind_sin_sum = Column(Float, nullable=True)
+    dir_wind_cos_sum = Column(Float, nullable=True)
+    dir_wind_count = Column(Integer, nullable=False, default=0)
+
+class SensorMeteoSMERollup1m(SensorMeteoSMERollupMixin, Base):
+    __tablename__ = "sensors_meteo_sme_rollup_1m"
+
+class SensorMeteoSMERollup1h(SensorMeteoSMERollupMixin, Base):
+    __tablename__ = "sensors_meteo_sme_rollup_1h"
+
+class SensorMeteoSMERollup1d(SensorMeteoSMERollupMixin, Base):
+    __tablename__ = "sensors_meteo_sme_rollup_1d"
+
+# Buckets de 1 minuto que receberam leituras e ainda não foram reagregados
+class SensorMeteoSMERollupDirty(Base):
+    __tablename__ = "sensors_meteo_sme_rollup_dirty"
+    controller_id = Column(Integer, ForeignKey("controllers.id"), primary_key=True)
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+
 class Profile(Base):
     __tablename__ = "profiles"
     id = Column(Integer, primary_key=True, index=True)
@@ -116,7 +179,7 @@ class Sensor(Base):
 class SensorController(Base):
     __tablename__ = "sensors_controllers"
     sensor_id = Column(Integer, ForeignKey("sensors.id"), primary_key=True)
-    controller_id = Column(Integer, ForeignKey("controllers.id"), primary_key=True)
+    controller_id = Column(Integer, ForeignKey("controllers.id"), primary_key=True, index=True)
 
     sensor = relationship("Sensor", back_populates="controller_associations")
     controller = relationship("Controller", back_populates="sensor_associations")
\ No newline at end of file
@@ -0,0 +1,166 @@
+# Particionamento mensal (RANGE em time) de sensors_meteo_sme no PostgreSQL e política de retenção.
+# A tabela particionada é criada por db_controller.sql; aqui são criadas as partições dos próximos meses e
+# removidas (ou arquivadas) as partições antigas cujos dados já foram consolidados nos rollups.
+import asyncio
+import logging
+import re
+from datetime import date, datetime, timezone
+from typing import List, Tuple
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app import models
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = models.SensorMeteoSME.__tablename__
+
+_PARTITION_RE = re.compile(rf"^{PARENT_TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+def is_partitioned(db: Session) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    relkind = db.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {"name": PARENT_TABLE}
+    ).scalar()
+    return relkind == "p"
+
+def list_partitions(db: Session) -> List[Tuple[str, date]]:
+    rows = db.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :name"
+    ), {"name": PARENT_TABLE}).scalars()
+    partitions = []
+    for name in rows:
+        match = _PARTITION_RE.match(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda item: item[1])
+
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+
+def _month_bounds(month: date) -> Tuple[str, str]:
+    return f"{month.isoformat()} 00:00:00+00", f"{add_months(month, 1).isoformat()} 00:00:00+00"
+
+def _default_has_rows(db: Session, month: date) -> bool:
+    if db.execute(text("SELECT to_regclass(:name)"), {"name": DEFAULT_PARTITION}).scalar() is None:
+        return False
+    start, end = _month_bounds(month)
+    return db.execute(text(
+        f'SELECT 1 FROM "{DEFAULT_PARTITION}" WHERE time >= :start AND time < :end LIMIT 1'
+    ), {"start": start, "end": end}).first() is not None
+
+def _is_partition(db: Session, name: str) -> bool:
+    return bool(db.execute(
+        text("SELECT relispartition FROM pg_class WHERE oid = to_regclass(:name)"), {"name": f'"{name}"'}
+    ).scalar())
+
+# Cria a partição de um mês. Se a partição DEFAULT já tiver leituras do mês (manutenção desligada ou leituras
+# anteriores à primeira execução), o CREATE ... PARTITION OF falharia: a tabela do mês é criada avulsa, recebe
+# as leituras da DEFAULT e só então é anexada
+def create_partition(db: Session, month: date):
+    name = partition_name(month)
+    start, end = _month_bounds(month)
+    bounds = f"FOR VALUES FROM ('{start}') TO ('{end}')"
+    if not _default_has_rows(db, month):
+        db.execute(text(f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{PARENT_TABLE}" {bounds}'))
+        return
+
+    # Bloqueia escritas na DEFAULT até o ATTACH (uma leitura do mês gravada no meio faria o ATTACH falhar)
+    db.execute(text(f'LOCK TABLE "{DEFAULT_PARTITION}" IN EXCLUSIVE MODE'))
+    where = "time >= :start AND time < :end"
+    db.execute(text(f'CREATE TABLE "{name}" (LIKE "{PARENT_TABLE}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+    moved = db.execute(text(
+        f'INSERT INTO "{name}" SELECT * FROM "{DEFAULT_PARTITION}" WHERE {where}'
+    ), {"start": start, "end": end}).rowcount
+    db.execute(text(f'DELETE FROM "{DEFAULT_PARTITION}" WHERE {where}'), {"start": start, "end": end})
+    db.execute(text(f'ALTER TABLE "{PARENT_TABLE}" ATTACH PARTITION "{name}" {bounds}'))
+    logger.info("Partição %s criada com %s leituras movidas de %s", name, moved, DEFAULT_PARTITION)
+
+# Cria a partição do mês atual e dos próximos PARTITION_MONTHS_AHEAD meses, cada uma em sua própria transação:
+# a falha de um mês é registrada e não impede os demais
+def ensure_partitions(db: Session, today: date = None) -> List[str]:
+    current = (today or datetime.now(timezone.utc).date()).replace(day=1)
+    existing = {name for name, _ in list_partitions(db)}
+    created = []
+    for offset in range(settings.PARTITION_MONTHS_AHEAD + 1):
+        month = add_months(current, offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        try:
+            create_partition(db, month)
+            db.commit()
+        except SQLAlchemyError:
+            db.rollback()
+            logger.exception("Falha ao criar a partição %s de %s", name, PARENT_TABLE)
+            continue
+        # O IF NOT EXISTS (outro processo criando a mesma partição) também ignora uma tabela comum com o mesmo nome
+        if not _is_partition(db, name):
+            logger.warning("Partição %s não criada: já existe uma tabela com esse nome fora de %s", name, PARENT_TABLE)
+            continue
+        created.append(name)
+    return created
+
+def _has_pending_rollups(db: Session, month: date) -> bool:
+    dirty_model = models.SensorMeteoSMERollupDirty
+    start = datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+    next_month = add_months(month, 1)
+    end = datetime(next_month.year, next_month.month, 1, tzinfo=timezone.utc)
+    return db.query(dirty_model.controller_id).filter(
+        dirty_model.bucket >= start, dirty_model.bucket < end
+    ).first() is not None
+
+# Remove (drop) ou arquiva (detach para o schema de arquivo) as partições mais antigas que RETENTION_MONTHS
+def apply_retention(db: Session, today: date = None) -> List[str]:
+    if settings.RETENTION_MONTHS <= 0:
+        return []
+    if not settings.ROLLUPS_ENABLED:
+        logger.warning("Retenção ignorada: os rollups estão desabilitados e os dados antigos seriam perdidos.")
+        return []
+
+    cutoff = add_months((today or datetime.now(timezone.utc).date()).replace(day=1), -settings.RETENTION_MONTHS)
+    removed = []
+    for name, month in list_partitions(db):
+        if month >= cutoff:
+            break
+        if _has_pending_rollups(db, month):
+            logger.info("Partição %s mantida: ainda há buckets pendentes de reagregação.", name)
+            continue
+        db.execute(text(f'ALTER TABLE "{PARENT_TABLE}" DETACH PARTITION "{name}"'))
+        if settings.RETENTION_MODE == "archive":
+            schema = settings.RETENTION_ARCHIVE_SCHEMA
+            db.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{schema}"'))
+            db.execute(text(f'ALTER TABLE "{name}" SET SCHEMA "{schema}"'))
+        else:
+            db.execute(text(f'DROP TABLE "{name}"'))
+        db.commit()
+        removed.append(name)
+    return removed
+
+def maintain_partitions(session_factory) -> Tuple[List[str], List[str]]:
+    with session_factory() as db:
+        if not is_partitioned(db):
+            return [], []
+        return ensure_partitions(db), apply_retention(db)
+
+async def run_maintenance(session_factory, interval_seconds: float):
+    while True:
+        try:
+            created, removed = await run_in_threadpool(maintain_partitions, session_factory)
+            if created or removed:
+                logger.info("Partições criadas: %s; removidas/arquivadas: %s", created, removed)
+        except Exception:
+            logger.exception("Falha na manutenção das partições de %s", PARENT_TABLE)
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,232 @@
+# Manutenção incremental dos rollups de SensorMeteoSME (1 minuto, 1 hora e 1 dia).
+# Cada inserção marca o bucket de 1 minuto como "sujo"; o refresher reagrega apenas os buckets sujos
+# (minuto a partir das leituras brutas, hora a partir dos minutos e dia a partir das horas).
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+from sqlalchemy import Integer, and_, cast, func, insert, literal_column, or_, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app import models
+from app.core.aggregation import PARTIAL_METRICS, as_utc
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# (segundos, modelo) do mais fino para o mais grosso
+ROLLUP_LEVELS = [
+    (60, models.SensorMeteoSMERollup1m),
+    (3600, models.SensorMeteoSMERollup1h),
+    (86400, models.SensorMeteoSMERollup1d),
+]
+
+# Origem dos buckets (mesma do date_bin): alinha buckets de hora/dia/semana em UTC
+BUCKET_ORIGIN = datetime(2000, 1, 1, tzinfo=timezone.utc)
+BUCKET_ORIGIN_EPOCH = int(BUCKET_ORIGIN.timestamp())
+
+# Bucket de tempo calculado no banco. Intervalo e origem entram como literais para que a expressão
+# do SELECT e do GROUP BY seja idêntica.
+def time_bucket(db: Session, column, bucket_seconds: int):
+    seconds = literal_column(str(int(bucket_seconds)))
+    if db.get_bind().dialect.name == "postgresql":
+        return func.date_bin(
+            literal_column(f"interval '{int(bucket_seconds)} seconds'"),
+            column,
+            literal_column("timestamptz '2000-01-01 00:00:00+00'")
+        )
+    # Demais bancos (ex: SQLite em desenvolvimento): arredonda o epoch para baixo a partir da mesma origem
+    origin = literal_column(str(BUCKET_ORIGIN_EPOCH))
+    elapsed = cast(func.strftime("%s", column), Integer) - origin
+    return func.datetime((elapsed // seconds) * seconds + origin, "unixepoch")
+
+def floor_time(value: datetime, seconds: int) -> datetime:
+    elapsed = int((as_utc(value) - BUCKET_ORIGIN).total_seconds())
+    return BUCKET_ORIGIN + timedelta(seconds=elapsed - elapsed % seconds)
+
+def ceil_time(value: datetime, seconds: int) -> datetime:
+    floored = floor_time(value, seconds)
+    return floored if floored == as_utc(value) else floored + timedelta(seconds=seconds)
+
+# INSERT que ignora linhas já existentes (ON CONFLICT DO NOTHING no PostgreSQL e no SQLite)
+def insert_ignore(db: Session, model):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return insert(model)
+    return dialect_insert(model).on_conflict_do_nothing()
+
+# Marca os buckets de 1 minuto das leituras inseridas (mesma transação da inserção)
+def mark_dirty(db: Session, controller_id: int, times: Iterable[datetime]):
+    if not settings.ROLLUPS_ENABLED:
+        return
+    buckets = {floor_time(value, ROLLUP_LEVELS[0][0]) for value in times}
+    if buckets:
+        db.execute(
+            insert_ignore(db, models.SensorMeteoSMERollupDirty),
+            [{"controller_id": controller_id, "bucket": bucket} for bucket in sorted(buckets)]
+        )
+
+# Marca todo o histórico como sujo (carga inicial dos rollups em uma base existente)
+def mark_history_dirty(db: Session, controller_id: Optional[int] = None, chunk_size: int = 10000) -> int:
+    bucket = time_bucket(db, models.SensorMeteoSME.time, ROLLUP_LEVELS[0][0])
+    query = select(models.SensorMeteoSME.controller_id, bucket.label("bucket")).distinct()
+    if controller_id is not None:
+        query = query.where(models.SensorMeteoSME.controller_id == controller_id)
+
+    total = 0
+    result = db.execute(query.execution_options(yield_per=chunk_size))
+    for partition in result.partitions():
+        rows = [{"controller_id": row.controller_id, "bucket": as_utc(row.bucket)} for row in partition]
+        db.execute(insert_ignore(db, models.SensorMeteoSMERollupDirty), rows)
+        total += len(rows)
+    db.commit()
+    return total
+
+def raw_partial_columns(bucket):
+    raw = models.SensorMeteoSME
+    columns = [bucket.label("bucket"), func.count().label("count")]
+    for metric in PARTIAL_METRICS:
+        column = getattr(raw, metric)
+        columns += [
+            func.min(column).label(f"{metric}_min"),
+            func.max(column).label(f"{metric}_max"),
+            func.sum(column).label(f"{metric}_sum"),
+            func.count(column).label(f"{metric}_count"),
+        ]
+    columns += [
+        func.sum(raw.rain_measure).label("rain_measure_sum"),
+        func.count(raw.rain_measure).label("rain_measure_count"),
+        func.sum(func.sin(func.radians(raw.dir_wind))).label("dir_wind_sin_sum"),
+        func.sum(func.cos(func.radians(raw.dir_wind))).label("dir_wind_cos_sum"),
+        func.count(raw.dir_wind).label("dir_wind_count"),
+    ]
+    return columns
+
+def rollup_partial_columns(source, bucket):
+    columns = [bucket.label("bucket"), func.sum(source.count).label("count")]
+    for metric in PARTIAL_METRICS:
+        columns += [
+            func.min(getattr(source, f"{metric}_min")).label(f"{metric}_min"),
+            func.max(getattr(source, f"{metric}_max")).label(f"{metric}_max"),
+            func.sum(getattr(source, f"{metric}_sum")).label(f"{metric}_sum"),
+            func.sum(getattr(source, f"{metric}_count")).label(f"{metric}_count"),
+        ]
+    for name in ("rain_measure_sum", "rain_measure_count", "dir_wind_sin_sum", "dir_wind_cos_sum", "dir_wind_count"):
+        columns.append(func.sum(getattr(source, name)).label(name))
+    return columns
+
+MAX_RANGES_PER_QUERY = 200
+
+# Agrupa buckets consecutivos em intervalos [início, fim) para filtrar a origem com poucas condições
+def _ranges(buckets: List[datetime], seconds: int):
+    ranges = []
+    step = timedelta(seconds=seconds)
+    for bucket in sorted(buckets):
+        if ranges and ranges[-1][1] == bucket:
+            ranges[-1][1] = bucket + step
+        else:
+            ranges.append([bucket, bucket + step])
+    return ranges
+
+def _rebuild(db: Session, controller_id: int, seconds: int, target, buckets: List[datetime], source):
+    source_time = models.SensorMeteoSME.time if source is None else source.bucket
+    source_controller = models.SensorMeteoSME.controller_id if source is None else source.controller_id
+    bucket = time_bucket(db, source_time, seconds)
+    columns = raw_partial_columns(bucket) if source is None else rollup_partial_columns(source, bucket)
+
+    # Intervalos alinhados à granularidade de destino (os buckets de origem ficam contidos neles), consultados
+    # em blocos para que buckets esparsos não gerem uma expressão OR grande demais
+    ranges = _ranges(buckets, seconds)
+    rows = []
+    for index in range(0, len(ranges), MAX_RANGES_PER_QUERY):
+        rows += db.query(*columns).filter(
+            source_controller == controller_id,
+            or_(*[and_(source_time >= start, source_time < end) for start, end in ranges[index:index + MAX_RANGES_PER_QUERY]])
+        ).group_by(bucket).all()
+
+    db.query(target).filter(
+        target.controller_id == controller_id,
+        target.bucket.in_(buckets)
+    ).delete(synchronize_session=False)
+    if rows:
+        db.execute(insert(target), [
+            {**row._mapping, "bucket": as_utc(row.bucket), "controller_id": controller_id} for row in rows
+        ])
+
+# Reagrega até max_buckets buckets sujos; retorna quantos foram processados
+def refresh_dirty_buckets(db: Session, max_buckets: Optional[int] = None) -> int:
+    dirty_model = models.SensorMeteoSMERollupDirty
+    dirty = db.query(dirty_model).order_by(dirty_model.controller_id, dirty_model.bucket).limit(
+        max_buckets or settings.ROLLUP_REFRESH_BATCH_SIZE
+    ).with_for_update(skip_locked=True).all()
+    if not dirty:
+        return 0
+
+    by_controller = defaultdict(set)
+    for row in dirty:
+        by_controller[row.controller_id].add(as_utc(row.bucket))
+
+    for controller_id, touched in by_controller.items():
+        source = None
+        for seconds, target in ROLLUP_LEVELS:
+            buckets = sorted({floor_time(value, seconds) for value in touched})
+            _rebuild(db, controller_id, seconds, target, buckets, source)
+            source, touched = target, buckets
+
+    for row in dirty:
+        db.delete(row)
+    db.commit()
+    return len(dirty)
+
+def refresh_all_dirty(session_factory) -> int:
+    total = 0
+    with session_factory() as db:
+        while True:
+            processed = refresh_dirty_buckets(db)
+            total += processed
+            if processed < settings.ROLLUP_REFRESH_BATCH_SIZE:
+                return total
+
+async def run_refresher(session_factory, interval_seconds: float):
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            processed = await run_in_threadpool(refresh_all_dirty, session_factory)
+            if processed:
+                logger.debug("Rollups: %s buckets reagregados", processed)
+        except Exception:
+            logger.exception("Falha ao atualizar os rollups de SensorMeteoSME")
+
+# Rollups cuja granularidade divide o bucket pedido, do mais grosso para o mais fino
+def candidate_rollups(bucket_seconds: int):
+    if not settings.ROLLUPS_ENABLED:
+        return []
+    return [(seconds, model) for seconds, model in reversed(ROLLUP_LEVELS) if bucket_seconds % seconds == 0]
+
+# Divide o intervalo em cabeça e cauda lidas das leituras brutas e um miolo alinhado servido pelo rollup mais
+# grosso que cubra ao menos um bucket inteiro (o miolo termina antes do primeiro bucket sujo).
+# Retorna (modelo, início do miolo, fim do miolo) ou (None, None, None) se nenhum rollup servir
+def choose_rollup(start_time: datetime, end_time: datetime, bucket_seconds: int, first_dirty: Optional[datetime] = None):
+    for seconds, model in candidate_rollups(bucket_seconds):
+        middle_start = ceil_time(start_time, seconds)
+        middle_end = floor_time(end_time, seconds)
+        if first_dirty is not None:
+            middle_end = min(middle_end, floor_time(first_dirty, seconds))
+        if middle_start < middle_end:
+            return model, middle_start, middle_end
+    return None, None, None
+
+# Início do primeiro bucket ainda não reagregado dos controladores no intervalo (None se estiver tudo em dia)
+def first_dirty_bucket(db: Session, controller_ids: List[int], start_time: datetime, end_time: datetime):
+    dirty_model = models.SensorMeteoSMERollupDirty
+    value = db.query(func.min(dirty_model.bucket)).filter(
+        dirty_model.controller_id.in_(controller_ids),
+        dirty_model.bucket >= floor_time(start_time, ROLLUP_LEVELS[0][0]),
+        dirty_model.bucket < end_time
+    ).scalar()
+    return as_utc(value) if value is not None else None
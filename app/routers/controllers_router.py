@@ -1,39 +1,89 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from typing import List
-from app import schemas, crud
-from app.database import get_db
+from typing import List, Literal, Optional
+from app import schemas, crud, station_checks
+from app.core.fast_json import FastJSONResponse
+from app.core.instrumentation import InstrumentedRoute
+from app.core.response_cache import response_cache, serialize
+from app.core.station_health import station_health
+from app.database import SessionLocal, get_db, get_read_db
 
-router = APIRouter(prefix="/controllers", tags=["Controladores"])
+router = APIRouter(prefix="/controllers", tags=["Controladores"], route_class=InstrumentedRoute)
 
 @router.post("/", response_model=schemas.Controller)
 def create_controller(
     controller: schemas.ControllerCreate,
     db: Session = Depends(get_db)
 ):
-    db_location = crud.get_location(db, controller.location_id)
-    if not db_location:
+    if not crud.location_exists(db, controller.location_id):
         raise HTTPException(status_code=404, detail="Local não encontrado para associar o controlador")
 
     return crud.create_controller(db=db, controller=controller)
 
-@router.get("/", response_model=List[schemas.Controller])
+# Com "fields" (ex: ?fields=id,location_id) retorna apenas as colunas pedidas de cada controlador
+@router.get(
+    "/",
+    response_model=List[schemas.ControllerFields],
+    response_description="Controladores com todos os campos ou, com \"fields\", apenas os campos pedidos",
+)
 def read_controllers(
     skip: int = 0, limit: int = 100,
-    db: Session = Depends(get_db)
+    fields: Optional[str] = Query(None, description="Campos retornados, separados por vírgula (ex: id,location_id)"),
+    db: Session = Depends(get_read_db)
 ):
-    controllers = crud.get_controllers(db, skip=skip, limit=limit)
-    return controllers
+    requested = parse_controller_fields(fields)
+    # Tuplas do Core serializadas com orjson (sem objetos ORM nem schemas Pydantic)
+    return FastJSONResponse(crud.get_controllers_fields(db, requested, skip=skip, limit=limit))
+
+def parse_controller_fields(fields: Optional[str]) -> List[str]:
+    if fields is None:
+        return list(schemas.Controller.model_fields)
+    requested = list(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    invalid = [field for field in requested if field not in schemas.Controller.model_fields]
+    if not requested or invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Campos inválidos: {', '.join(invalid) or fields}. "
+                   f"Use: {', '.join(schemas.Controller.model_fields)}."
+        )
+    return requested
 
+# Saúde das estações a partir do estado em memória atualizado na ingestão (sem consultar as leituras):
+# "stale" sem leituras há STATION_HEALTH_STALE_AFTER_SECONDS, "anomalous" com leituras fora da faixa física,
+# valor travado ou desvio recente
+@router.get("/health", response_model=List[schemas.ControllerHealth])
+def read_controllers_health(
+    status: Optional[Literal["ok", "stale", "anomalous", "disabled"]] = None,
+    location_id: Optional[int] = None
+):
+    station_checks.ensure_loaded(SessionLocal)
+    return FastJSONResponse(station_health.report(status, location_id))
+
+# Leituras anômalas mais recentes (até STATION_HEALTH_ANOMALY_BUFFER_SIZE em memória)
+@router.get("/health/anomalies", response_model=List[schemas.ControllerAnomaly])
+def read_controllers_anomalies(
+    controller_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000)
+):
+    station_checks.ensure_loaded(SessionLocal)
+    return FastJSONResponse(station_health.anomalies(controller_id, limit))
+
+# Cache de respostas (ver locations_router); as tags dos sensores invalidam a entrada quando um sensor muda
 @router.get("/{controller_id}", response_model=schemas.Controller)
 def read_controller(
+    request: Request,
     controller_id: int,
     db: Session = Depends(get_db)
 ):
+    return response_cache.respond(request, lambda: build_controller_response(db, controller_id))
+
+# Corpo e tags do cache de um controlador (controllers_router_async executa dentro do run_sync)
+def build_controller_response(db: Session, controller_id: int):
     db_controller = crud.get_controller(db, controller_id=controller_id)
     if db_controller is None:
         raise HTTPException(status_code=404, detail="Controlador não encontrado")
-    return db_controller
+    tags = [f"controller:{controller_id}"] + [f"sensor:{sensor.id}" for sensor in db_controller.sensors]
+    return serialize(schemas.Controller, db_controller), tags
 
 @router.patch("/{controller_id}", response_model=schemas.Controller)
 def update_controller(
@@ -41,13 +91,11 @@ def update_controller(
     controller: schemas.ControllerUpdate,
     db: Session = Depends(get_db)
 ):
-    db_controller = crud.get_controller(db, controller_id=controller_id)
-    if db_controller is None:
+    if not crud.controller_exists(db, controller_id=controller_id):
         raise HTTPException(status_code=404, detail="Controlador não encontrado")
 
     if controller.location_id is not None:
-        db_location = crud.get_location(db, controller.location_id)
-        if not db_location:
+        if not crud.location_exists(db, controller.location_id):
             raise HTTPException(status_code=404, detail="Novo local não encontrado para associar o controlador")
     
     update_data = controller.model_dump(exclude_unset=True)
@@ -0,0 +1,72 @@
+# Rotas de controladores sobre a camada assíncrona do banco (DB_ASYNC_ENABLED).
+# Substituem as rotas síncronas equivalentes de controllers_router (ver replace_routes em app/main.py); as rotas de
+# saúde não consultam o banco e continuam síncronas. Controller.sensors é um relacionamento lazy: os controladores
+# são serializados dentro do run_sync (crud_async.run_serialized)
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app import schemas, crud, crud_async
+from app.core.fast_json import FastJSONResponse
+from app.core.instrumentation import InstrumentedRoute
+from app.core.response_cache import response_cache
+from app.database import get_async_db
+from app.routers.controllers_router import build_controller_response, parse_controller_fields
+
+router = APIRouter(prefix="/controllers", tags=["Controladores"], route_class=InstrumentedRoute)
+
+@router.post("/", response_model=schemas.Controller)
+async def create_controller_async(
+    controller: schemas.ControllerCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    if not await crud_async.location_exists(db, controller.location_id):
+        raise HTTPException(status_code=404, detail="Local não encontrado para associar o controlador")
+
+    body = await crud_async.run_serialized(db, schemas.Controller, crud.create_controller, controller=controller)
+    return Response(body, media_type="application/json")
+
+# Com "fields" (ex: ?fields=id,location_id) retorna apenas as colunas pedidas de cada controlador
+@router.get(
+    "/",
+    response_model=List[schemas.ControllerFields],
+    response_description="Controladores com todos os campos ou, com \"fields\", apenas os campos pedidos",
+)
+async def read_controllers_async(
+    skip: int = 0, limit: int = 100,
+    fields: Optional[str] = Query(None, description="Campos retornados, separados por vírgula (ex: id,location_id)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    requested = parse_controller_fields(fields)
+    return FastJSONResponse(await crud_async.get_controllers_fields(db, requested, skip=skip, limit=limit))
+
+# Cache de respostas (ver locations_router); as tags dos sensores invalidam a entrada quando um sensor muda
+@router.get("/{controller_id}", response_model=schemas.Controller)
+async def read_controller_async(
+    request: Request,
+    controller_id: int,
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await response_cache.respond_async(
+        request, lambda: db.run_sync(build_controller_response, controller_id)
+    )
+
+@router.patch("/{controller_id}", response_model=schemas.Controller)
+async def update_controller_async(
+    controller_id: int,
+    controller: schemas.ControllerUpdate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    if not await crud_async.controller_exists(db, controller_id=controller_id):
+        raise HTTPException(status_code=404, detail="Controlador não encontrado")
+
+    if controller.location_id is not None:
+        if not await crud_async.location_exists(db, controller.location_id):
+            raise HTTPException(status_code=404, detail="Novo local não encontrado para associar o controlador")
+
+    if not controller.model_dump(exclude_unset=True):
+        raise HTTPException(status_code=400, detail="Nenhum dado fornecido para atualização.")
+
+    body = await crud_async.run_serialized(
+        db, schemas.Controller, crud.update_controller, controller_id=controller_id, controller_update=controller
+    )
+    return Response(body, media_type="application/json")
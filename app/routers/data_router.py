@@ -1,28 +1,505 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime
-from app import schemas, crud
-from app.database import get_db
+from pydantic import ValidationError
+from typing import List, Literal, Optional
+from datetime import datetime, timedelta, timezone
+import time
+from app import schemas, crud, export, live, rollups, series
+from app.core import aggregation, binary_protocol, derived_metrics, fast_json, pagination
+from app.core.config import settings
+from app.core.fast_json import FastJSONResponse
+from app.core.instrumentation import InstrumentedRoute
+from app.core.latest_snapshot import latest_readings
+from app.core.live_hub import live_hub
+from app.core.recent_readings import recent_readings
+from app.database import SessionLocal, get_db, get_read_db, get_read_session_factory
+from app.ingest_buffer import ingest_buffer
 
-router = APIRouter(prefix="/data", tags=["Dados de Sensores (SME)"])
+router = APIRouter(prefix="/data", tags=["Dados de Sensores (SME)"], route_class=InstrumentedRoute)
+
+# Funções auxiliares compartilhadas com as rotas assíncronas (data_router_async)
+def ensure_controller_enabled(controller):
+    if not controller or not controller.enabled:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Chave de controlador inválida ou controlador desabilitado."
+        )
+
+def ensure_batch_size(count: int):
+    if count > settings.INGEST_BATCH_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Lote excede o limite de {settings.INGEST_BATCH_MAX_ROWS} leituras."
+        )
+
+# Valida cada leitura do lote individualmente, retornando as linhas aceitas e o resultado por linha
+def prepare_batch_rows(batch: schemas.SensorMeteoSMEBatch):
+    now = datetime.now(timezone.utc)
+    max_time = now + timedelta(seconds=settings.INGEST_MAX_CLOCK_SKEW_SECONDS)
+    rows = []
+    results = []
+    for index, raw in enumerate(batch.readings):
+        try:
+            item = schemas.SensorMeteoSMEBatchItem.model_validate(raw)
+        except ValidationError as exc:
+            errors = "; ".join(
+                f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in exc.errors()
+            )
+            results.append(schemas.SensorMeteoSMEBatchRowResult(index=index, accepted=False, error=errors))
+            continue
+
+        reading_time = item.time or now
+        if reading_time.tzinfo is None:
+            reading_time = reading_time.replace(tzinfo=timezone.utc)
+        if reading_time > max_time:
+            results.append(schemas.SensorMeteoSMEBatchRowResult(
+                index=index, accepted=False, error="time: horário da leitura está no futuro"
+            ))
+            continue
+
+        rows.append({**item.model_dump(exclude={"time"}), "time": reading_time})
+        results.append(schemas.SensorMeteoSMEBatchRowResult(index=index, accepted=True))
+    return rows, results
+
+def parse_after_cursor(after: Optional[str]):
+    if after is None:
+        return None
+    try:
+        return pagination.decode_cursor(after)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+# Página cheia: informa o cursor da próxima página (keyset por time, id)
+def set_next_cursor(response: Response, data, limit: int):
+    if data and len(data) == limit:
+        response.headers["X-Next-Cursor"] = pagination.encode_cursor(data[-1].time, data[-1].id)
+
+# Serializa as tuplas de leituras com orjson (lista de objetos ou layout colunar)
+# metrics: métricas derivadas (app/core/derived_metrics.py) acrescentadas a cada leitura
+def readings_response(data, limit: int, layout: str, metrics: Optional[List[str]] = None):
+    columns = list(schemas.SensorMeteoSME.model_fields)
+    derived = derived_values(data, columns, metrics) if metrics else {}
+    if layout == "columns":
+        content = fast_json.rows_as_columns(data, columns)
+        content.update(derived)
+    else:
+        content = fast_json.rows_as_records(data, columns)
+        for metric, values in derived.items():
+            for record, value in zip(content, values):
+                record[metric] = value
+    response = FastJSONResponse(content)
+    set_next_cursor(response, data, limit)
+    return response
+
+def derived_values(data, columns: List[str], metrics: List[str]) -> dict:
+    values = list(zip(*data)) if data else [() for _ in columns]
+    source = {
+        column: derived_metrics.epoch_seconds(column_values) if column == "time" else column_values
+        for column, column_values in zip(columns, values)
+        if column in derived_metrics.required_columns(metrics)
+    }
+    return {
+        metric: derived_metrics.to_json(metric_values)
+        for metric, metric_values in derived_metrics.compute(source, metrics).items()
+    }
+
+def parse_derived_metrics(metrics: Optional[List[str]], aggregatable: bool = False) -> List[str]:
+    try:
+        return derived_metrics.validate_metrics(metrics or [], aggregatable=aggregatable)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+# Horário informado pelo controlador (em UTC) ou o do servidor; leituras no futuro são recusadas
+def resolve_reading_time(data: schemas.SensorMeteoSMECreate) -> datetime:
+    now = datetime.now(timezone.utc)
+    if data.time is None:
+        return now
+    value = aggregation.as_utc(data.time).astimezone(timezone.utc)
+    if value > now + timedelta(seconds=settings.INGEST_MAX_CLOCK_SKEW_SECONDS):
+        raise HTTPException(status_code=400, detail="time: horário da leitura está no futuro")
+    return value
+
+# Modo write-behind: enfileira a leitura e responde 202; fila cheia responde 503 com Retry-After.
+# Reenvios de leituras gravadas recentemente nem entram na fila
+def enqueue_reading(data: schemas.SensorMeteoSMECreate, controller_id: int):
+    row = {**data.model_dump(), "controller_id": controller_id, "time": resolve_reading_time(data)}
+    if not recent_readings.contains(controller_id, row["time"]) and not ingest_buffer.put(row):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Fila de ingestão cheia. Tente novamente em instantes.",
+            headers={"Retry-After": str(settings.INGEST_RETRY_AFTER_SECONDS)}
+        )
+    queued = schemas.SensorMeteoSMEQueued(**row, queue_depth=ingest_buffer.depth)
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=jsonable_encoder(queued))
+
+# Controladores de uma consulta/assinatura: lista explícita (todos devem existir) ou os de um local.
+# Retorna os IDs em ordem crescente
+def resolve_controller_ids(
+    db: Session, controller_ids: Optional[List[int]], location_id: Optional[int], max_controllers: int
+) -> List[int]:
+    if (not controller_ids) == (location_id is None):
+        raise HTTPException(status_code=400, detail="Informe controller_ids ou location_id.")
+    if controller_ids:
+        controller_ids = sorted(set(controller_ids))
+        if len(controller_ids) > max_controllers:
+            raise HTTPException(status_code=400, detail=f"Informe no máximo {max_controllers} controladores.")
+        missing = set(controller_ids) - set(crud.get_existing_controller_ids(db, controller_ids))
+        if missing:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Controladores não encontrados: {', '.join(map(str, sorted(missing)))}."
+            )
+        return controller_ids
+
+    if not crud.location_exists(db, location_id=location_id):
+        raise HTTPException(status_code=404, detail="Local não encontrado.")
+    controller_ids = sorted(crud.get_controller_ids_by_location(db, location_id))
+    if len(controller_ids) > max_controllers:
+        raise HTTPException(status_code=400, detail=f"O local possui mais de {max_controllers} controladores.")
+    return controller_ids
+
+def ensure_live_capacity():
+    if live_hub.subscribers >= live_hub.max_subscribers:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Limite de assinaturas em tempo real atingido. Tente novamente em instantes.",
+            headers={"Retry-After": str(settings.INGEST_RETRY_AFTER_SECONDS)}
+        )
+
+def load_latest_snapshot():
+    with SessionLocal() as db:
+        return crud.get_latest_sensor_meteo_sme_snapshot(db)
+
+# inserted: leituras gravadas; as demais aceitas já estavam no banco (reenvios)
+def build_batch_result(inserted: int, results: List[schemas.SensorMeteoSMEBatchRowResult], started: float):
+    elapsed = time.perf_counter() - started
+    accepted = sum(1 for result in results if result.accepted)
+    return schemas.SensorMeteoSMEBatchResult(
+        accepted=accepted,
+        rejected=len(results) - accepted,
+        duplicates=accepted - inserted,
+        elapsed_ms=round(elapsed * 1000, 3),
+        rows_per_second=round(accepted / elapsed, 1) if elapsed > 0 else 0.0,
+        results=results,
+    )
 
 # Envia novos dados da estação
-@router.post("/", response_model=schemas.SensorMeteoSME)
+@router.post(
+    "/",
+    response_model=schemas.SensorMeteoSME,
+    responses={202: {"model": schemas.SensorMeteoSMEQueued, "description": "Leitura enfileirada (write-behind)"}}
+)
 def receive_meteo_data(
     data: schemas.SensorMeteoSMECreate,
     x_controller_key: str = Header(..., description="Chave de Autenticação do Controlador"),
     db: Session = Depends(get_db)
 ):
-    controller = crud.get_controller_by_key(db, key=x_controller_key)
-    if not controller or not controller.enabled:
+    controller = crud.get_controller_auth_by_key(db, key=x_controller_key)
+    ensure_controller_enabled(controller)
+    if settings.INGEST_WRITE_BEHIND_ENABLED:
+        return enqueue_reading(data, controller.id)
+    data.time = resolve_reading_time(data)
+    return crud.create_sensor_meteo_sme_data(db=db, data=data, controller_id=controller.id)
+
+# Envia um lote de leituras armazenadas pela estação (ex: reenvio após ficar offline)
+@router.post("/batch", response_model=schemas.SensorMeteoSMEBatchResult)
+def receive_meteo_data_batch(
+    batch: schemas.SensorMeteoSMEBatch,
+    x_controller_key: str = Header(..., description="Chave de Autenticação do Controlador"),
+    db: Session = Depends(get_db)
+):
+    ensure_batch_size(len(batch.readings))
+    controller = crud.get_controller_auth_by_key(db, key=x_controller_key)
+    ensure_controller_enabled(controller)
+
+    started = time.perf_counter()
+    rows, results = prepare_batch_rows(batch)
+    inserted = crud.create_sensor_meteo_sme_data_batch(db=db, rows=rows, controller_id=controller.id)
+    return build_batch_result(inserted, results, started)
+
+# Ingestão binária compacta (ver app/core/binary_protocol.py): várias leituras por pacote, autenticadas pelo
+# token de 8 bytes no próprio pacote; as leituras vão direto para o INSERT em lote, sem schemas por linha.
+# O corpo é lido cru, independentemente do Content-Type (nem todo firmware o envia)
+async def read_raw_body(request: Request) -> bytes:
+    return await request.body()
+
+@router.post(
+    "/binary",
+    response_model=schemas.SensorMeteoSMEBatchResult,
+    openapi_extra={"requestBody": {"required": True, "content": {
+        "application/octet-stream": {"schema": {"type": "string", "format": "binary"}}
+    }}}
+)
+def receive_meteo_data_binary(
+    payload: bytes = Depends(read_raw_body),
+    db: Session = Depends(get_db)
+):
+    started = time.perf_counter()
+    try:
+        token, readings = binary_protocol.decode_readings(payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    ensure_batch_size(len(readings))
+    controller = crud.get_controller_auth_by_token(db, token=token)
+    ensure_controller_enabled(controller)
+
+    max_time = datetime.now(timezone.utc) + timedelta(seconds=settings.INGEST_MAX_CLOCK_SKEW_SECONDS)
+    rows = []
+    results = []
+    for index, reading in enumerate(readings):
+        if reading["time"] > max_time:
+            results.append(schemas.SensorMeteoSMEBatchRowResult(
+                index=index, accepted=False, error="time: horário da leitura está no futuro"
+            ))
+            continue
+        rows.append(reading)
+        results.append(schemas.SensorMeteoSMEBatchRowResult(index=index, accepted=True))
+    inserted = crud.create_sensor_meteo_sme_data_batch(db=db, rows=rows, controller_id=controller.id)
+    return build_batch_result(inserted, results, started)
+
+# Condições atuais: leitura mais recente de cada controlador habilitado, servida do snapshot em memória
+@router.get("/latest", response_model=List[schemas.SensorMeteoSMELatest])
+def get_latest_meteo_data(
+    response: Response,
+    location_id: Optional[int] = None,
+    if_none_match: Optional[str] = Header(None)
+):
+    latest_readings.ensure_loaded(load_latest_snapshot)
+    etag, data = latest_readings.latest(location_id)
+    if if_none_match and etag in [value.strip() for value in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return data
+
+# Leituras em tempo real via Server-Sent Events: assina uma lista de controladores ou todos os de um local.
+# Na conexão são reenviadas as últimas leituras (após Last-Event-ID, na reconexão); depois, cada nova leitura
+# gravada é enviada como evento "reading". Clientes conectados não geram consultas ao banco.
+@router.get("/stream", response_class=StreamingResponse, responses={200: {"content": {"text/event-stream": {}}}})
+def stream_meteo_data(
+    controller_ids: Optional[List[int]] = Query(None),
+    location_id: Optional[int] = None,
+    last_event_id: Optional[int] = Header(None),
+    db: Session = Depends(get_read_db)
+):
+    controller_ids = resolve_controller_ids(db, controller_ids, location_id, settings.LIVE_MAX_CONTROLLERS)
+    ensure_live_capacity()
+    latest_readings.ensure_loaded(load_latest_snapshot)
+    return StreamingResponse(
+        live.sse_stream(controller_ids, after_id=last_event_id or 0),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Mesma assinatura via WebSocket: mensagens JSON {"type": "reading", "data": {...}}, {"type": "ping"} e
+# {"type": "dropped"} (cliente lento descartado; a conexão é encerrada em seguida)
+@router.websocket("/ws")
+async def live_meteo_data_ws(
+    websocket: WebSocket,
+    controller_ids: Optional[List[int]] = Query(None),
+    location_id: Optional[int] = None,
+    after_id: int = 0
+):
+    def prepare():
+        with SessionLocal() as db:
+            ids = resolve_controller_ids(db, controller_ids, location_id, settings.LIVE_MAX_CONTROLLERS)
+        ensure_live_capacity()
+        latest_readings.ensure_loaded(load_latest_snapshot)
+        return ids
+
+    try:
+        ids = await run_in_threadpool(prepare)
+    except HTTPException as exc:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(exc.detail))
+        return
+
+    await websocket.accept()
+    try:
+        async for event, reading in live.iter_live_events(ids, after_id=after_id):
+            message = {"type": event, "data": reading} if reading is not None else {"type": event}
+            await websocket.send_text(fast_json.dumps(message).decode())
+            if event == "dropped":
+                await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+                return
+    except WebSocketDisconnect:
+        pass
+
+# Retorna séries agregadas por intervalo (ex: 1h, 1d) de um controlador ou de todos os controladores de um local
+@router.get("/aggregate", response_model=schemas.SensorMeteoSMEAggregate)
+def get_meteo_data_aggregate(
+    start_time: datetime,
+    end_time: datetime,
+    bucket: str = "1h",
+    metrics: Optional[List[str]] = Query(None),
+    controller_id: Optional[int] = None,
+    location_id: Optional[int] = None,
+    db: Session = Depends(get_read_db)
+):
+    if (controller_id is None) == (location_id is None):
+        raise HTTPException(status_code=400, detail="Informe controller_id ou location_id.")
+    if end_time <= start_time:
+        raise HTTPException(status_code=400, detail="end_time deve ser posterior a start_time.")
+
+    bucket_seconds = aggregation.parse_bucket(bucket)
+    if not bucket_seconds:
+        raise HTTPException(status_code=400, detail="Intervalo inválido. Use por exemplo 15m, 1h ou 1d.")
+    if (end_time - start_time).total_seconds() / bucket_seconds > settings.AGGREGATE_MAX_BUCKETS:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Chave de controlador inválida ou controlador desabilitado."
+            status_code=400,
+            detail=f"O intervalo solicitado gera mais de {settings.AGGREGATE_MAX_BUCKETS} buckets."
         )
-    return crud.create_sensor_meteo_sme_data(db=db, data=data, controller_id=controller.id)
+    # Métricas derivadas (ex: dew_point) são calculadas a partir das leituras brutas do intervalo
+    derived = parse_derived_metrics(
+        [metric for metric in metrics or [] if metric in derived_metrics.DERIVED_METRICS], aggregatable=True
+    )
+    metrics = [metric for metric in metrics or [] if metric not in derived_metrics.DERIVED_METRICS]
+    try:
+        metrics = aggregation.validate_metrics(metrics) if metrics or not derived else []
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    if controller_id is not None:
+        if not crud.controller_exists(db, controller_id=controller_id):
+            raise HTTPException(status_code=404, detail="Controlador não encontrado.")
+        controller_ids = [controller_id]
+    else:
+        if not crud.location_exists(db, location_id=location_id):
+            raise HTTPException(status_code=404, detail="Local não encontrado.")
+        controller_ids = crud.get_controller_ids_by_location(db, location_id)
+
+    sources, rows = crud.get_sensor_meteo_sme_aggregates(
+        db, controller_ids, start_time, end_time, bucket_seconds
+    ) if controller_ids else ([], [])
+
+    keys = aggregation.series_keys(metrics)
+    series = {key: [] for key in keys}
+    for row in rows:
+        for key, value in aggregation.row_values(row, metrics).items():
+            series[key].append(value)
+    total = aggregation.combine_partials(rows)
+    summary = aggregation.row_values(total, metrics)
+
+    if derived and controller_ids:
+        # Uma leitura além do limite indica que o período tem leituras demais para o cálculo em memória
+        columns = crud.get_sensor_meteo_sme_columns(
+            db, controller_ids, start_time, end_time, derived_metrics.required_columns(derived) + ["time"],
+            limit=settings.AGGREGATE_DERIVED_MAX_ROWS + 1
+        )
+        if len(columns["time"]) > settings.AGGREGATE_DERIVED_MAX_ROWS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"O período tem mais de {settings.AGGREGATE_DERIVED_MAX_ROWS} leituras para as métricas "
+                       "derivadas; reduza o intervalo ou consulte um controlador por vez."
+            )
+        times = derived_metrics.epoch_seconds(columns["time"])
+        per_bucket, derived_summary = derived_metrics.bucket_stats(
+            derived_metrics.compute({**columns, "time": times}, derived),
+            times, bucket_seconds, rollups.BUCKET_ORIGIN_EPOCH
+        )
+        for key in derived_metrics.series_keys(derived):
+            series[key] = [
+                per_bucket.get(int(aggregation.as_utc(row["bucket"]).timestamp()), {}).get(key) for row in rows
+            ]
+        summary.update(derived_summary)
+    else:
+        for key in derived_metrics.series_keys(derived):
+            series[key] = [None] * len(rows)
+            summary[key] = None
+
+    return schemas.SensorMeteoSMEAggregate(
+        controller_id=controller_id,
+        location_id=location_id,
+        start_time=start_time,
+        end_time=end_time,
+        bucket=bucket,
+        bucket_seconds=bucket_seconds,
+        metrics=metrics + derived,
+        sources=sources,
+        time=[row["bucket"] for row in rows],
+        count=[row["count"] for row in rows],
+        series=series,
+        total_count=total.get("count") or 0,
+        summary=summary,
+    )
 
-# Retorna os dados armazenados de uma estação por ID (possui filtros)
+# Séries de vários controladores (lista de IDs ou todos os controladores de um local) em uma única consulta,
+# em streaming e agrupadas por controlador. max_points reduz cada série com LTTB (pela métrica downsample_metric)
+@router.get("/series", response_model=schemas.SensorMeteoSMESeriesSet)
+def get_meteo_data_series(
+    start_time: datetime,
+    end_time: datetime,
+    controller_ids: Optional[List[int]] = Query(None),
+    location_id: Optional[int] = None,
+    max_points: Optional[int] = Query(None, ge=3),
+    downsample_metric: str = "temperature",
+    layout: Literal["rows", "columns"] = "rows",
+    db: Session = Depends(get_read_db),
+    session_factory=Depends(get_read_session_factory)
+):
+    if end_time <= start_time:
+        raise HTTPException(status_code=400, detail="end_time deve ser posterior a start_time.")
+    if max_points is not None and max_points > settings.SERIES_MAX_POINTS:
+        raise HTTPException(
+            status_code=400, detail=f"max_points deve ser no máximo {settings.SERIES_MAX_POINTS}."
+        )
+    if downsample_metric not in series.DOWNSAMPLE_METRICS:
+        raise HTTPException(
+            status_code=400, detail=f"Métrica inválida. Use: {', '.join(series.DOWNSAMPLE_METRICS)}."
+        )
+
+    controller_ids = resolve_controller_ids(db, controller_ids, location_id, settings.SERIES_MAX_CONTROLLERS)
+
+    rows = series.iter_series_rows(
+        session_factory, controller_ids, start_time, end_time, chunk_size=settings.EXPORT_CHUNK_SIZE
+    ) if controller_ids else iter(())
+    return StreamingResponse(
+        series.stream_series(
+            rows, controller_ids, layout=layout, max_points=max_points, metric=downsample_metric,
+            chunk_size=settings.EXPORT_CHUNK_SIZE
+        ),
+        media_type="application/json",
+    )
+
+# Exporta o histórico de uma estação em streaming (CSV, NDJSON ou Parquet), opcionalmente compactado com gzip
+@router.get("/{controller_id}/export")
+def export_meteo_data(
+    controller_id: int,
+    format: str = "csv",
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    gzip: bool = False,
+    db: Session = Depends(get_read_db),
+    session_factory=Depends(get_read_session_factory)
+):
+    if format not in export.EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400, detail=f"Formato inválido. Use: {', '.join(export.EXPORT_FORMATS)}."
+        )
+    if format == "parquet" and not export.parquet_available():
+        raise HTTPException(status_code=501, detail="Exportação Parquet requer o pacote pyarrow.")
+    if not crud.controller_exists(db, controller_id=controller_id):
+        raise HTTPException(status_code=404, detail="Controlador não encontrado.")
+
+    media_type, extension = export.EXPORT_FORMATS[format]
+    filename = f"controller_{controller_id}.{extension}"
+    if gzip:
+        media_type, filename = "application/gzip", filename + ".gz"
+
+    chunks = export.iter_reading_chunks(
+        session_factory, controller_id, start_time, end_time, chunk_size=settings.EXPORT_CHUNK_SIZE
+    )
+    return StreamingResponse(
+        export.stream_export(chunks, format, gzip=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+# Retorna os dados armazenados de uma estação por ID (possui filtros).
+# layout=columns retorna arrays por campo ({"time": [...], "temperature": [...]}) em vez de uma lista de objetos;
+# metrics acrescenta métricas derivadas a cada leitura (ex: metrics=dew_point&metrics=vel_wind_kmh)
 @router.get("/{controller_id}", response_model=List[schemas.SensorMeteoSME])
 def get_meteo_data_by_controller(
     controller_id: int,
@@ -30,16 +507,17 @@ def get_meteo_data_by_controller(
     end_time: Optional[datetime] = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    after: Optional[str] = Query(None, description="Cursor de paginação retornado no cabeçalho X-Next-Cursor"),
+    layout: Literal["rows", "columns"] = "rows",
+    metrics: Optional[List[str]] = Query(None, description="Métricas derivadas, ex: dew_point, heat_index"),
+    db: Session = Depends(get_read_db)
 ):
-    db_controller = crud.get_controller(db, controller_id=controller_id)
-    if not db_controller:
+    cursor = parse_after_cursor(after)
+    metrics = parse_derived_metrics(metrics)
+    if not crud.controller_exists(db, controller_id=controller_id):
         raise HTTPException(status_code=404, detail="Controlador não encontrado.")
 
-    if start_time and end_time:
-        data = crud.get_sensor_meteo_sme_data_by_controller_and_time_range(
-            db, controller_id, start_time, end_time, skip=skip, limit=limit
-        )
-    else:
-        data = crud.get_sensor_meteo_sme_data_by_controller(db, controller_id, skip=skip, limit=limit)
-    return data
\ No newline at end of file
+    data = crud.get_sensor_meteo_sme_rows_by_controller(
+        db, controller_id, start_time, end_time, skip=skip, limit=limit, after=cursor
+    )
+    return readings_response(data, limit, layout, metrics)
\ No newline at end of file
@@ -0,0 +1,74 @@
+# Rotas de ingestão e leitura de dados sobre a camada assíncrona do banco (DB_ASYNC_ENABLED).
+# Substituem as rotas síncronas equivalentes de data_router (ver replace_routes em app/main.py).
+from fastapi import APIRouter, Depends, HTTPException, Header, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+from datetime import datetime
+import time
+from app import schemas, crud_async
+from app.core.config import settings
+from app.core.instrumentation import InstrumentedRoute
+from app.database import get_async_db
+from app.routers.data_router import (
+    build_batch_result, enqueue_reading, ensure_batch_size, ensure_controller_enabled, parse_after_cursor,
+    parse_derived_metrics, prepare_batch_rows, readings_response, resolve_reading_time
+)
+
+router = APIRouter(prefix="/data", tags=["Dados de Sensores (SME)"], route_class=InstrumentedRoute)
+
+# Envia novos dados da estação
+@router.post(
+    "/",
+    response_model=schemas.SensorMeteoSME,
+    responses={202: {"model": schemas.SensorMeteoSMEQueued, "description": "Leitura enfileirada (write-behind)"}}
+)
+async def receive_meteo_data_async(
+    data: schemas.SensorMeteoSMECreate,
+    x_controller_key: str = Header(..., description="Chave de Autenticação do Controlador"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    controller = await crud_async.get_controller_auth_by_key(db, key=x_controller_key)
+    ensure_controller_enabled(controller)
+    if settings.INGEST_WRITE_BEHIND_ENABLED:
+        return enqueue_reading(data, controller.id)
+    data.time = resolve_reading_time(data)
+    return await crud_async.create_sensor_meteo_sme_data(db, data=data, controller_id=controller.id)
+
+# Envia um lote de leituras armazenadas pela estação
+@router.post("/batch", response_model=schemas.SensorMeteoSMEBatchResult)
+async def receive_meteo_data_batch_async(
+    batch: schemas.SensorMeteoSMEBatch,
+    x_controller_key: str = Header(..., description="Chave de Autenticação do Controlador"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    ensure_batch_size(len(batch.readings))
+    controller = await crud_async.get_controller_auth_by_key(db, key=x_controller_key)
+    ensure_controller_enabled(controller)
+
+    started = time.perf_counter()
+    rows, results = prepare_batch_rows(batch)
+    inserted = await crud_async.create_sensor_meteo_sme_data_batch(db, rows=rows, controller_id=controller.id)
+    return build_batch_result(inserted, results, started)
+
+# Retorna os dados armazenados de uma estação por ID (possui filtros)
+@router.get("/{controller_id}", response_model=List[schemas.SensorMeteoSME])
+async def get_meteo_data_by_controller_async(
+    controller_id: int,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = Query(None, description="Cursor de paginação retornado no cabeçalho X-Next-Cursor"),
+    layout: Literal["rows", "columns"] = "rows",
+    metrics: Optional[List[str]] = Query(None, description="Métricas derivadas, ex: dew_point, heat_index"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    cursor = parse_after_cursor(after)
+    metrics = parse_derived_metrics(metrics)
+    if not await crud_async.controller_exists(db, controller_id=controller_id):
+        raise HTTPException(status_code=404, detail="Controlador não encontrado.")
+
+    data = await crud_async.get_sensor_meteo_sme_rows_by_controller(
+        db, controller_id, start_time, end_time, skip=skip, limit=limit, after=cursor
+    )
+    return readings_response(data, limit, layout, metrics)
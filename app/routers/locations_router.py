@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Dict, List, Optional, Tuple
 from app import schemas, crud
-from app.database import get_db
+from app.core.config import settings
+from app.core.instrumentation import InstrumentedRoute
+from app.core.latest_snapshot import latest_readings
+from app.core.response_cache import response_cache, serialize
+from app.core.spatial_index import bounding_box, haversine_km, location_index
+from app.database import SessionLocal, get_db, get_read_db
+from app.routers.data_router import load_latest_snapshot
 
-router = APIRouter(prefix="/locations", tags=["Locais"])
+router = APIRouter(prefix="/locations", tags=["Locais"], route_class=InstrumentedRoute)
 
 # Cria um novo local
 @router.post("/", response_model=schemas.Location)
@@ -14,25 +20,120 @@ def create_location(
 ):
     return crud.create_location(db=db, location=location)
 
-# Retorna todos os locais cadastrados, com paginação opcional
+# Retorna todos os locais cadastrados, com paginação opcional.
+# Rotas de metadados servidas pelo cache de respostas (invalidado pelas escritas em app/crud.py); em caso
+# de miss leem do primário para não regravar no cache dados ainda não replicados
 @router.get("/", response_model=List[schemas.Location])
 def read_locations(
+    request: Request,
     skip: int = 0, limit: int = 100,
     db: Session = Depends(get_db)
 ):
-    locations = crud.get_locations(db, skip=skip, limit=limit)
-    return locations
+    def build():
+        locations = crud.get_locations(db, skip=skip, limit=limit)
+        return serialize(List[schemas.Location], locations), ["locations"]
+    return response_cache.respond(request, build)
+
+def load_spatial_index():
+    with SessionLocal() as db:
+        return crud.get_spatial_index_data(db)
+
+# Monta a resposta das consultas espaciais: matches é uma lista de (distância em km ou None, local) e
+# controllers os controladores habilitados por local
+def nearby_response(matches: List[Tuple[Optional[float], object]], controllers: Dict[int, list], include_latest: bool):
+    latest = {}
+    if include_latest:
+        latest_readings.ensure_loaded(load_latest_snapshot)
+        _, readings = latest_readings.latest()
+        latest = {reading["controller_id"]: reading for reading in readings}
+    return [
+        {
+            "id": location.id,
+            "name": location.name,
+            "lat": location.lat,
+            "lng": location.lng,
+            "distance_km": round(distance, 3) if distance is not None else None,
+            "controllers": [
+                {
+                    "id": controller.id,
+                    "hw_desc": controller.hw_desc,
+                    "version": controller.version,
+                    "latest": latest.get(controller.id),
+                }
+                for controller in controllers.get(location.id, [])
+            ],
+        }
+        for distance, location in matches
+    ]
+
+# Os k candidatos mais próximos de (lat, lng) até max_distance_km, como (distância em km, local)
+def nearest_matches(candidates, lat: float, lng: float, k: int, max_distance_km: float):
+    matches = sorted(
+        (
+            (haversine_km(lat, lng, location.lat, location.lng), location)
+            for location in candidates
+        ),
+        key=lambda item: (item[0], item[1].id)
+    )
+    return [item for item in matches if item[0] <= max_distance_km][:k]
+
+# Locais dentro de um retângulo (viewport do mapa), com os controladores habilitados de cada um.
+# min_lng > max_lng indica um retângulo que cruza o antimeridiano
+@router.get("/within", response_model=List[schemas.LocationNearby])
+def read_locations_within(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lng: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lng: float = Query(..., ge=-180, le=180),
+    include_latest: bool = False,
+    limit: int = Query(settings.SPATIAL_MAX_RESULTS, ge=1, le=settings.SPATIAL_MAX_RESULTS),
+    db: Session = Depends(get_read_db)
+):
+    if min_lat > max_lat:
+        raise HTTPException(status_code=400, detail="min_lat deve ser menor ou igual a max_lat.")
+    if settings.SPATIAL_INDEX_ENABLED:
+        location_index.ensure_loaded(load_spatial_index)
+        locations = location_index.within(min_lat, min_lng, max_lat, max_lng, limit)
+        controllers = location_index.controllers([location.id for location in locations])
+    else:
+        locations = crud.get_locations_in_box(db, min_lat, min_lng, max_lat, max_lng, limit)
+        controllers = crud.get_enabled_controllers_by_locations(db, [location.id for location in locations])
+    return nearby_response([(None, location) for location in locations], controllers, include_latest)
+
+# Os K locais mais próximos de um ponto (distância em km ao longo da superfície), até max_distance_km
+@router.get("/nearest", response_model=List[schemas.LocationNearby])
+def read_nearest_locations(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    k: int = Query(10, ge=1, le=settings.SPATIAL_MAX_RESULTS),
+    max_distance_km: float = Query(settings.SPATIAL_NEAREST_MAX_KM, gt=0, le=settings.SPATIAL_NEAREST_MAX_KM),
+    include_latest: bool = False,
+    db: Session = Depends(get_read_db)
+):
+    if settings.SPATIAL_INDEX_ENABLED:
+        location_index.ensure_loaded(load_spatial_index)
+        matches = location_index.nearest(lat, lng, k, max_distance_km)
+        controllers = location_index.controllers([location.id for _, location in matches])
+    else:
+        # Pré-filtro pelo retângulo que contém o raio (índice do banco) e distância exata em Python
+        candidates = crud.get_locations_in_box(db, *bounding_box(lat, lng, max_distance_km), limit=None)
+        matches = nearest_matches(candidates, lat, lng, k, max_distance_km)
+        controllers = crud.get_enabled_controllers_by_locations(db, [location.id for _, location in matches])
+    return nearby_response(matches, controllers, include_latest)
 
 # Retorno os dados de um local pelo ID
 @router.get("/{location_id}", response_model=schemas.Location)
 def read_location(
+    request: Request,
     location_id: int,
     db: Session = Depends(get_db)
 ):
-    db_location = crud.get_location(db, location_id=location_id)
-    if db_location is None:
-        raise HTTPException(status_code=404, detail="Local não encontrado")
-    return db_location
+    def build():
+        db_location = crud.get_location(db, location_id=location_id)
+        if db_location is None:
+            raise HTTPException(status_code=404, detail="Local não encontrado")
+        return serialize(schemas.Location, db_location), [f"location:{location_id}"]
+    return response_cache.respond(request, build)
 
 # Atualiza um local existente pelo ID
 @router.patch("/{location_id}", response_model=schemas.Location)
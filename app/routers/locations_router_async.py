@@ -0,0 +1,111 @@
+# Rotas de locais sobre a camada assíncrona do banco (DB_ASYNC_ENABLED).
+# Substituem as rotas síncronas equivalentes de locations_router (ver replace_routes em app/main.py); as consultas
+# que usam a réplica de leitura no caminho síncrono leem do primário.
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from app import schemas, crud_async
+from app.core.config import settings
+from app.core.instrumentation import InstrumentedRoute
+from app.core.response_cache import response_cache, serialize
+from app.core.spatial_index import bounding_box, location_index
+from app.database import get_async_db
+from app.routers.locations_router import load_spatial_index, nearby_response, nearest_matches
+
+router = APIRouter(prefix="/locations", tags=["Locais"], route_class=InstrumentedRoute)
+
+# Cria um novo local
+@router.post("/", response_model=schemas.Location)
+async def create_location_async(
+    location: schemas.LocationCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await crud_async.create_location(db, location=location)
+
+# Retorna todos os locais cadastrados, com paginação opcional (cache de respostas, ver locations_router)
+@router.get("/", response_model=List[schemas.Location])
+async def read_locations_async(
+    request: Request,
+    skip: int = 0, limit: int = 100,
+    db: AsyncSession = Depends(get_async_db)
+):
+    async def build():
+        locations = await crud_async.get_locations(db, skip=skip, limit=limit)
+        return serialize(List[schemas.Location], locations), ["locations"]
+    return await response_cache.respond_async(request, build)
+
+# Locais dentro de um retângulo (viewport do mapa), com os controladores habilitados de cada um
+@router.get("/within", response_model=List[schemas.LocationNearby])
+async def read_locations_within_async(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lng: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lng: float = Query(..., ge=-180, le=180),
+    include_latest: bool = False,
+    limit: int = Query(settings.SPATIAL_MAX_RESULTS, ge=1, le=settings.SPATIAL_MAX_RESULTS),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if min_lat > max_lat:
+        raise HTTPException(status_code=400, detail="min_lat deve ser menor ou igual a max_lat.")
+    if settings.SPATIAL_INDEX_ENABLED:
+        location_index.ensure_loaded(load_spatial_index)
+        locations = location_index.within(min_lat, min_lng, max_lat, max_lng, limit)
+        controllers = location_index.controllers([location.id for location in locations])
+    else:
+        locations = await crud_async.get_locations_in_box(db, min_lat, min_lng, max_lat, max_lng, limit)
+        controllers = await crud_async.get_enabled_controllers_by_locations(
+            db, [location.id for location in locations]
+        )
+    return nearby_response([(None, location) for location in locations], controllers, include_latest)
+
+# Os K locais mais próximos de um ponto (distância em km ao longo da superfície), até max_distance_km
+@router.get("/nearest", response_model=List[schemas.LocationNearby])
+async def read_nearest_locations_async(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    k: int = Query(10, ge=1, le=settings.SPATIAL_MAX_RESULTS),
+    max_distance_km: float = Query(settings.SPATIAL_NEAREST_MAX_KM, gt=0, le=settings.SPATIAL_NEAREST_MAX_KM),
+    include_latest: bool = False,
+    db: AsyncSession = Depends(get_async_db)
+):
+    if settings.SPATIAL_INDEX_ENABLED:
+        location_index.ensure_loaded(load_spatial_index)
+        matches = location_index.nearest(lat, lng, k, max_distance_km)
+        controllers = location_index.controllers([location.id for _, location in matches])
+    else:
+        candidates = await crud_async.get_locations_in_box(db, *bounding_box(lat, lng, max_distance_km), limit=None)
+        matches = nearest_matches(candidates, lat, lng, k, max_distance_km)
+        controllers = await crud_async.get_enabled_controllers_by_locations(
+            db, [location.id for _, location in matches]
+        )
+    return nearby_response(matches, controllers, include_latest)
+
+# Retorno os dados de um local pelo ID
+@router.get("/{location_id}", response_model=schemas.Location)
+async def read_location_async(
+    request: Request,
+    location_id: int,
+    db: AsyncSession = Depends(get_async_db)
+):
+    async def build():
+        db_location = await crud_async.get_location(db, location_id=location_id)
+        if db_location is None:
+            raise HTTPException(status_code=404, detail="Local não encontrado")
+        return serialize(schemas.Location, db_location), [f"location:{location_id}"]
+    return await response_cache.respond_async(request, build)
+
+# Atualiza um local existente pelo ID
+@router.patch("/{location_id}", response_model=schemas.Location)
+async def update_location_async(
+    location_id: int,
+    location: schemas.LocationUpdate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    db_location = await crud_async.get_location(db, location_id=location_id)
+    if db_location is None:
+        raise HTTPException(status_code=404, detail="Local não encontrado para atualização")
+
+    if not location.model_dump(exclude_unset=True):
+        raise HTTPException(status_code=400, detail="Nenhum dado fornecido para atualização.")
+
+    return await crud_async.update_location(db, db_location=db_location, location_update=location)
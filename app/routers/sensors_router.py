@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from typing import List
 from app import schemas, crud
+from app.core.instrumentation import InstrumentedRoute
+from app.core.response_cache import response_cache, serialize
 from app.database import get_db
 
-router = APIRouter(prefix="/sensors", tags=["Sensores"])
+router = APIRouter(prefix="/sensors", tags=["Sensores"], route_class=InstrumentedRoute)
 
 # Cria um novo sensor
 @router.post("/", response_model=schemas.Sensor)
@@ -24,8 +26,7 @@ def associate_sensor_controller(
     if not db_sensor:
         raise HTTPException(status_code=404, detail="Sensor não encontrado")
 
-    db_controller = crud.get_controller(db, controller_id=association.controller_id)
-    if not db_controller:
+    if not crud.controller_exists(db, controller_id=association.controller_id):
         raise HTTPException(status_code=404, detail="Controlador não encontrado")
 
     existing_association = crud.get_sensor_controller_association(db, association.sensor_id, association.controller_id)
@@ -34,14 +35,17 @@ def associate_sensor_controller(
 
     return crud.associate_sensor_with_controller(db=db, sensor_id=association.sensor_id, controller_id=association.controller_id)
 
-# Retorna todos os sensores cadastrados, com paginação opcional
+# Retorna todos os sensores cadastrados, com paginação opcional (cache de respostas, ver locations_router)
 @router.get("/", response_model=List[schemas.Sensor])
 def read_sensors(
+    request: Request,
     skip: int = 0, limit: int = 100,
     db: Session = Depends(get_db)
 ):
-    sensors = crud.get_sensors(db, skip=skip, limit=limit)
-    return sensors
+    def build():
+        sensors = crud.get_sensors(db, skip=skip, limit=limit)
+        return serialize(List[schemas.Sensor], sensors), ["sensors"]
+    return response_cache.respond(request, build)
 
 # Atualiza um sensor existente pelo ID
 @router.patch("/{sensor_id}", response_model=schemas.Sensor)
@@ -0,0 +1,89 @@
+# Rotas de sensores sobre a camada assíncrona do banco (DB_ASYNC_ENABLED).
+# Substituem as rotas síncronas equivalentes de sensors_router (ver replace_routes em app/main.py).
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from app import schemas, crud_async
+from app.core.instrumentation import InstrumentedRoute
+from app.core.response_cache import response_cache, serialize
+from app.database import get_async_db
+
+router = APIRouter(prefix="/sensors", tags=["Sensores"], route_class=InstrumentedRoute)
+
+# Cria um novo sensor
+@router.post("/", response_model=schemas.Sensor)
+async def create_sensor_async(
+    sensor: schemas.SensorCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await crud_async.create_sensor(db, sensor=sensor)
+
+# Vincular um sensor a um controlador
+@router.post("/associate", response_model=schemas.SensorController)
+async def associate_sensor_controller_async(
+    association: schemas.SensorControllerCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    if not await crud_async.get_sensor(db, sensor_id=association.sensor_id):
+        raise HTTPException(status_code=404, detail="Sensor não encontrado")
+
+    if not await crud_async.controller_exists(db, controller_id=association.controller_id):
+        raise HTTPException(status_code=404, detail="Controlador não encontrado")
+
+    if await crud_async.get_sensor_controller_association(db, association.sensor_id, association.controller_id):
+        raise HTTPException(status_code=409, detail="Sensor já associado a este controlador")
+
+    return await crud_async.associate_sensor_with_controller(
+        db, sensor_id=association.sensor_id, controller_id=association.controller_id
+    )
+
+# Retorna todos os sensores cadastrados, com paginação opcional (cache de respostas, ver locations_router)
+@router.get("/", response_model=List[schemas.Sensor])
+async def read_sensors_async(
+    request: Request,
+    skip: int = 0, limit: int = 100,
+    db: AsyncSession = Depends(get_async_db)
+):
+    async def build():
+        sensors = await crud_async.get_sensors(db, skip=skip, limit=limit)
+        return serialize(List[schemas.Sensor], sensors), ["sensors"]
+    return await response_cache.respond_async(request, build)
+
+# Atualiza um sensor existente pelo ID
+@router.patch("/{sensor_id}", response_model=schemas.Sensor)
+async def update_sensor_async(
+    sensor_id: int,
+    sensor: schemas.SensorUpdate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    if await crud_async.get_sensor(db, sensor_id=sensor_id) is None:
+        raise HTTPException(status_code=404, detail="Controlador não encontrado")
+
+    if not sensor.model_dump(exclude_unset=True):
+        raise HTTPException(status_code=400, detail="Nenhum dado fornecido para atualização.")
+
+    return await crud_async.update_sensor(db, sensor_id=sensor_id, sensor_update=sensor)
+
+# Desvincular um sensor de um controlador
+@router.delete("/dissociate", status_code=204)
+async def dissociate_sensor_controller_async(
+    association: schemas.SensorControllerCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    success = await crud_async.dissociate_sensor_from_controller(
+        db, sensor_id=association.sensor_id, controller_id=association.controller_id
+    )
+    if not success:
+        raise HTTPException(status_code=404, detail="Associação não encontrada")
+    return
+
+# Deletar um sensor pelo ID
+@router.delete("/{sensor_id}", response_model=schemas.Sensor)
+async def delete_sensor_async(
+    sensor_id: int,
+    db: AsyncSession = Depends(get_async_db)
+):
+    deleted_sensor = await crud_async.delete_sensor(db, sensor_id=sensor_id)
+    if deleted_sensor is None:
+        raise HTTPException(status_code=404, detail="Sensor não encontrado")
+    return deleted_sensor
@@ -0,0 +1,59 @@
+from fastapi import APIRouter
+from app.core.controller_cache import controller_key_cache
+from app.core.instrumentation import InstrumentedRoute
+from app.core.live_hub import live_hub
+from app.core.pool_metrics import pool_monitor
+from app.core.recent_readings import recent_readings
+from app.core.response_cache import response_cache
+from app.core.spatial_index import location_index
+from app.core.station_health import station_health
+from app.database import replica_router
+from app.ingest_buffer import ingest_buffer
+
+router = APIRouter(prefix="/system", tags=["Sistema"], route_class=InstrumentedRoute)
+
+# Estatísticas do cache de chaves dos controladores (hits/misses)
+@router.get("/cache/controller-keys")
+def read_controller_key_cache_stats():
+    return controller_key_cache.stats()
+
+# Estatísticas do cache de respostas das rotas de metadados
+@router.get("/cache/responses")
+def read_response_cache_stats():
+    return response_cache.stats()
+
+# Estado dos pools de conexão: checkouts, overflow e tempo de espera por conexão
+@router.get("/pool")
+def read_pool_stats():
+    return pool_monitor.snapshot()
+
+
+# Réplicas de leitura: atraso de replicação, leituras roteadas e fallbacks para o primário
+@router.get("/replicas")
+def read_replica_stats():
+    return replica_router.stats()
+
+# Fila de ingestão write-behind: profundidade, rejeições (503) e latência dos flushes
+@router.get("/ingest-buffer")
+def read_ingest_buffer_stats():
+    return ingest_buffer.stats()
+
+# Janela de deduplicação da ingestão: reenvios descartados antes de chegar ao banco
+@router.get("/ingest-dedupe")
+def read_ingest_dedupe_stats():
+    return recent_readings.stats()
+
+# Leituras em tempo real: clientes conectados, leituras publicadas/entregues e clientes lentos descartados
+@router.get("/live")
+def read_live_hub_stats():
+    return live_hub.stats()
+
+# Índice espacial dos locais: locais/controladores indexados, células ocupadas e consultas atendidas
+@router.get("/spatial-index")
+def read_spatial_index_stats():
+    return location_index.stats()
+
+# Saúde das estações: controladores por situação, leituras avaliadas e desabilitações automáticas
+@router.get("/station-health")
+def read_station_health_stats():
+    return station_health.stats()
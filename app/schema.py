@@ -0,0 +1,66 @@
+# Migrações do esquema (Alembic, diretório migrations/), aplicadas por "python -m app.cli migrate".
+# A aplicação não cria tabelas ao iniciar: o /readyz só verifica se o banco está na última revisão.
+# O Alembic é importado apenas quando necessário, para não pesar na inicialização da API.
+import os
+from typing import Optional, Tuple
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Revisão equivalente ao db_controller.sql original: bancos criados antes das migrações recebem essa marca
+BASELINE_REVISION = "0001"
+
+_head_revision: Optional[str] = None
+
+def alembic_config(database_url: Optional[str] = None):
+    from alembic.config import Config
+
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "migrations"))
+    if database_url:
+        config.set_main_option("sqlalchemy.url", database_url.replace("%", "%%"))
+    return config
+
+def head_revision() -> str:
+    global _head_revision
+    if _head_revision is None:
+        from alembic.script import ScriptDirectory
+
+        _head_revision = ScriptDirectory.from_config(alembic_config()).get_current_head()
+    return _head_revision
+
+def current_revision(connection: Connection) -> Optional[str]:
+    if not inspect(connection).has_table("alembic_version"):
+        return None
+    return connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+# Banco com as tabelas (db_controller.sql ou o antigo create_all) mas sem o controle de versão do Alembic
+def is_unversioned(connection: Connection) -> bool:
+    tables = inspect(connection).get_table_names()
+    return "locations" in tables and "alembic_version" not in tables
+
+# Aplica as migrações até revision; retorna (marcado como baseline, revisão anterior, revisão atual)
+def upgrade(engine: Engine, revision: str = "head", sql: bool = False) -> Tuple[bool, Optional[str], Optional[str]]:
+    from alembic import command
+
+    config = alembic_config(engine.url.render_as_string(hide_password=False))
+    if sql:
+        command.upgrade(config, revision, sql=True)
+        return False, None, None
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        stamped = is_unversioned(connection)
+        if stamped:
+            command.stamp(config, BASELINE_REVISION)
+        before = current_revision(connection)
+        command.upgrade(config, revision)
+        return stamped, before, current_revision(connection)
+
+def downgrade(engine: Engine, revision: str):
+    from alembic import command
+
+    config = alembic_config(engine.url.render_as_string(hide_password=False))
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.downgrade(config, revision)
@@ -1,7 +1,7 @@
 # Define os modelos de dados para validação de entrada e serialização de saída
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict, Any, Literal
 
 # Locais
 class LocationBase(BaseModel):
@@ -57,12 +57,54 @@ class Controller(ControllerBase):
     class Config:
         from_attributes = True
 
+# Item de GET /controllers/: com "fields" só as chaves pedidas aparecem (sem "fields", todas as de Controller)
+class ControllerFields(BaseModel):
+    location_id: Optional[int] = None
+    hw_desc: Optional[str] = None
+    id: Optional[int] = None
+    key: Optional[str] = None
+    enabled: Optional[bool] = None
+    version: Optional[float] = None
+    sensors: Optional[List[Sensor]] = None
+
 class ControllerUpdate(BaseModel):
     hw_desc: Optional[str] = None
     enabled: Optional[bool] = None
     location_id: Optional[int] = None
     version: Optional[float] = None
 
+# Saúde das estações (estado em memória, ver app.core.station_health)
+class ControllerHealthMetric(BaseModel):
+    mean: Optional[float] = None
+    std: Optional[float] = None
+    last: Optional[float] = None
+    stuck_count: int
+    out_of_range: int
+    anomalies: int
+
+class ControllerHealth(BaseModel):
+    controller_id: int
+    location_id: int
+    enabled: bool
+    status: Literal["ok", "stale", "anomalous", "disabled"]
+    last_seen: Optional[datetime] = None
+    seconds_since_seen: Optional[float] = None
+    last_reading_time: Optional[datetime] = None
+    readings: int
+    invalid_streak: int
+    auto_disable_pending: bool
+    metrics: Dict[str, ControllerHealthMetric]
+
+class ControllerAnomaly(BaseModel):
+    controller_id: int
+    reading_id: Optional[int] = None
+    time: datetime
+    metric: str
+    value: float
+    kind: Literal["out_of_range", "outlier", "stuck"]
+    expected: Optional[List[float]] = None
+    repeated: Optional[int] = None
+
 
 # Sensores - Controladores
 class SensorControllerBase(BaseModel):
@@ -87,11 +129,78 @@ class SensorMeteoSMEBase(BaseModel):
     rain_measure: float
 
 class SensorMeteoSMECreate(SensorMeteoSMEBase):
-    pass
+    # Horário da leitura no controlador; identifica reenvios (único por controlador). Sem ele, vale o do servidor
+    time: Optional[datetime] = None
 
 class SensorMeteoSME(SensorMeteoSMEBase):
     id: int
     controller_id: int
     time: datetime
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Leitura aceita pela fila de ingestão write-behind (ainda sem id)
+class SensorMeteoSMEQueued(SensorMeteoSMEBase):
+    controller_id: int
+    time: datetime
+    queue_depth: int
+
+# Leitura mais recente de cada controlador (condições atuais)
+class SensorMeteoSMELatest(SensorMeteoSME):
+    location_id: int
+
+# Consultas espaciais de locais: controladores habilitados de cada local e, opcionalmente, a leitura mais recente
+class LocationControllerSummary(BaseModel):
+    id: int
+    hw_desc: str
+    version: Optional[float] = None
+    latest: Optional[SensorMeteoSME] = None
+
+class LocationNearby(Location):
+    distance_km: Optional[float] = None
+    controllers: List[LocationControllerSummary] = []
+
+# Séries de vários controladores (uma por controlador)
+class SensorMeteoSMESeries(BaseModel):
+    controller_id: int
+    readings: List[SensorMeteoSME]
+
+class SensorMeteoSMESeriesSet(BaseModel):
+    series: List[SensorMeteoSMESeries]
+
+# Ingestão em lote (SME)
+class SensorMeteoSMEBatchItem(SensorMeteoSMEBase):
+    time: Optional[datetime] = None
+
+class SensorMeteoSMEBatch(BaseModel):
+    # Cada leitura é validada individualmente para que uma linha inválida não rejeite o lote inteiro
+    readings: List[Dict[str, Any]]
+
+class SensorMeteoSMEBatchRowResult(BaseModel):
+    index: int
+    accepted: bool
+    error: Optional[str] = None
+
+class SensorMeteoSMEBatchResult(BaseModel):
+    accepted: int
+    rejected: int
+    duplicates: int = 0
+    elapsed_ms: float
+    rows_per_second: float
+    results: List[SensorMeteoSMEBatchRowResult]
+
+# Agregação por intervalos de tempo (SME)
+class SensorMeteoSMEAggregate(BaseModel):
+    controller_id: Optional[int] = None
+    location_id: Optional[int] = None
+    start_time: datetime
+    end_time: datetime
+    bucket: str
+    bucket_seconds: int
+    metrics: List[str]
+    sources: List[str] = []
+    time: List[datetime]
+    count: List[int]
+    series: Dict[str, List[Optional[float]]]
+    total_count: int
+    summary: Dict[str, Optional[float]]
\ No newline at end of file
@@ -0,0 +1,81 @@
+# Séries de vários controladores em uma requisição (ex: todas as estações de um local).
+# Uma única consulta (controller_id IN (...), ordenada por controlador e tempo) é lida com cursor do lado do
+# servidor e a resposta JSON é escrita em streaming, agrupada por controlador. Com max_points, cada série é
+# reduzida com LTTB antes de ser escrita (apenas uma série por vez fica em memória).
+import itertools
+from datetime import datetime
+from typing import Iterator, List, Optional
+from sqlalchemy import select
+from app import crud, models, schemas
+from app.core import fast_json
+from app.core.downsampling import lttb_indices
+from app.database import iter_query_partitions
+
+SERIES_COLUMNS = list(schemas.SensorMeteoSME.model_fields)
+DOWNSAMPLE_METRICS = list(schemas.SensorMeteoSMEBase.model_fields)
+
+def iter_series_rows(
+    session_factory,
+    controller_ids: List[int],
+    start_time: datetime,
+    end_time: datetime,
+    chunk_size: int
+):
+    table = models.SensorMeteoSME.__table__
+    query = select(*crud._reading_columns()).where(
+        table.c.controller_id.in_(controller_ids),
+        table.c.time >= start_time,
+        table.c.time <= end_time
+    ).order_by(table.c.controller_id, table.c.time, table.c.id).execution_options(
+        stream_results=True, yield_per=chunk_size
+    )
+    for partition in iter_query_partitions(session_factory, query):
+        yield from partition
+
+def downsample(rows: list, metric: str, max_points: int) -> list:
+    time_index = SERIES_COLUMNS.index("time")
+    metric_index = SERIES_COLUMNS.index(metric)
+    xs = [row[time_index].timestamp() for row in rows]
+    ys = [row[metric_index] for row in rows]
+    return [rows[index] for index in lttb_indices(xs, ys, max_points)]
+
+def _series_body(rows, layout: str, chunk_size: int) -> Iterator[bytes]:
+    if layout == "columns":
+        yield fast_json.dumps(fast_json.rows_as_columns(list(rows), SERIES_COLUMNS))
+        return
+    yield b"["
+    rows = iter(rows)
+    separator = b""
+    for chunk in iter(lambda: list(itertools.islice(rows, chunk_size)), []):
+        yield separator + fast_json.dumps(fast_json.rows_as_records(chunk, SERIES_COLUMNS))[1:-1]
+        separator = b","
+    yield b"]"
+
+# {"series": [{"controller_id": 1, "readings": [...]}, ...]}: uma entrada por controlador solicitado,
+# mesmo sem leituras no intervalo. controller_ids deve estar em ordem crescente, como as linhas da consulta.
+def stream_series(
+    rows,
+    controller_ids: List[int],
+    layout: str = "rows",
+    max_points: Optional[int] = None,
+    metric: str = "temperature",
+    chunk_size: int = 1000
+) -> Iterator[bytes]:
+    controller_index = SERIES_COLUMNS.index("controller_id")
+    groups = itertools.groupby(rows, key=lambda row: row[controller_index])
+    pending = next(groups, None)
+    yield b'{"series":['
+    for position, controller_id in enumerate(controller_ids):
+        series_rows = ()
+        if pending is not None and pending[0] == controller_id:
+            series_rows = pending[1]
+        if max_points is not None:
+            series_rows = downsample(list(series_rows), metric, max_points)
+
+        yield (b"," if position else b"") + b'{"controller_id":%d,"readings":' % controller_id
+        yield from _series_body(series_rows, layout, chunk_size)
+        yield b"}"
+        # O grupo atual precisa ser consumido por inteiro antes de avançar o groupby
+        if pending is not None and pending[0] == controller_id:
+            pending = next(groups, None)
+    yield b"]}"
@@ -0,0 +1,50 @@
+# Verificação periódica da saúde das estações (app.core.station_health): registra no log os controladores que
+# pararam de enviar ou voltaram e, se STATION_HEALTH_AUTO_DISABLE_ENABLED, desabilita os que enviam apenas
+# valores fora da faixa física. Nenhuma verificação consulta a tabela de leituras.
+import asyncio
+import logging
+from typing import List, Tuple
+from starlette.concurrency import run_in_threadpool
+from app import crud, schemas
+from app.core.station_health import station_health
+
+logger = logging.getLogger(__name__)
+
+# Carga inicial: controladores e última leitura de cada um (consulta pelo índice (controller_id, time))
+def load_station_health(session_factory):
+    with session_factory() as db:
+        return crud.get_latest_sensor_meteo_sme_snapshot(db)
+
+def ensure_loaded(session_factory):
+    station_health.ensure_loaded(lambda: load_station_health(session_factory))
+
+def disable_controllers(session_factory, controller_ids: List[int]) -> List[int]:
+    disabled = []
+    with session_factory() as db:
+        for controller_id in controller_ids:
+            # update_controller invalida os caches de chave/token, então a ingestão já recusa o controlador
+            if crud.update_controller(db, controller_id, schemas.ControllerUpdate(enabled=False)):
+                disabled.append(controller_id)
+                station_health.mark_auto_disabled(controller_id)
+    return disabled
+
+def check_stations(session_factory) -> Tuple[List[int], List[int], List[int]]:
+    ensure_loaded(session_factory)
+    became_stale, recovered = station_health.check_stale()
+    pending = station_health.pending_disables()
+    disabled = disable_controllers(session_factory, pending) if pending else []
+    return became_stale, recovered, disabled
+
+async def run_scheduler(session_factory, interval_seconds: float):
+    while True:
+        try:
+            became_stale, recovered, disabled = await run_in_threadpool(check_stations, session_factory)
+            if became_stale:
+                logger.warning("Controladores sem enviar leituras: %s", became_stale)
+            if recovered:
+                logger.info("Controladores voltaram a enviar leituras: %s", recovered)
+            if disabled:
+                logger.warning("Controladores desabilitados por leituras fora da faixa física: %s", disabled)
+        except Exception:
+            logger.exception("Falha na verificação da saúde das estações")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,47 @@
+# Compara dois resultados de bench.run: python -m bench.compare base.json novo.json [--fail-over 10]
+import argparse
+import json
+import sys
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "db_queries_per_request")
+
+def delta(before, after):
+    if before in (None, 0) or after is None:
+        return None
+    return (after - before) / before * 100
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.compare")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--fail-over", type=float, default=None, metavar="PCT",
+                        help="Sai com código 1 se o p95 de algum endpoint piorar mais que PCT%%")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.candidate) as file:
+        candidate = json.load(file)
+
+    print(f"base: {baseline['meta'].get('git_commit') or args.baseline}  "
+          f"novo: {candidate['meta'].get('git_commit') or args.candidate}")
+    regressions = []
+    labels = sorted(set(baseline["endpoints"]) | set(candidate["endpoints"]))
+    for label in labels:
+        before = baseline["endpoints"].get(label, {})
+        after = candidate["endpoints"].get(label, {})
+        print(label)
+        for metric in METRICS:
+            change = delta(before.get(metric), after.get(metric))
+            change_text = f"{change:+.1f}%" if change is not None else "-"
+            print(f"    {metric:<24} {before.get(metric, '-')!s:>10} -> {after.get(metric, '-')!s:>10}  {change_text}")
+        p95_change = delta(before.get("p95_ms"), after.get("p95_ms"))
+        if args.fail_over is not None and p95_change is not None and p95_change > args.fail_over:
+            regressions.append(f"{label}: p95 {p95_change:+.1f}%")
+
+    if regressions:
+        print("Regressões acima do limite:\n  " + "\n  ".join(regressions))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# Compara as métricas derivadas calculadas leitura a leitura (Python puro) com a versão vetorizada de
+# app.core.derived_metrics: python -m bench.derived --rows 1000000
+import argparse
+import math
+import random
+import time
+import numpy as np
+from app.core import derived_metrics
+
+def dew_point_row(temperature, humidity):
+    a, b = 17.625, 243.04
+    if temperature is None or humidity is None or humidity <= 0:
+        return None
+    gamma = math.log(humidity / 100) + a * temperature / (b + temperature)
+    return b * gamma / (a - gamma)
+
+def heat_index_row(temperature, humidity):
+    if temperature is None or humidity is None:
+        return None
+    f = temperature * 1.8 + 32
+    rh = humidity
+    simple = 0.5 * (f + 61 + (f - 68) * 1.2 + rh * 0.094)
+    if (simple + f) / 2 < 80:
+        return (simple - 32) / 1.8
+    full = (
+        -42.379 + 2.04901523 * f + 10.14333127 * rh - 0.22475541 * f * rh - 0.00683783 * f * f
+        - 0.05481717 * rh * rh + 0.00122874 * f * f * rh + 0.00085282 * f * rh * rh
+        - 0.00000199 * f * f * rh * rh
+    )
+    if rh < 13 and 80 <= f <= 112:
+        full -= (13 - rh) / 4 * math.sqrt(max((17 - abs(f - 95)) / 17, 0))
+    elif rh > 85 and 80 <= f <= 87:
+        full += (rh - 85) / 10 * (87 - f) / 5
+    return (full - 32) / 1.8
+
+def wind_chill_row(temperature, vel_wind):
+    if temperature is None or vel_wind is None:
+        return None
+    speed = vel_wind * 3.6
+    if temperature > 10 or speed <= 4.8:
+        return temperature
+    factor = speed ** 0.16
+    return 13.12 + 0.6215 * temperature - 11.37 * factor + 0.3965 * temperature * factor
+
+def apparent_temperature_row(temperature, humidity, vel_wind):
+    if temperature is None or humidity is None or vel_wind is None:
+        return None
+    vapour_pressure = humidity / 100 * 6.105 * math.exp(17.27 * temperature / (237.7 + temperature))
+    return temperature + 0.33 * vapour_pressure - 0.70 * vel_wind - 4.00
+
+def rain_rate_rows(rain_measure, times, controller_ids):
+    result = []
+    previous = None
+    for rain, moment, controller_id in zip(rain_measure, times, controller_ids):
+        if previous is None or previous[0] != controller_id or rain is None or moment <= previous[1]:
+            result.append(None)
+        else:
+            result.append(rain / ((moment - previous[1]) / 3600))
+        previous = (controller_id, moment)
+    return result
+
+def synthetic_columns(rows: int, controllers: int, seed: int) -> dict:
+    generator = random.Random(seed)
+    per_controller = max(rows // controllers, 1)
+    columns = {"controller_id": [], "time": [], "temperature": [], "humidity": [], "vel_wind": [], "rain_measure": []}
+    for index in range(rows):
+        columns["controller_id"].append(index // per_controller + 1)
+        columns["time"].append(1_700_000_000 + (index % per_controller) * 60)
+        columns["temperature"].append(round(generator.uniform(-10, 42), 1))
+        columns["humidity"].append(None if generator.random() < 0.01 else round(generator.uniform(5, 100), 1))
+        columns["vel_wind"].append(round(generator.uniform(0, 25), 1))
+        columns["rain_measure"].append(round(generator.expovariate(4), 2))
+    return columns
+
+def as_array(values) -> np.ndarray:
+    return np.array([np.nan if value is None else value for value in values], dtype=float)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.derived")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--controllers", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    columns = synthetic_columns(args.rows, args.controllers, args.seed)
+    t, h, v = columns["temperature"], columns["humidity"], columns["vel_wind"]
+    scalar = {
+        "dew_point": lambda: [dew_point_row(*row) for row in zip(t, h)],
+        "heat_index": lambda: [heat_index_row(*row) for row in zip(t, h)],
+        "wind_chill": lambda: [wind_chill_row(*row) for row in zip(t, v)],
+        "apparent_temperature": lambda: [apparent_temperature_row(*row) for row in zip(t, h, v)],
+        "rain_rate": lambda: rain_rate_rows(columns["rain_measure"], columns["time"], columns["controller_id"]),
+    }
+
+    # A conversão lista -> array acontece uma vez por consulta, para todas as métricas
+    started = time.perf_counter()
+    arrays = {name: derived_metrics.as_float_array(values) for name, values in columns.items()}
+    conversion_seconds = time.perf_counter() - started
+
+    print(f"{args.rows} leituras, {args.controllers} controladores (conversão para arrays: "
+          f"{conversion_seconds * 1000:.1f} ms)")
+    total_scalar = total_vector = 0.0
+    for metric, run in scalar.items():
+        started = time.perf_counter()
+        expected = run()
+        scalar_seconds = time.perf_counter() - started
+
+        needed = {name: arrays[name] for name in derived_metrics.required_columns([metric])}
+        started = time.perf_counter()
+        result = derived_metrics.compute(needed, [metric])[metric]
+        vector_seconds = time.perf_counter() - started
+
+        matches = np.allclose(result, as_array(expected), equal_nan=True)
+        total_scalar += scalar_seconds
+        total_vector += vector_seconds
+        print(f"    {metric:<22} python {scalar_seconds * 1000:9.1f} ms  numpy {vector_seconds * 1000:8.1f} ms  "
+              f"{scalar_seconds / vector_seconds:6.1f}x  {'ok' if matches else 'DIVERGENTE'}")
+    total_vector += conversion_seconds
+    print(f"    {'total + conversão':<22} python {total_scalar * 1000:9.1f} ms  numpy {total_vector * 1000:8.1f} ms  "
+          f"{total_scalar / total_vector:6.1f}x")
+
+if __name__ == "__main__":
+    main()
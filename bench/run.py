@@ -0,0 +1,295 @@
+# Benchmark de ingestão e consultas: popula um banco local, sobe app.main:app (bench.server) e reproduz
+# tráfego de estações (POST /data/) e dashboards (séries, páginas, agregados, metadados).
+# Uso: python -m bench.run --rows 200000 --duration 60 --output resultados.json
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlencode
+
+def percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)  # rótulo -> [(latência em s, status)]
+        self._lock = threading.Lock()
+        self.enabled = False
+
+    def add(self, label: str, seconds: float, status: int):
+        if self.enabled:
+            with self._lock:
+                self.samples[label].append((seconds, status))
+
+class Client:
+    def __init__(self, host: str, port: int, recorder: Recorder):
+        self.host, self.port, self.recorder = host, port, recorder
+        self.connection = http.client.HTTPConnection(host, port, timeout=60)
+
+    def request(self, label: str, method: str, path: str, body=None, headers=None):
+        headers = dict(headers or {})
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        started = time.perf_counter()
+        try:
+            self.connection.request(method, path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+            status = response.status
+            response_headers = dict(response.getheaders())
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            data, status, response_headers = b"", 599, {}
+        self.recorder.add(label, time.perf_counter() - started, status)
+        return status, response_headers, data
+
+def reading(rng: random.Random) -> dict:
+    return {
+        "temperature": round(rng.gauss(22, 6), 2),
+        "humidity": round(rng.uniform(20, 100), 1),
+        "dir_wind": rng.randrange(360),
+        "vel_wind": round(rng.expovariate(0.3), 2),
+        "pressure": rng.randint(990, 1030),
+        "rain_measure": 0.0,
+    }
+
+# Estação simulada: envia uma leitura a cada "interval" segundos (0 = o mais rápido possível)
+def station_worker(client: Client, key: str, interval: float, stop_at: float, rng: random.Random):
+    while time.monotonic() < stop_at:
+        client.request("POST /data/", "POST", "/data/", body=reading(rng), headers={"X-Controller-Key": key})
+        if interval > 0:
+            time.sleep(interval * rng.uniform(0.8, 1.2))
+
+def iso(value: datetime) -> str:
+    return value.isoformat().replace("+00:00", "Z")
+
+# Dashboard simulado: mistura de consultas de série temporal, paginação, agregados e metadados
+def dashboard_worker(client: Client, targets, days: float, stop_at: float, rng: random.Random):
+    scenarios = [
+        ("range", 30), ("pages", 20), ("aggregate_controller", 15), ("aggregate_location", 5),
+        ("latest", 15), ("locations", 5), ("controllers", 5), ("controller", 5),
+    ]
+    names = [name for name, _ in scenarios]
+    weights = [weight for _, weight in scenarios]
+    while time.monotonic() < stop_at:
+        controller_id, _, location_id = rng.choice(targets)
+        now = datetime.now(timezone.utc)
+        scenario = rng.choices(names, weights)[0]
+        if scenario == "range":
+            start = now - timedelta(hours=rng.uniform(1, days * 24))
+            query = urlencode({"start_time": iso(start), "end_time": iso(start + timedelta(hours=6)), "limit": 500})
+            client.request("GET /data/{controller_id}", "GET", f"/data/{controller_id}?{query}")
+        elif scenario == "pages":
+            cursor = None
+            for _ in range(5):
+                query = {"limit": 100, **({"after": cursor} if cursor else {})}
+                status, headers, _ = client.request(
+                    "GET /data/{controller_id}", "GET", f"/data/{controller_id}?{urlencode(query)}"
+                )
+                cursor = headers.get("X-Next-Cursor") or headers.get("x-next-cursor")
+                if status != 200 or not cursor:
+                    break
+        elif scenario in ("aggregate_controller", "aggregate_location"):
+            span, bucket = (timedelta(days=min(days, 7)), "1h") if scenario == "aggregate_controller" else (
+                timedelta(days=days), "1d"
+            )
+            start = (now - span).replace(minute=0, second=0, microsecond=0)
+            target = {"controller_id": controller_id} if scenario == "aggregate_controller" else {
+                "location_id": location_id
+            }
+            query = urlencode({"start_time": iso(start), "end_time": iso(now), "bucket": bucket, **target})
+            client.request("GET /data/aggregate", "GET", f"/data/aggregate?{query}")
+        elif scenario == "latest":
+            client.request("GET /data/latest", "GET", "/data/latest")
+        elif scenario == "locations":
+            client.request("GET /locations/", "GET", "/locations/")
+        elif scenario == "controllers":
+            client.request("GET /controllers/", "GET", "/controllers/")
+        else:
+            client.request("GET /controllers/{controller_id}", "GET", f"/controllers/{controller_id}")
+
+def run_traffic(args, targets, recorder: Recorder, seconds: float):
+    stop_at = time.monotonic() + seconds
+    threads = []
+    for index in range(args.stations):
+        _, key, _ = targets[index % len(targets)]
+        client = Client(args.host, args.port, recorder)
+        rng = random.Random(args.seed + index)
+        threads.append(threading.Thread(target=station_worker, args=(client, key, args.station_interval, stop_at, rng)))
+    for index in range(args.dashboards):
+        client = Client(args.host, args.port, recorder)
+        rng = random.Random(args.seed + 1000 + index)
+        threads.append(threading.Thread(target=dashboard_worker, args=(client, targets, args.days, stop_at, rng)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+def wait_for_server(host: str, port: int, process, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit("O servidor do benchmark encerrou durante a inicialização.")
+        try:
+            connection = http.client.HTTPConnection(host, port, timeout=2)
+            connection.request("GET", "/")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit("Tempo esgotado aguardando o servidor do benchmark.")
+
+def fetch_query_counts(host: str, port: int, reset: bool = False) -> dict:
+    connection = http.client.HTTPConnection(host, port, timeout=10)
+    connection.request("GET", f"/__bench__/queries?reset={'true' if reset else 'false'}")
+    return json.loads(connection.getresponse().read())
+
+def summarize(recorder: Recorder, query_counts: dict, duration: float) -> dict:
+    endpoints = {}
+    for label in sorted(recorder.samples):
+        samples = recorder.samples[label]
+        latencies = sorted(seconds * 1000 for seconds, _ in samples)
+        errors = sum(1 for _, status in samples if status >= 400)
+        counts = query_counts.get(label, {})
+        requests = counts.get("requests") or 0
+        endpoints[label] = {
+            "requests": len(samples),
+            "errors": errors,
+            "throughput_rps": round(len(samples) / duration, 2),
+            "p50_ms": round(percentile(latencies, 0.50), 3),
+            "p95_ms": round(percentile(latencies, 0.95), 3),
+            "p99_ms": round(percentile(latencies, 0.99), 3),
+            "mean_ms": round(sum(latencies) / len(latencies), 3),
+            "max_ms": round(latencies[-1], 3),
+            "db_queries": counts.get("queries", 0),
+            "db_queries_per_request": round(counts.get("queries", 0) / requests, 3) if requests else None,
+        }
+    total = sum(len(samples) for samples in recorder.samples.values())
+    return {
+        "endpoints": endpoints,
+        "totals": {
+            "requests": total,
+            "errors": sum(endpoint["errors"] for endpoint in endpoints.values()),
+            "throughput_rps": round(total / duration, 2),
+            "background_db_queries": query_counts.get("(background)", {}).get("queries", 0),
+        },
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+def print_table(results: dict):
+    print(f"{'endpoint':<38} {'req':>7} {'err':>5} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'q/req':>6}")
+    for label, values in results["endpoints"].items():
+        queries = values["db_queries_per_request"]
+        print(
+            f"{label:<38} {values['requests']:>7} {values['errors']:>5} {values['throughput_rps']:>8.1f} "
+            f"{values['p50_ms']:>9.2f} {values['p95_ms']:>9.2f} {values['p99_ms']:>9.2f} "
+            f"{queries if queries is not None else '-':>6}"
+        )
+    totals = results["totals"]
+    print(f"Total: {totals['requests']} requisições, {totals['errors']} erros, {totals['throughput_rps']} req/s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.run", description="Benchmark da API de Estações Meteorológicas")
+    parser.add_argument("--database-url", default=None, help="Padrão: SQLite temporário")
+    parser.add_argument("--reset", action="store_true", help="Recria as tabelas antes de popular (apaga os dados!)")
+    parser.add_argument("--skip-seed", action="store_true", help="Usa os dados já existentes no banco")
+    parser.add_argument("--locations", type=int, default=5)
+    parser.add_argument("--controllers", type=int, default=50)
+    parser.add_argument("--rows", type=int, default=200000, help="Total de leituras SME pré-carregadas")
+    parser.add_argument("--days", type=float, default=30, help="Período coberto pelas leituras pré-carregadas")
+    parser.add_argument("--stations", type=int, default=20, help="Estações simuladas enviando leituras")
+    parser.add_argument("--station-interval", type=float, default=1.0, help="Segundos entre envios (0 = contínuo)")
+    parser.add_argument("--dashboards", type=int, default=8, help="Clientes de dashboard simultâneos")
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--env", action="append", default=[], metavar="CHAVE=VALOR",
+                        help="Configuração extra da aplicação (ex: INGEST_WRITE_BEHIND_ENABLED=true)")
+    parser.add_argument("--output", default=None, help="Arquivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench-'), 'bench.db')}"
+    extra_env = dict(item.split("=", 1) for item in args.env)
+    os.environ.update(extra_env, DATABASE_URL=database_url)
+
+    # Importados após configurar o ambiente (Settings lê DATABASE_URL na importação)
+    from app import schema
+    from app.database import SessionLocal, engine
+    from bench.seed import load_targets, seed_database
+
+    if args.reset:
+        # Bancos anteriores às migrações são marcados antes de serem apagados
+        schema.upgrade(engine)
+        schema.downgrade(engine, "base")
+    schema.upgrade(engine)
+    if not args.skip_seed:
+        started = time.perf_counter()
+        inserted = seed_database(SessionLocal, args.locations, args.controllers, args.rows, args.days, random_seed=args.seed)
+        print(f"Banco populado com {inserted} leituras em {time.perf_counter() - started:.1f}s")
+    targets = load_targets(SessionLocal)
+    if not targets:
+        raise SystemExit("Nenhum controlador habilitado no banco; rode sem --skip-seed.")
+    engine.dispose()
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "bench.server", "--host", args.host, "--port", str(args.port)],
+        env={**os.environ},
+    )
+    try:
+        wait_for_server(args.host, args.port, server)
+        recorder = Recorder()
+        if args.warmup > 0:
+            run_traffic(args, targets, recorder, args.warmup)
+        fetch_query_counts(args.host, args.port, reset=True)
+        recorder.enabled = True
+        started = time.monotonic()
+        run_traffic(args, targets, recorder, args.duration)
+        elapsed = time.monotonic() - started
+        query_counts = fetch_query_counts(args.host, args.port)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    results = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": database_url.split("://", 1)[0],
+            "env": extra_env,
+            "args": {key: value for key, value in vars(args).items() if key not in ("database_url", "env")},
+            "duration_seconds": round(elapsed, 3),
+        },
+        **summarize(recorder, query_counts, elapsed),
+    }
+    print_table(results)
+    output = args.output or f"bench-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    with open(output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Resultados gravados em {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Popula o banco do benchmark com locais, controladores e leituras SME distribuídas no tempo
+import random
+import secrets
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import insert, select
+from app import models, rollups
+from app.core.config import settings
+
+def seed_database(session_factory, locations: int, controllers: int, rows: int, days: float,
+                  batch_size: int = 10000, random_seed: int = 42) -> int:
+    rng = random.Random(random_seed)
+    with session_factory() as db:
+        location_ids = db.execute(
+            insert(models.Location).returning(models.Location.id, sort_by_parameter_order=True),
+            [
+                {"name": f"Local {index}", "lat": rng.uniform(-33, 5), "lng": rng.uniform(-73, -35)}
+                for index in range(locations)
+            ]
+        ).scalars().all()
+        controller_ids = db.execute(
+            insert(models.Controller).returning(models.Controller.id, sort_by_parameter_order=True),
+            [
+                {
+                    "hw_desc": f"bench-{index}",
+                    "key": secrets.token_urlsafe(32),
+                    "enabled": True,
+                    "location_id": location_ids[index % len(location_ids)],
+                }
+                for index in range(controllers)
+            ]
+        ).scalars().all()
+        db.commit()
+
+        # Leituras em intervalos regulares por controlador, terminando agora
+        end = datetime.now(timezone.utc)
+        per_controller = max(rows // max(len(controller_ids), 1), 1)
+        step = timedelta(seconds=days * 86400 / per_controller)
+        batch = []
+        inserted = 0
+        for controller_id in controller_ids:
+            for index in range(per_controller):
+                batch.append({
+                    "controller_id": controller_id,
+                    "time": end - step * (per_controller - index),
+                    "temperature": round(rng.gauss(22, 6), 2),
+                    "humidity": round(rng.uniform(20, 100), 1),
+                    "dir_wind": rng.randrange(360),
+                    "vel_wind": round(rng.expovariate(0.3), 2),
+                    "pressure": rng.randint(990, 1030),
+                    "rain_measure": round(rng.expovariate(5), 2) if rng.random() < 0.1 else 0.0,
+                })
+                if len(batch) >= batch_size:
+                    db.execute(insert(models.SensorMeteoSME), batch)
+                    db.commit()
+                    inserted += len(batch)
+                    batch = []
+        if batch:
+            db.execute(insert(models.SensorMeteoSME), batch)
+            db.commit()
+            inserted += len(batch)
+
+        if settings.ROLLUPS_ENABLED:
+            rollups.mark_history_dirty(db)
+    if settings.ROLLUPS_ENABLED:
+        rollups.refresh_all_dirty(session_factory)
+    return inserted
+
+# Controladores habilitados e suas chaves (alvos do tráfego simulado)
+def load_targets(session_factory):
+    with session_factory() as db:
+        controllers = db.execute(
+            select(models.Controller.id, models.Controller.key, models.Controller.location_id)
+            .where(models.Controller.enabled.is_(True))
+            .order_by(models.Controller.id)
+        ).all()
+    return [tuple(row) for row in controllers]
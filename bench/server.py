@@ -0,0 +1,69 @@
+# Servidor do benchmark: app.main:app sob uvicorn, contando as consultas SQL executadas por rota.
+# Uso interno de bench.run (python -m bench.server --port 8765)
+import argparse
+import contextvars
+import threading
+from collections import defaultdict
+import uvicorn
+from sqlalchemy import event
+from app.database import all_engines
+from app.main import app
+
+_current_request = contextvars.ContextVar("bench_current_request", default=None)
+
+class QueryCounter:
+    def __init__(self, app):
+        self.app = app
+        self.counts = defaultdict(lambda: {"requests": 0, "queries": 0})
+        self._lock = threading.Lock()
+
+    def count_query(self, *_):
+        cell = _current_request.get()
+        if cell is not None:
+            cell[0] += 1
+        else:
+            # Consultas fora de requisições (refresher de rollups, fila write-behind, ...)
+            with self._lock:
+                self.counts["(background)"]["queries"] += 1
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/__bench__"):
+            return await self.app(scope, receive, send)
+        cell = [0]
+        token = _current_request.set(cell)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_request.reset(token)
+            route = scope.get("route")
+            label = f"{scope['method']} {route.path if route is not None else scope['path']}"
+            with self._lock:
+                self.counts[label]["requests"] += 1
+                self.counts[label]["queries"] += cell[0]
+
+    def snapshot(self, reset: bool = False) -> dict:
+        with self._lock:
+            result = {label: dict(values) for label, values in self.counts.items()}
+            if reset:
+                self.counts.clear()
+        return result
+
+counter = QueryCounter(app)
+
+for bench_engine in all_engines():
+    event.listen(bench_engine, "before_cursor_execute", counter.count_query)
+
+@app.get("/__bench__/queries", include_in_schema=False)
+def read_query_counts(reset: bool = False):
+    return counter.snapshot(reset=reset)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args(argv)
+    uvicorn.run(counter, host=args.host, port=args.port, log_level=args.log_level, access_log=False)
+
+if __name__ == "__main__":
+    main()
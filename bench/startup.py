@@ -0,0 +1,73 @@
+# Tempo até a primeira requisição: sobe app.main:app com uvicorn repetidas vezes e mede o intervalo entre o
+# início do processo e a primeira resposta 200 em --path (por padrão "/").
+# Uso: python -m bench.startup --database-url postgresql://... --runs 10 [--workers 4]
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+# Segundos até a primeira resposta 200 (None se o processo encerrar ou o tempo esgotar)
+def time_to_first_request(args, env: dict):
+    port = free_port()
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--log-level", "warning"]
+    if args.workers > 1:
+        command += ["--workers", str(args.workers)]
+    started = time.perf_counter()
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        while time.perf_counter() - started < args.timeout:
+            if process.poll() is not None:
+                return None, process.stderr.read().decode(errors="replace").strip().splitlines()[-1:]
+            try:
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+                connection.request("GET", args.path)
+                if connection.getresponse().status == 200:
+                    return time.perf_counter() - started, None
+            except OSError:
+                time.sleep(0.005)
+        return None, ["tempo esgotado"]
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.startup")
+    parser.add_argument("--database-url", default=None, help="Padrão: DATABASE_URL do ambiente")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--path", default="/")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--env", action="append", default=[], metavar="CHAVE=VALOR")
+    args = parser.parse_args(argv)
+
+    env = {**os.environ, **dict(item.split("=", 1) for item in args.env)}
+    if args.database_url:
+        env["DATABASE_URL"] = args.database_url
+
+    timings = []
+    for run in range(args.runs):
+        seconds, error = time_to_first_request(args, env)
+        if seconds is None:
+            print(f"execução {run + 1}: falhou ({' '.join(error or [])})")
+            continue
+        timings.append(seconds)
+        print(f"execução {run + 1}: {seconds * 1000:.0f} ms")
+    if timings:
+        print(f"mínimo {min(timings) * 1000:.0f} ms  mediana {statistics.median(timings) * 1000:.0f} ms  "
+              f"máximo {max(timings) * 1000:.0f} ms  ({len(timings)}/{args.runs} execuções)")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 CREATE DATABASE db_controller;
 
+-- Referência do esquema. Em bancos novos ou existentes use as migrações (python -m app.cli migrate, diretório
+-- migrations/), que devem ser mantidas em sincronia com este arquivo.
+
 -- Locais
 CREATE TABLE locations (
     id SERIAL PRIMARY KEY,
@@ -8,6 +11,9 @@ CREATE TABLE locations (
 	lng DOUBLE PRECISION NOT NULL
 );
 
+-- Consultas espaciais (/locations/within e /locations/nearest sem o índice em memória): point(lng, lat) <@ box
+CREATE INDEX ix_locations_point ON locations USING gist (point(lng, lat));
+
 -- Controladores (ex: Arduíno)
 CREATE TABLE controllers (
     id SERIAL PRIMARY KEY,
@@ -18,17 +24,120 @@ CREATE TABLE controllers (
 	location_id INTEGER NOT NULL REFERENCES locations(id)
 );
 
--- Estação Meteorológica da Educação
+CREATE UNIQUE INDEX ix_controllers_key ON controllers (key);
+CREATE INDEX ix_controllers_location_id ON controllers (location_id);
+
+-- Estação Meteorológica da Educação (particionada por mês em time; as partições dos próximos meses
+-- são criadas pela aplicação ou por "python -m app.cli partitions-maintain")
 CREATE TABLE sensors_meteo_sme (
-	id SERIAL PRIMARY KEY,
+	id SERIAL,
 	temperature FLOAT,
 	humidity FLOAT,
 	dir_wind INTEGER,
 	vel_wind FLOAT,
 	pressure INTEGER,
 	rain_measure FLOAT,
-	time TIMESTAMP DEFAULT now(),
-	controller_id INTEGER NOT NULL REFERENCES controllers(id)
+	time TIMESTAMPTZ NOT NULL DEFAULT now(),
+	controller_id INTEGER NOT NULL REFERENCES controllers(id),
+	PRIMARY KEY (id, time)
+) PARTITION BY RANGE (time);
+
+-- Recebe leituras fora das partições mensais existentes (ex: relógio do controlador desajustado)
+CREATE TABLE sensors_meteo_sme_default PARTITION OF sensors_meteo_sme DEFAULT;
+
+-- Único: reenvios da mesma leitura são ignorados na ingestão (ON CONFLICT DO NOTHING)
+CREATE UNIQUE INDEX ix_sensors_meteo_sme_controller_id_time ON sensors_meteo_sme (controller_id, time DESC);
+
+-- Rollups pré-agregados da Estação Meteorológica da Educação (1 minuto, 1 hora e 1 dia)
+CREATE TABLE sensors_meteo_sme_rollup_1m (
+	controller_id INTEGER NOT NULL REFERENCES controllers(id),
+	bucket TIMESTAMPTZ NOT NULL,
+	count INTEGER NOT NULL DEFAULT 0,
+	temperature_min FLOAT,
+	temperature_max FLOAT,
+	temperature_sum FLOAT,
+	temperature_count INTEGER NOT NULL DEFAULT 0,
+	humidity_min FLOAT,
+	humidity_max FLOAT,
+	humidity_sum FLOAT,
+	humidity_count INTEGER NOT NULL DEFAULT 0,
+	pressure_min FLOAT,
+	pressure_max FLOAT,
+	pressure_sum FLOAT,
+	pressure_count INTEGER NOT NULL DEFAULT 0,
+	vel_wind_min FLOAT,
+	vel_wind_max FLOAT,
+	vel_wind_sum FLOAT,
+	vel_wind_count INTEGER NOT NULL DEFAULT 0,
+	rain_measure_sum FLOAT,
+	rain_measure_count INTEGER NOT NULL DEFAULT 0,
+	dir_wind_sin_sum FLOAT,
+	dir_wind_cos_sum FLOAT,
+	dir_wind_count INTEGER NOT NULL DEFAULT 0,
+	PRIMARY KEY (controller_id, bucket)
+);
+
+CREATE TABLE sensors_meteo_sme_rollup_1h (
+	controller_id INTEGER NOT NULL REFERENCES controllers(id),
+	bucket TIMESTAMPTZ NOT NULL,
+	count INTEGER NOT NULL DEFAULT 0,
+	temperature_min FLOAT,
+	temperature_max FLOAT,
+	temperature_sum FLOAT,
+	temperature_count INTEGER NOT NULL DEFAULT 0,
+	humidity_min FLOAT,
+	humidity_max FLOAT,
+	humidity_sum FLOAT,
+	humidity_count INTEGER NOT NULL DEFAULT 0,
+	pressure_min FLOAT,
+	pressure_max FLOAT,
+	pressure_sum FLOAT,
+	pressure_count INTEGER NOT NULL DEFAULT 0,
+	vel_wind_min FLOAT,
+	vel_wind_max FLOAT,
+	vel_wind_sum FLOAT,
+	vel_wind_count INTEGER NOT NULL DEFAULT 0,
+	rain_measure_sum FLOAT,
+	rain_measure_count INTEGER NOT NULL DEFAULT 0,
+	dir_wind_sin_sum FLOAT,
+	dir_wind_cos_sum FLOAT,
+	dir_wind_count INTEGER NOT NULL DEFAULT 0,
+	PRIMARY KEY (controller_id, bucket)
+);
+
+CREATE TABLE sensors_meteo_sme_rollup_1d (
+	controller_id INTEGER NOT NULL REFERENCES controllers(id),
+	bucket TIMESTAMPTZ NOT NULL,
+	count INTEGER NOT NULL DEFAULT 0,
+	temperature_min FLOAT,
+	temperature_max FLOAT,
+	temperature_sum FLOAT,
+	temperature_count INTEGER NOT NULL DEFAULT 0,
+	humidity_min FLOAT,
+	humidity_max FLOAT,
+	humidity_sum FLOAT,
+	humidity_count INTEGER NOT NULL DEFAULT 0,
+	pressure_min FLOAT,
+	pressure_max FLOAT,
+	pressure_sum FLOAT,
+	pressure_count INTEGER NOT NULL DEFAULT 0,
+	vel_wind_min FLOAT,
+	vel_wind_max FLOAT,
+	vel_wind_sum FLOAT,
+	vel_wind_count INTEGER NOT NULL DEFAULT 0,
+	rain_measure_sum FLOAT,
+	rain_measure_count INTEGER NOT NULL DEFAULT 0,
+	dir_wind_sin_sum FLOAT,
+	dir_wind_cos_sum FLOAT,
+	dir_wind_count INTEGER NOT NULL DEFAULT 0,
+	PRIMARY KEY (controller_id, bucket)
+);
+
+-- Buckets de 1 minuto pendentes de reagregação
+CREATE TABLE sensors_meteo_sme_rollup_dirty (
+	controller_id INTEGER NOT NULL REFERENCES controllers(id),
+	bucket TIMESTAMPTZ NOT NULL,
+	PRIMARY KEY (controller_id, bucket)
 );
 
 -- Cargos (ex: Professor de Geografia)
@@ -56,10 +165,13 @@ CREATE TABLE persons (
     position_id INTEGER NOT NULL REFERENCES positions(id)
 );
 
+CREATE INDEX ix_persons_profile_id ON persons (profile_id);
+CREATE INDEX ix_persons_position_id ON persons (position_id);
+
 -- Relacionamento N:N entre Pessoas e Locais
 CREATE TABLE persons_locations (
     location_id INTEGER NOT NULL REFERENCES locations(id),
-    person_id INTEGER NOT NULL REFERENCES locations(id),
+    person_id INTEGER NOT NULL REFERENCES persons(id),
     PRIMARY KEY (person_id, location_id)
 );
 
@@ -72,6 +184,8 @@ CREATE TABLE forgot_passwords (
 	person_id INTEGER NOT NULL REFERENCES persons(id)
 );
 
+CREATE INDEX ix_forgot_passwords_person_id ON forgot_passwords (person_id);
+
 -- Registro de eventos
 CREATE TABLE log_events (
 	id SERIAL PRIMARY KEY,
@@ -80,6 +194,8 @@ CREATE TABLE log_events (
 	person_id INTEGER NOT NULL REFERENCES persons(id)
 );
 
+CREATE INDEX ix_log_events_person_id ON log_events (person_id);
+
 -- Sensores
 CREATE TABLE sensors (
 	id SERIAL PRIMARY KEY,
@@ -92,4 +208,6 @@ CREATE TABLE sensors_controllers (
 	sensor_id INTEGER NOT NULL REFERENCES sensors(id),
     controller_id INTEGER NOT NULL REFERENCES controllers(id),
     PRIMARY KEY (sensor_id, controller_id)
-);
\ No newline at end of file
+);
+
+CREATE INDEX ix_sensors_controllers_controller_id ON sensors_controllers (controller_id);
\ No newline at end of file
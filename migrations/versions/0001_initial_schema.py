@@ -0,0 +1,113 @@
+"""Esquema inicial (db_controller.sql original, anterior às migrações)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    postgresql = op.get_bind().dialect.name == "postgresql"
+
+    op.create_table(
+        "locations",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.Text, nullable=False),
+        sa.Column("lat", sa.Double, nullable=False),
+        sa.Column("lng", sa.Double, nullable=False),
+    )
+    op.create_table(
+        "controllers",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("hw_desc", sa.Text, nullable=False),
+        sa.Column("key", sa.Text, nullable=False),
+        sa.Column("enabled", sa.Boolean, nullable=False, server_default=sa.true()),
+        sa.Column("version", sa.Float),
+        sa.Column("location_id", sa.Integer, sa.ForeignKey("locations.id"), nullable=False),
+    )
+
+    # Sem o índice único (controller_id, time), os rollups e o particionamento, que vêm nas revisões seguintes
+    op.create_table(
+        "sensors_meteo_sme",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("temperature", sa.Float),
+        sa.Column("humidity", sa.Float),
+        sa.Column("dir_wind", sa.Integer),
+        sa.Column("vel_wind", sa.Float),
+        sa.Column("pressure", sa.Integer),
+        sa.Column("rain_measure", sa.Float),
+        sa.Column("time", sa.DateTime, server_default=sa.func.now()),
+        sa.Column("controller_id", sa.Integer, sa.ForeignKey("controllers.id"), nullable=False),
+    )
+
+    op.create_table(
+        "profiles",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.Text, nullable=False),
+    )
+    op.create_table(
+        "positions",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.Text, nullable=False),
+    )
+    op.create_table(
+        "persons",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.Text, nullable=False),
+        sa.Column("email", sa.Text, nullable=False, unique=True),
+        sa.Column("password", sa.Text, nullable=False),
+        sa.Column("enabled", sa.Boolean, nullable=False, server_default=sa.true()),
+        sa.Column("created_at", sa.DateTime, server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime, server_default=sa.func.now()),
+        sa.Column("profile_id", sa.Integer, sa.ForeignKey("profiles.id"), nullable=False),
+        sa.Column("position_id", sa.Integer, sa.ForeignKey("positions.id"), nullable=False),
+    )
+    # A chave estrangeira de person_id apontava para locations em db_controller.sql; corrigida em 0002
+    op.create_table(
+        "persons_locations",
+        sa.Column("location_id", sa.Integer, sa.ForeignKey("locations.id"), nullable=False),
+        sa.Column("person_id", sa.Integer, sa.ForeignKey("locations.id"), nullable=False),
+        sa.PrimaryKeyConstraint("person_id", "location_id"),
+    )
+    op.create_table(
+        "forgot_passwords",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("recovery_code", sa.Integer, nullable=False),
+        sa.Column(
+            "expire_in", sa.DateTime,
+            server_default=sa.text("(now() + INTERVAL '15 minutes')") if postgresql else None
+        ),
+        sa.Column("used", sa.Boolean, server_default=sa.false()),
+        sa.Column("person_id", sa.Integer, sa.ForeignKey("persons.id"), nullable=False),
+    )
+    op.create_table(
+        "log_events",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("description", sa.Text, nullable=False),
+        sa.Column("time", sa.DateTime, server_default=sa.func.now()),
+        sa.Column("person_id", sa.Integer, sa.ForeignKey("persons.id"), nullable=False),
+    )
+    op.create_table(
+        "sensors",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.Text, nullable=False),
+        sa.Column("type", sa.Text, nullable=False),
+    )
+    op.create_table(
+        "sensors_controllers",
+        sa.Column("sensor_id", sa.Integer, sa.ForeignKey("sensors.id"), primary_key=True),
+        sa.Column("controller_id", sa.Integer, sa.ForeignKey("controllers.id"), primary_key=True),
+    )
+
+def downgrade():
+    for table in (
+        "sensors_controllers", "sensors", "log_events", "forgot_passwords", "persons_locations", "persons",
+        "positions", "profiles", "sensors_meteo_sme", "controllers", "locations",
+    ):
+        op.drop_table(table)
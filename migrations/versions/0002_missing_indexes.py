@@ -0,0 +1,63 @@
+"""Índices das chaves estrangeiras e das consultas espaciais; chave estrangeira de persons_locations.person_id
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# (nome, tabela, colunas, único). Bancos criados pelo create_all da aplicação já podem ter índices
+# equivalentes (com outros nomes); esses são mantidos
+INDEXES = (
+    ("ix_controllers_key", "controllers", ["key"], True),
+    ("ix_controllers_location_id", "controllers", ["location_id"], False),
+    ("ix_persons_profile_id", "persons", ["profile_id"], False),
+    ("ix_persons_position_id", "persons", ["position_id"], False),
+    ("ix_forgot_passwords_person_id", "forgot_passwords", ["person_id"], False),
+    ("ix_log_events_person_id", "log_events", ["person_id"], False),
+    ("ix_sensors_controllers_controller_id", "sensors_controllers", ["controller_id"], False),
+)
+
+def has_equivalent_index(inspector, table: str, columns: list, unique: bool) -> bool:
+    for index in inspector.get_indexes(table):
+        if index["column_names"] == columns and (index["unique"] or not unique):
+            return True
+    return any(constraint["column_names"] == columns for constraint in inspector.get_unique_constraints(table))
+
+def upgrade():
+    bind = op.get_bind()
+    # Sem conexão (migrate --sql) não há como inspecionar o banco: só IF NOT EXISTS pelo nome
+    inspector = None if context.is_offline_mode() else sa.inspect(bind)
+    for name, table, columns, unique in INDEXES:
+        if inspector is None or not has_equivalent_index(inspector, table, columns, unique):
+            op.create_index(name, table, columns, unique=unique, if_not_exists=True)
+
+    if bind.dialect.name == "postgresql":
+        op.execute("CREATE INDEX IF NOT EXISTS ix_locations_point ON locations USING gist (point(lng, lat))")
+        # No SQLite as chaves estrangeiras não são verificadas por padrão e as tabelas criadas pelos modelos
+        # já apontam para persons
+        op.execute("ALTER TABLE persons_locations DROP CONSTRAINT IF EXISTS persons_locations_person_id_fkey")
+        op.create_foreign_key(
+            "persons_locations_person_id_fkey", "persons_locations", "persons", ["person_id"], ["id"]
+        )
+    else:
+        op.create_index("ix_locations_lat_lng", "locations", ["lat", "lng"], if_not_exists=True)
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.drop_constraint("persons_locations_person_id_fkey", "persons_locations", type_="foreignkey")
+        op.create_foreign_key(
+            "persons_locations_person_id_fkey", "persons_locations", "locations", ["person_id"], ["id"]
+        )
+        op.drop_index("ix_locations_point", table_name="locations", if_exists=True)
+    else:
+        op.drop_index("ix_locations_lat_lng", table_name="locations", if_exists=True)
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,66 @@
+"""Leituras: horário com fuso (UTC), sem duplicatas e índice único (controller_id, time DESC) da ingestão
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = "ix_sensors_meteo_sme_controller_id_time"
+
+# Bancos criados pelo create_all da aplicação já podem estar no formato novo; cada passo só é aplicado se preciso
+def has_unique_index(bind) -> bool:
+    if context.is_offline_mode():
+        return False
+    return any(
+        index["name"] == INDEX_NAME and index["unique"]
+        for index in sa.inspect(bind).get_indexes("sensors_meteo_sme")
+    )
+
+def upgrade():
+    bind = op.get_bind()
+    postgresql = bind.dialect.name == "postgresql"
+
+    if postgresql:
+        # No db_controller.sql original time era TIMESTAMP (sem fuso); a aplicação grava em UTC
+        op.execute("""
+            DO $$
+            BEGIN
+                IF (SELECT data_type FROM information_schema.columns
+                    WHERE table_schema = current_schema() AND table_name = 'sensors_meteo_sme'
+                      AND column_name = 'time') = 'timestamp without time zone' THEN
+                    ALTER TABLE sensors_meteo_sme ALTER COLUMN time TYPE timestamptz USING time AT TIME ZONE 'UTC';
+                END IF;
+            END $$
+        """)
+    # Leituras sem horário não aparecem em nenhuma consulta por período nem entram nos rollups
+    op.execute("DELETE FROM sensors_meteo_sme WHERE time IS NULL")
+    if postgresql:
+        op.execute("ALTER TABLE sensors_meteo_sme ALTER COLUMN time SET NOT NULL")
+
+    if has_unique_index(bind):
+        return
+    # Mantém a leitura de menor id de cada (controller_id, time); para tabelas grandes, rode antes
+    # "python -m app.cli readings-dedupe --skip-index", que remove as duplicatas em blocos
+    op.execute("""
+        DELETE FROM sensors_meteo_sme WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (PARTITION BY controller_id, time ORDER BY id) AS position
+                FROM sensors_meteo_sme
+            ) ranked WHERE position > 1
+        )
+    """)
+    op.drop_index(INDEX_NAME, table_name="sensors_meteo_sme", if_exists=True)
+    op.create_index(INDEX_NAME, "sensors_meteo_sme", ["controller_id", sa.text("time DESC")], unique=True)
+
+def downgrade():
+    op.drop_index(INDEX_NAME, table_name="sensors_meteo_sme", if_exists=True)
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("ALTER TABLE sensors_meteo_sme ALTER COLUMN time DROP NOT NULL")
+        op.execute("ALTER TABLE sensors_meteo_sme ALTER COLUMN time TYPE timestamp USING time AT TIME ZONE 'UTC'")
@@ -0,0 +1,71 @@
+"""Rollups de 1 minuto, 1 hora e 1 dia das leituras e fila de buckets sujos
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+ROLLUP_TABLES = ("sensors_meteo_sme_rollup_1m", "sensors_meteo_sme_rollup_1h", "sensors_meteo_sme_rollup_1d")
+ROLLUP_METRICS = ("temperature", "humidity", "pressure", "vel_wind")
+DIRTY_TABLE = "sensors_meteo_sme_rollup_dirty"
+
+def rollup_columns():
+    columns = [
+        sa.Column("controller_id", sa.Integer, sa.ForeignKey("controllers.id"), primary_key=True),
+        sa.Column("bucket", sa.DateTime(timezone=True), primary_key=True),
+        sa.Column("count", sa.Integer, nullable=False, server_default="0"),
+    ]
+    for metric in ROLLUP_METRICS:
+        columns += [
+            sa.Column(f"{metric}_min", sa.Float),
+            sa.Column(f"{metric}_max", sa.Float),
+            sa.Column(f"{metric}_sum", sa.Float),
+            sa.Column(f"{metric}_count", sa.Integer, nullable=False, server_default="0"),
+        ]
+    return columns + [
+        sa.Column("rain_measure_sum", sa.Float),
+        sa.Column("rain_measure_count", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("dir_wind_sin_sum", sa.Float),
+        sa.Column("dir_wind_cos_sum", sa.Float),
+        sa.Column("dir_wind_count", sa.Integer, nullable=False, server_default="0"),
+    ]
+
+def upgrade():
+    for table in ROLLUP_TABLES:
+        op.create_table(table, *rollup_columns(), if_not_exists=True)
+    op.create_table(
+        DIRTY_TABLE,
+        sa.Column("controller_id", sa.Integer, sa.ForeignKey("controllers.id"), primary_key=True),
+        sa.Column("bucket", sa.DateTime(timezone=True), primary_key=True),
+        if_not_exists=True,
+    )
+
+    # Marca todo o histórico para reagregação (o mesmo que "python -m app.cli rollups-backfill"): o refresher
+    # da aplicação preenche os rollups e, até lá, as consultas leem as leituras brutas dos buckets sujos.
+    # Buckets de 1 minuto com a mesma origem de app/rollups.py (2000-01-01 UTC, alinhada ao minuto)
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(f"""
+            INSERT INTO {DIRTY_TABLE} (controller_id, bucket)
+            SELECT DISTINCT controller_id, date_bin(interval '60 seconds', time, timestamptz '2000-01-01 00:00:00+00')
+            FROM sensors_meteo_sme
+            ON CONFLICT DO NOTHING
+        """)
+    else:
+        # Mesmo formato de texto usado pelo SQLAlchemy para DateTime no SQLite
+        op.execute(f"""
+            INSERT OR IGNORE INTO {DIRTY_TABLE} (controller_id, bucket)
+            SELECT DISTINCT controller_id, strftime('%Y-%m-%d %H:%M:00.000000', time)
+            FROM sensors_meteo_sme
+        """)
+
+def downgrade():
+    op.drop_table(DIRTY_TABLE)
+    for table in reversed(ROLLUP_TABLES):
+        op.drop_table(table)
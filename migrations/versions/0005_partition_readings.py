@@ -0,0 +1,111 @@
+"""Particionamento mensal (RANGE em time) de sensors_meteo_sme no PostgreSQL
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+# Uma tabela comum não pode ser convertida em particionada: as leituras são copiadas para uma tabela
+# particionada nova, com uma partição para cada mês que já tem leituras (as dos próximos meses são criadas pela
+# aplicação ou por "python -m app.cli partitions-maintain"). Os ids e a sequência são preservados. A cópia
+# reescreve a tabela inteira em uma transação, com as escritas bloqueadas: em bases grandes, pare a ingestão
+# durante a migração. Bancos já particionados (db_controller.sql) não são alterados.
+UPGRADE = """
+DO $$
+DECLARE
+    sequence_name text := pg_get_serial_sequence('sensors_meteo_sme', 'id');
+    month_start date;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = to_regclass('sensors_meteo_sme')) IS DISTINCT FROM 'r' THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE sensors_meteo_sme RENAME TO sensors_meteo_sme_unpartitioned;
+    ALTER TABLE sensors_meteo_sme_unpartitioned RENAME CONSTRAINT sensors_meteo_sme_pkey TO sensors_meteo_sme_unpartitioned_pkey;
+    ALTER INDEX ix_sensors_meteo_sme_controller_id_time RENAME TO ix_sensors_meteo_sme_unpartitioned_controller_id_time;
+
+    EXECUTE format($sql$
+        CREATE TABLE sensors_meteo_sme (
+            id INTEGER NOT NULL DEFAULT nextval(%L::regclass),
+            temperature FLOAT,
+            humidity FLOAT,
+            dir_wind INTEGER,
+            vel_wind FLOAT,
+            pressure INTEGER,
+            rain_measure FLOAT,
+            time TIMESTAMPTZ NOT NULL DEFAULT now(),
+            controller_id INTEGER NOT NULL REFERENCES controllers(id),
+            PRIMARY KEY (id, time)
+        ) PARTITION BY RANGE (time)
+    $sql$, sequence_name);
+    EXECUTE format('ALTER SEQUENCE %s OWNED BY sensors_meteo_sme.id', sequence_name);
+    CREATE TABLE sensors_meteo_sme_default PARTITION OF sensors_meteo_sme DEFAULT;
+
+    FOR month_start IN
+        SELECT DISTINCT date_trunc('month', time AT TIME ZONE 'UTC')::date FROM sensors_meteo_sme_unpartitioned
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF sensors_meteo_sme FOR VALUES FROM (%L) TO (%L)',
+            'sensors_meteo_sme_y' || to_char(month_start, 'YYYY') || 'm' || to_char(month_start, 'MM'),
+            month_start::text || ' 00:00:00+00', (month_start + interval '1 month')::date::text || ' 00:00:00+00'
+        );
+    END LOOP;
+
+    INSERT INTO sensors_meteo_sme (id, temperature, humidity, dir_wind, vel_wind, pressure, rain_measure, time, controller_id)
+    SELECT id, temperature, humidity, dir_wind, vel_wind, pressure, rain_measure, time, controller_id
+    FROM sensors_meteo_sme_unpartitioned;
+    DROP TABLE sensors_meteo_sme_unpartitioned;
+    CREATE UNIQUE INDEX ix_sensors_meteo_sme_controller_id_time ON sensors_meteo_sme (controller_id, time DESC);
+END $$
+"""
+
+# Volta para uma tabela comum com as leituras das partições ainda anexadas (as arquivadas pela retenção
+# continuam no schema de arquivo)
+DOWNGRADE = """
+DO $$
+DECLARE
+    sequence_name text := pg_get_serial_sequence('sensors_meteo_sme', 'id');
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = to_regclass('sensors_meteo_sme')) IS DISTINCT FROM 'p' THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE sensors_meteo_sme RENAME TO sensors_meteo_sme_partitioned;
+    ALTER TABLE sensors_meteo_sme_partitioned RENAME CONSTRAINT sensors_meteo_sme_pkey TO sensors_meteo_sme_partitioned_pkey;
+    ALTER INDEX ix_sensors_meteo_sme_controller_id_time RENAME TO ix_sensors_meteo_sme_partitioned_controller_id_time;
+
+    EXECUTE format($sql$
+        CREATE TABLE sensors_meteo_sme (
+            id INTEGER PRIMARY KEY DEFAULT nextval(%L::regclass),
+            temperature FLOAT,
+            humidity FLOAT,
+            dir_wind INTEGER,
+            vel_wind FLOAT,
+            pressure INTEGER,
+            rain_measure FLOAT,
+            time TIMESTAMPTZ NOT NULL DEFAULT now(),
+            controller_id INTEGER NOT NULL REFERENCES controllers(id)
+        )
+    $sql$, sequence_name);
+    EXECUTE format('ALTER SEQUENCE %s OWNED BY sensors_meteo_sme.id', sequence_name);
+    INSERT INTO sensors_meteo_sme (id, temperature, humidity, dir_wind, vel_wind, pressure, rain_measure, time, controller_id)
+    SELECT id, temperature, humidity, dir_wind, vel_wind, pressure, rain_measure, time, controller_id
+    FROM sensors_meteo_sme_partitioned;
+    DROP TABLE sensors_meteo_sme_partitioned;
+    CREATE UNIQUE INDEX ix_sensors_meteo_sme_controller_id_time ON sensors_meteo_sme (controller_id, time DESC);
+END $$
+"""
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(UPGRADE)
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(DOWNGRADE)
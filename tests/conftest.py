@@ -0,0 +1,36 @@
+# Testes com banco SQLite temporário (ou TEST_DATABASE_URL), com o esquema criado pelas migrações.
+# O DATABASE_URL precisa ser definido antes da importação de app.core.config
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL") or "sqlite:///" + os.path.join(
+    tempfile.mkdtemp(prefix="estacao-tests-"), "tests.db"
+)
+
+import pytest
+from fastapi.testclient import TestClient
+
+@pytest.fixture(scope="session")
+def app():
+    from app import schema
+    from app.database import engine
+    from app.main import app as application
+
+    schema.upgrade(engine)
+    return application
+
+# Sem o "with" o lifespan (espera pelo banco e tarefas de fundo) não é executado
+@pytest.fixture
+def client(app):
+    return TestClient(app)
+
+# Cria um local e um controlador novos a cada chamada (os testes compartilham o banco da sessão)
+@pytest.fixture
+def create_controller(client):
+    def create(**fields):
+        location = client.post("/locations/", json={"name": "Escola", "lat": -25.4, "lng": -49.2}).json()
+        controller = client.post("/controllers/", json={"location_id": location["id"], "hw_desc": "arduino"}).json()
+        if fields:
+            controller = client.patch(f"/controllers/{controller['id']}", json=fields).json()
+        return controller
+    return create
@@ -0,0 +1,39 @@
+# Limites de GET /data/aggregate: as métricas derivadas carregam as leituras brutas do período, limitadas a
+# AGGREGATE_DERIVED_MAX_ROWS (por local, somando todos os controladores)
+from datetime import datetime, timedelta, timezone
+from app.core.config import settings
+
+BASE_TIME = datetime(2026, 9, 5, 0, 0, tzinfo=timezone.utc)
+VALUES = {"temperature": 24.0, "humidity": 65.0, "dir_wind": 270, "vel_wind": 4.0, "pressure": 1012, "rain_measure": 0.0}
+
+def location_with_readings(client, create_controller, per_controller: int):
+    controllers = [create_controller() for _ in range(2)]
+    location_id = controllers[0]["location_id"]
+    for controller in controllers:
+        client.patch(f"/controllers/{controller['id']}", json={"location_id": location_id})
+        readings = [{**VALUES, "time": (BASE_TIME + timedelta(minutes=index)).isoformat()} for index in range(per_controller)]
+        client.post("/data/batch", json={"readings": readings}, headers={"X-Controller-Key": controller["key"]})
+    return location_id
+
+def aggregate(client, location_id: int, metrics):
+    return client.get("/data/aggregate", params={
+        "location_id": location_id, "start_time": BASE_TIME.isoformat(),
+        "end_time": (BASE_TIME + timedelta(hours=1)).isoformat(), "bucket": "15m", "metrics": metrics,
+    })
+
+def test_derived_metrics_row_limit(client, create_controller, monkeypatch):
+    location_id = location_with_readings(client, create_controller, per_controller=6)
+
+    monkeypatch.setattr(settings, "AGGREGATE_DERIVED_MAX_ROWS", 12)
+    response = aggregate(client, location_id, ["temperature", "dew_point"])
+    assert response.status_code == 200
+    assert sum(response.json()["count"]) == 12
+    assert all(value is not None for value in response.json()["series"]["dew_point_avg"])
+
+    monkeypatch.setattr(settings, "AGGREGATE_DERIVED_MAX_ROWS", 11)
+    response = aggregate(client, location_id, ["temperature", "dew_point"])
+    assert response.status_code == 400
+    assert "11" in response.json()["detail"]
+
+    # Sem métricas derivadas o limite não se aplica (agregação no banco)
+    assert aggregate(client, location_id, ["temperature"]).status_code == 200
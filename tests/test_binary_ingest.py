@@ -0,0 +1,113 @@
+# Ingestão binária (POST /data/binary): paridade com a ingestão JSON em lote e rejeição de pacotes inválidos
+from datetime import datetime, timedelta, timezone
+import pytest
+from app import models
+from app.core import binary_protocol
+from app.core.aggregation import as_utc
+from app.database import SessionLocal
+
+BASE_TIME = datetime(2026, 9, 1, 12, 0, tzinfo=timezone.utc)
+
+# Valores representáveis exatamente nas escalas do protocolo (centésimos e décimos de hPa)
+READINGS = [
+    {"temperature": 21.37, "humidity": 60.5, "dir_wind": 90, "vel_wind": 3.25, "pressure": 1013, "rain_measure": 0.0},
+    {"temperature": -5.25, "humidity": 99.99, "dir_wind": 359, "vel_wind": 0.0, "pressure": 987, "rain_measure": 0.2},
+    {"temperature": 38.0, "humidity": 12.34, "dir_wind": 0, "vel_wind": 17.8, "pressure": 1020, "rain_measure": 12.75},
+]
+READINGS = [{**reading, "time": BASE_TIME + timedelta(seconds=60 * index)} for index, reading in enumerate(READINGS)]
+
+FIELDS = ("temperature", "humidity", "dir_wind", "vel_wind", "pressure", "rain_measure")
+
+def stored_readings(controller_id: int):
+    with SessionLocal() as db:
+        rows = db.query(models.SensorMeteoSME).filter(
+            models.SensorMeteoSME.controller_id == controller_id
+        ).order_by(models.SensorMeteoSME.time).all()
+        return [{**{field: getattr(row, field) for field in FIELDS}, "time": as_utc(row.time)} for row in rows]
+
+def post_binary(client, payload: bytes):
+    return client.post("/data/binary", content=payload, headers={"Content-Type": "application/octet-stream"})
+
+def valid_payload(key: str) -> bytes:
+    return binary_protocol.encode_readings(binary_protocol.controller_token(key), READINGS, base_time=BASE_TIME)
+
+def test_binary_matches_json_batch(client, create_controller):
+    binary_controller = create_controller()
+    json_controller = create_controller()
+
+    response = post_binary(client, valid_payload(binary_controller["key"]))
+    assert response.status_code == 200
+    assert response.json()["accepted"] == len(READINGS)
+
+    batch = {"readings": [{**reading, "time": reading["time"].isoformat()} for reading in READINGS]}
+    response = client.post("/data/batch", json=batch, headers={"X-Controller-Key": json_controller["key"]})
+    assert response.status_code == 200
+    assert response.json()["accepted"] == len(READINGS)
+
+    binary_rows = stored_readings(binary_controller["id"])
+    assert len(binary_rows) == len(READINGS)
+    assert binary_rows == stored_readings(json_controller["id"])
+
+# Controlador sem relógio (base_time omitido): os intervalos entre as leituras são preservados e a última
+# recebe o horário do servidor
+def test_binary_clockless_round_trip(client, create_controller):
+    now = datetime(2026, 9, 2, 8, 30, tzinfo=timezone.utc)
+    token, rows = binary_protocol.decode_readings(binary_protocol.encode_readings(b"t" * 8, READINGS), now=now)
+    assert token == b"t" * 8
+    assert [row["time"] for row in rows] == [now - timedelta(seconds=120), now - timedelta(seconds=60), now]
+    assert [{field: row[field] for field in FIELDS} for row in rows] == [
+        {field: reading[field] for field in FIELDS} for reading in READINGS
+    ]
+
+    controller = create_controller()
+    payload = binary_protocol.encode_readings(binary_protocol.controller_token(controller["key"]), READINGS)
+    assert post_binary(client, payload).json()["accepted"] == len(READINGS)
+    stored_times = [row["time"] for row in stored_readings(controller["id"])]
+    assert len(stored_times) == len(READINGS)
+    assert stored_times[2] - stored_times[0] == timedelta(seconds=120)
+
+@pytest.mark.parametrize("gap", [
+    pytest.param(timedelta(seconds=binary_protocol.MAX_DELTA_SECONDS + 1), id="too-long"),
+    pytest.param(timedelta(seconds=-60), id="out-of-order"),
+])
+def test_binary_encode_rejects_gap_out_of_range(gap):
+    readings = [READINGS[0], {**READINGS[1], "time": READINGS[0]["time"] + gap}]
+    with pytest.raises(ValueError, match="Leitura 1"):
+        binary_protocol.encode_readings(b"t" * 8, readings, base_time=BASE_TIME)
+
+def test_binary_resend_is_ignored(client, create_controller):
+    controller = create_controller()
+    payload = valid_payload(controller["key"])
+
+    assert post_binary(client, payload).status_code == 200
+    assert post_binary(client, payload).status_code == 200
+    assert len(stored_readings(controller["id"])) == len(READINGS)
+
+@pytest.mark.parametrize("corrupt", [
+    pytest.param(lambda payload: b"XX" + payload[2:], id="bad-magic"),
+    pytest.param(lambda payload: payload[:2] + bytes([2]) + payload[3:], id="bad-version"),
+    pytest.param(lambda payload: payload[:-1], id="truncated"),
+    pytest.param(lambda payload: payload + b"\x00", id="trailing-byte"),
+    pytest.param(lambda payload: payload[:binary_protocol.HEADER.size - 1], id="short-header"),
+])
+def test_binary_rejects_malformed_payload(client, create_controller, corrupt):
+    controller = create_controller()
+
+    response = post_binary(client, corrupt(valid_payload(controller["key"])))
+    assert response.status_code == 400
+    assert stored_readings(controller["id"]) == []
+
+@pytest.mark.parametrize("token", [
+    pytest.param(b"\x00" * binary_protocol.TOKEN_SIZE, id="unknown"),
+    pytest.param(binary_protocol.controller_token("chave-errada"), id="wrong-key"),
+])
+def test_binary_rejects_unknown_token(client, token):
+    response = post_binary(client, binary_protocol.encode_readings(token, READINGS, base_time=BASE_TIME))
+    assert response.status_code == 401
+
+def test_binary_rejects_disabled_controller(client, create_controller):
+    controller = create_controller(enabled=False)
+
+    response = post_binary(client, valid_payload(controller["key"]))
+    assert response.status_code == 401
+    assert stored_readings(controller["id"]) == []
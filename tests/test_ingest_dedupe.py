@@ -0,0 +1,118 @@
+# Ingestão idempotente (janela de leituras recentes + ON CONFLICT DO NOTHING no índice único) e remoção em blocos
+# das duplicatas já gravadas (app/dedupe.py, "python -m app.cli readings-dedupe")
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import func, text
+from sqlalchemy.exc import IntegrityError
+from app import dedupe, models
+from app.core.recent_readings import recent_readings
+from app.database import SessionLocal
+from app.rollups import ROLLUP_LEVELS, floor_time
+
+BASE_TIME = datetime(2026, 9, 3, 6, 0, tzinfo=timezone.utc)
+VALUES = {"temperature": 18.5, "humidity": 70.0, "dir_wind": 180, "vel_wind": 2.5, "pressure": 1009, "rain_measure": 0.0}
+
+def reading(minute: int) -> dict:
+    return {**VALUES, "time": (BASE_TIME + timedelta(minutes=minute)).isoformat()}
+
+def count_readings(controller_id: int) -> int:
+    with SessionLocal() as db:
+        return db.query(models.SensorMeteoSME).filter(models.SensorMeteoSME.controller_id == controller_id).count()
+
+# Com a janela limpa o reenvio chega ao banco e é descartado pelo ON CONFLICT (outra réplica da API, reinício)
+@pytest.fixture(params=["recent-window", "on-conflict"])
+def replay(request):
+    return recent_readings.clear if request.param == "on-conflict" else (lambda: None)
+
+def test_replayed_reading_is_not_inserted(client, create_controller, replay):
+    controller = create_controller()
+    headers = {"X-Controller-Key": controller["key"]}
+
+    first = client.post("/data/", json=reading(0), headers=headers)
+    assert first.status_code == 200
+    replay()
+    again = client.post("/data/", json=reading(0), headers=headers)
+    assert again.status_code == 200
+    assert again.json()["id"] == first.json()["id"]
+    assert count_readings(controller["id"]) == 1
+
+def test_replayed_batch_is_reported_as_duplicates(client, create_controller, replay):
+    controller = create_controller()
+    headers = {"X-Controller-Key": controller["key"]}
+    batch = {"readings": [reading(0), reading(1), reading(2)]}
+
+    result = client.post("/data/batch", json=batch, headers=headers).json()
+    assert (result["accepted"], result["duplicates"]) == (3, 0)
+    replay()
+    result = client.post("/data/batch", json={"readings": batch["readings"] + [reading(3)]}, headers=headers).json()
+    assert (result["accepted"], result["duplicates"]) == (4, 3)
+    assert count_readings(controller["id"]) == 4
+
+def test_repeated_readings_inside_a_batch(client, create_controller):
+    controller = create_controller()
+
+    result = client.post(
+        "/data/batch", json={"readings": [reading(0), reading(0), reading(1)]},
+        headers={"X-Controller-Key": controller["key"]}
+    ).json()
+    assert (result["accepted"], result["duplicates"]) == (3, 1)
+    assert count_readings(controller["id"]) == 2
+
+@pytest.fixture
+def without_unique_index():
+    with SessionLocal() as db:
+        db.execute(text(f'DROP INDEX "{dedupe.INDEX_NAME}"'))
+        db.execute(text(
+            f'CREATE INDEX "{dedupe.INDEX_NAME}" ON "{models.SensorMeteoSME.__tablename__}" (controller_id, time DESC)'
+        ))
+        db.commit()
+    try:
+        yield
+    finally:
+        with SessionLocal() as db:
+            dedupe.ensure_unique_index(db)
+
+# Leituras gravadas antes do índice único: pares repetidos espalhados por vários blocos de IDs
+def test_dedupe_readings_across_chunks(create_controller, without_unique_index):
+    controller_id = create_controller()["id"]
+    minutes = [0, 1, 2, 0, 1, 0, 2, 3]
+    with SessionLocal() as db:
+        rows = [models.SensorMeteoSME(**VALUES, controller_id=controller_id, time=BASE_TIME + timedelta(minutes=minute))
+                for minute in minutes]
+        db.add_all(rows)
+        db.commit()
+        ids = [row.id for row in rows]
+        db.query(models.SensorMeteoSMERollupDirty).filter(
+            models.SensorMeteoSMERollupDirty.controller_id == controller_id
+        ).delete()
+        db.commit()
+
+        with pytest.raises(IntegrityError):
+            dedupe.ensure_unique_index(db)
+        db.rollback()
+        assert not dedupe.has_unique_index(db)
+        min_id, max_id = db.query(func.min(models.SensorMeteoSME.id), func.max(models.SensorMeteoSME.id)).one()
+
+    chunks_seen = []
+    removed, chunks = dedupe.dedupe_readings(
+        SessionLocal, chunk_size=2, progress=lambda *chunk: chunks_seen.append(chunk)
+    )
+    assert removed == 4
+    assert chunks == len(range(min_id, max_id + 1, 2)) == len(chunks_seen)
+    assert sum(1 for *_, found in chunks_seen if found) >= 2
+
+    with SessionLocal() as db:
+        kept = db.query(models.SensorMeteoSME.id).filter(
+            models.SensorMeteoSME.controller_id == controller_id
+        ).order_by(models.SensorMeteoSME.id).all()
+        assert [row.id for row in kept] == [ids[0], ids[1], ids[2], ids[7]]
+        dirty = db.query(models.SensorMeteoSMERollupDirty.bucket).filter(
+            models.SensorMeteoSMERollupDirty.controller_id == controller_id
+        ).all()
+        assert {floor_time(row.bucket, ROLLUP_LEVELS[0][0]) for row in dirty} == {
+            BASE_TIME + timedelta(minutes=minute) for minute in (0, 1, 2)
+        }
+
+        assert dedupe.ensure_unique_index(db) is True
+        assert dedupe.has_unique_index(db)
+        assert dedupe.ensure_unique_index(db) is False
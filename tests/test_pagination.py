@@ -0,0 +1,79 @@
+# Paginação por cursor (keyset em time, id) de GET /data/{controller_id}: seguir X-Next-Cursor percorre todas as
+# leituras sem pular nem repetir, mesmo com leituras novas chegando entre as páginas
+import base64
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.core import pagination
+
+BASE_TIME = datetime(2026, 9, 4, 0, 0, 0, 250000, tzinfo=timezone.utc)
+VALUES = {"temperature": 20.0, "humidity": 55.0, "dir_wind": 45, "vel_wind": 1.5, "pressure": 1011, "rain_measure": 0.0}
+
+def post_readings(client, controller: dict, seconds):
+    readings = [{**VALUES, "time": (BASE_TIME + timedelta(seconds=offset)).isoformat()} for offset in seconds]
+    response = client.post("/data/batch", json={"readings": readings}, headers={"X-Controller-Key": controller["key"]})
+    assert response.json()["accepted"] == len(readings)
+
+def follow_cursor(client, controller_id: int, limit: int, on_page=None, **params):
+    pages = []
+    after = None
+    while True:
+        response = client.get(f"/data/{controller_id}", params={**params, "limit": limit, **({"after": after} if after else {})})
+        assert response.status_code == 200
+        pages.append(response.json())
+        if on_page is not None:
+            on_page(len(pages))
+        after = response.headers.get("X-Next-Cursor")
+        if after is None:
+            return pages
+        assert len(pages) < 100
+
+def test_cursor_pages_cover_every_reading_once(client, create_controller):
+    controller = create_controller()
+    # Intervalos com frações de segundo: o cursor precisa preservar os microssegundos
+    post_readings(client, controller, [index * 61.5 for index in range(23)])
+
+    pages = follow_cursor(client, controller["id"], limit=5)
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    readings = [reading for page in pages for reading in page]
+    assert len({reading["id"] for reading in readings}) == 23
+    assert readings == sorted(readings, key=lambda reading: (reading["time"], reading["id"]), reverse=True)
+
+# Página exatamente cheia no fim: a última página vem vazia e sem cursor
+def test_cursor_last_full_page(client, create_controller):
+    controller = create_controller()
+    post_readings(client, controller, range(0, 600, 60))
+
+    pages = follow_cursor(client, controller["id"], limit=5)
+    assert [len(page) for page in pages] == [5, 5, 0]
+
+def test_cursor_with_new_readings_between_pages(client, create_controller):
+    controller = create_controller()
+    post_readings(client, controller, range(0, 1200, 60))
+
+    def write_newer(page_number):
+        post_readings(client, controller, [3600 + page_number])
+    pages = follow_cursor(client, controller["id"], limit=6, on_page=write_newer)
+    readings = [reading for page in pages for reading in page]
+    assert len(readings) == len({reading["id"] for reading in readings}) == 20
+    assert readings[-1]["time"].startswith("2026-09-04T00:00:00.25")
+
+def test_cursor_with_time_range(client, create_controller):
+    controller = create_controller()
+    post_readings(client, controller, range(0, 1800, 60))
+    start, end = BASE_TIME + timedelta(minutes=5), BASE_TIME + timedelta(minutes=20)
+
+    pages = follow_cursor(client, controller["id"], limit=4, start_time=start.isoformat(), end_time=end.isoformat())
+    readings = [reading for page in pages for reading in page]
+    assert len(readings) == len({reading["id"] for reading in readings}) == 16
+
+@pytest.mark.parametrize("after", [
+    pytest.param("nao-e-um-cursor", id="not-base64-json"),
+    pytest.param(base64.urlsafe_b64encode(b'["ontem", 1]').decode(), id="bad-time"),
+    pytest.param(base64.urlsafe_b64encode(b'{"time": 1}').decode(), id="bad-shape"),
+    pytest.param(pagination.encode_cursor(BASE_TIME, 1)[:-3], id="truncated"),
+])
+def test_invalid_cursor_returns_400(client, create_controller, after):
+    controller = create_controller()
+
+    response = client.get(f"/data/{controller['id']}", params={"after": after})
+    assert response.status_code == 400
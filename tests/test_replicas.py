@@ -0,0 +1,117 @@
+# Roteamento de leituras para réplicas (app/core/replicas.py) com dois bancos SQLite como réplicas
+import asyncio
+import threading
+import time
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+from app import database
+from app.core.replicas import READ_PRIMARY_COOKIE, ReplicaRouter, run_lag_checks
+
+def sqlite_factory(path, name=None):
+    engine = create_engine(f"sqlite:///{path}")
+    if name is not None:
+        with engine.begin() as connection:
+            connection.execute(text("CREATE TABLE instance (name TEXT)"))
+            connection.execute(text("INSERT INTO instance VALUES (:name)"), {"name": name})
+    return sessionmaker(bind=engine)
+
+@pytest.fixture
+def replica_router(tmp_path):
+    return ReplicaRouter([
+        ("replica_0", sqlite_factory(tmp_path / "replica_0.db", "replica_0")),
+        ("replica_1", sqlite_factory(tmp_path / "replica_1.db", "replica_1")),
+    ], max_lag_seconds=5)
+
+def read_request(read_primary_until=None):
+    headers = []
+    if read_primary_until is not None:
+        headers.append((b"cookie", f"{READ_PRIMARY_COOKIE}={read_primary_until}".encode()))
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+def instance_name(session_factory):
+    with session_factory() as db:
+        return db.execute(text("SELECT name FROM instance")).scalar()
+
+def test_round_robin_between_replicas(replica_router, monkeypatch):
+    monkeypatch.setattr(database, "replica_router", replica_router)
+    replica_router.check()
+
+    names = [instance_name(database.get_read_session_factory(read_request())) for _ in range(4)]
+    assert names == ["replica_0", "replica_1", "replica_0", "replica_1"]
+    assert [replica["reads"] for replica in replica_router.stats()["replicas"]] == [2, 2]
+
+def test_lagging_replica_is_skipped(replica_router, monkeypatch):
+    lags = {"replica_0": 30.0, "replica_1": 0.5}
+    monkeypatch.setattr(replica_router, "measure_lag", lambda replica: lags[replica.name])
+    replica_router.check()
+    assert [replica_router.choose().name for _ in range(3)] == ["replica_1"] * 3
+
+    lags["replica_1"] = 6.0
+    replica_router.check()
+    assert replica_router.choose() is None
+    assert replica_router.fallbacks == 1
+
+def test_unknown_lag_is_not_healthy(replica_router, monkeypatch):
+    monkeypatch.setattr(replica_router, "measure_lag", lambda replica: None)
+    replica_router.check()
+    assert replica_router.choose() is None
+
+def test_unreachable_replica_falls_back(tmp_path, monkeypatch):
+    replica_router = ReplicaRouter([
+        ("missing", sqlite_factory(tmp_path / "sem-diretorio" / "replica.db")),
+        ("replica_1", sqlite_factory(tmp_path / "replica_1.db", "replica_1")),
+    ], max_lag_seconds=5)
+    replica_router.check()
+    assert [replica["healthy"] for replica in replica_router.stats()["replicas"]] == [False, True]
+    assert [replica_router.choose().name for _ in range(2)] == ["replica_1"] * 2
+
+    monkeypatch.setattr(database, "replica_router", ReplicaRouter([
+        ("missing", sqlite_factory(tmp_path / "sem-diretorio" / "replica.db")),
+    ], max_lag_seconds=5))
+    database.replica_router.check()
+    assert database.get_read_session_factory(read_request()) is database.SessionLocal
+    assert database.replica_router.stats()["primary_reads"] == 1
+
+@pytest.mark.parametrize("cookie, expected", [
+    pytest.param(lambda: time.time() + 60, "primary", id="recent-write"),
+    pytest.param(lambda: time.time() - 1, "replica", id="expired"),
+    pytest.param(lambda: "invalido", "replica", id="invalid"),
+    pytest.param(lambda: None, "replica", id="absent"),
+])
+def test_read_primary_until_cookie(replica_router, monkeypatch, cookie, expected):
+    monkeypatch.setattr(database, "replica_router", replica_router)
+    replica_router.check()
+
+    session_factory = database.get_read_session_factory(read_request(cookie()))
+    assert (session_factory is database.SessionLocal) == (expected == "primary")
+    assert replica_router.stats()["primary_reads"] == (1 if expected == "primary" else 0)
+
+# A medição roda na tarefa de fundo: choose() não abre conexões, e uma réplica que trava não atrasa as outras
+def test_lag_checks_run_in_background(replica_router, monkeypatch):
+    measure_lag = replica_router.measure_lag
+    release = threading.Event()
+
+    def hanging_measure_lag(replica):
+        if replica.name == "replica_0":
+            release.wait(5)
+        return measure_lag(replica)
+    monkeypatch.setattr(replica_router, "measure_lag", hanging_measure_lag)
+
+    async def scenario():
+        assert replica_router.choose() is None
+        task = asyncio.create_task(run_lag_checks(replica_router, 0.01))
+        try:
+            for _ in range(200):
+                if replica_router.replicas[1].healthy:
+                    break
+                await asyncio.sleep(0.01)
+            assert not replica_router.replicas[0].healthy
+            assert replica_router.choose().name == "replica_1"
+        finally:
+            release.set()
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
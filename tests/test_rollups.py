@@ -0,0 +1,82 @@
+# Agregados servidos pelos rollups (miolo alinhado) junto com as leituras brutas (bordas não alinhadas e buckets
+# sujos) devem ser iguais aos calculados só com as leituras brutas
+from datetime import datetime, timedelta, timezone
+import pytest
+from app import rollups
+from app.core.config import settings
+from app.database import SessionLocal
+
+BASE_TIME = datetime(2026, 8, 1, tzinfo=timezone.utc)
+METRICS = ["temperature", "humidity", "dir_wind", "vel_wind", "pressure", "rain_measure"]
+
+def sample(index: int) -> dict:
+    return {
+        "temperature": 10 + (index * 7) % 23 + 0.25,
+        "humidity": 40 + (index * 11) % 50,
+        "dir_wind": (index * 37) % 360,
+        "vel_wind": (index * 3) % 12 + 0.5,
+        "pressure": 1000 + index % 20,
+        "rain_measure": 0.2 if index % 9 == 0 else 0.0,
+        # Intervalos irregulares (não múltiplos de minuto) ao longo de 4 dias
+        "time": (BASE_TIME + timedelta(seconds=index * 401)).isoformat(),
+    }
+
+@pytest.fixture
+def station(client, create_controller):
+    controller = create_controller()
+    readings = [sample(index) for index in range(4 * 86400 // 401)]
+    response = client.post("/data/batch", json={"readings": readings}, headers={"X-Controller-Key": controller["key"]})
+    assert response.json()["accepted"] == len(readings)
+    rollups.refresh_all_dirty(SessionLocal)
+    return controller
+
+def aggregate(client, controller_id: int, start: datetime, end: datetime, bucket: str) -> dict:
+    response = client.get("/data/aggregate", params={
+        "controller_id": controller_id, "start_time": start.isoformat(), "end_time": end.isoformat(),
+        "bucket": bucket, "metrics": METRICS,
+    })
+    assert response.status_code == 200
+    return response.json()
+
+def raw_aggregate(client, monkeypatch, *args) -> dict:
+    with monkeypatch.context() as patch:
+        patch.setattr(settings, "ROLLUPS_ENABLED", False)
+        result = aggregate(client, *args)
+    assert result["sources"] == ["sensors_meteo_sme"]
+    return result
+
+def assert_same_series(result: dict, expected: dict):
+    assert result["time"] == expected["time"]
+    assert result["count"] == expected["count"]
+    assert result["series"].keys() == expected["series"].keys()
+    for name, values in expected["series"].items():
+        assert result["series"][name] == pytest.approx(values, abs=1e-3), name
+
+@pytest.mark.parametrize("bucket", ["1h", "6h", "1d"])
+def test_unaligned_range_matches_raw(client, station, monkeypatch, bucket):
+    start = BASE_TIME + timedelta(hours=5, minutes=13, seconds=27)
+    end = BASE_TIME + timedelta(days=3, hours=2, minutes=41, seconds=9)
+
+    result = aggregate(client, station["id"], start, end, bucket)
+    assert "sensors_meteo_sme" in result["sources"]
+    assert any(source.startswith("sensors_meteo_sme_rollup_") for source in result["sources"])
+    assert_same_series(result, raw_aggregate(client, monkeypatch, station["id"], start, end, bucket))
+
+# Leituras novas no meio do período sujam buckets já agregados: até o próximo refresh o miolo termina antes do
+# primeiro bucket sujo e o restante vem das leituras brutas
+def test_buckets_dirtied_after_refresh(client, station, monkeypatch):
+    start = BASE_TIME + timedelta(minutes=30, seconds=5)
+    end = BASE_TIME + timedelta(days=3, seconds=50)
+    before = aggregate(client, station["id"], start, end, "1h")
+
+    late = [{**sample(0), "temperature": 45.0, "time": (BASE_TIME + timedelta(days=1, hours=6, seconds=13)).isoformat()}]
+    client.post("/data/batch", json={"readings": late}, headers={"X-Controller-Key": station["key"]})
+
+    dirty = aggregate(client, station["id"], start, end, "1h")
+    assert sum(dirty["count"]) == sum(before["count"]) + 1
+    assert "sensors_meteo_sme" in dirty["sources"]
+    assert_same_series(dirty, raw_aggregate(client, monkeypatch, station["id"], start, end, "1h"))
+
+    assert rollups.refresh_all_dirty(SessionLocal) >= 1
+    refreshed = aggregate(client, station["id"], start, end, "1h")
+    assert_same_series(refreshed, dirty)